@@ -0,0 +1,277 @@
+"""Read-only JSON and Server-Sent Events API for the hosted countdowns.
+
+A viewer who only wants the numbers shouldn't cost a Streamlit session, a
+websocket and a script run each. This is a plain ASGI app that runs next to
+the Streamlit app and serves the same data from the same code: the
+countdown target from page.py and the weather from a WeatherRefresher on
+the shared cache file, so it adds no upstream calls of its own while the
+app is keeping that cache fresh.
+
+    GET /trips                  hosted trips and their URLs
+    GET /trips/<slug>           countdown target and current weather (JSON)
+    GET /trips/<slug>/events    Server-Sent Events: the same document now,
+                                then again each time it changes
+    GET /static/img/<path>      slideshow derivatives from build_images.py
+
+Each trip's document is built once per weather snapshot and served as the
+same bytes to everyone, with an ETag for conditional requests and a short
+max-age for shared caches. Event streams are woken by the refresher when
+it publishes and only send when the document actually changed, with a
+comment line in between to keep idle connections open.
+
+Slideshow derivatives live under content-hashed paths, so they are served
+as immutable for a year, with an ETag that a revalidating browser gets a
+bodyless 304 for. Point the app's COUNTDOWN_STATIC_URL at this server's
+/static to load the slideshow from here.
+
+Requires an ASGI server (not needed by the Streamlit app itself):
+
+    pip install uvicorn
+    uvicorn api:app --port 8502
+"""
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+from datetime import datetime
+
+import metrics
+import trips
+from conditions import summarize_weather
+from page import APP_DIR, calculate_countdown, countdown_target_ms
+from snow_history import open_shared_history
+from weather import WeatherRefresher
+from weather_cache import open_shared_cache
+
+# How often the API re-reads the shared cache (seconds); a fresh cache costs
+# one SQLite read per source, an expired one a shared upstream refresh
+REFRESH_SECONDS = float(os.environ.get("COUNTDOWN_API_REFRESH_SECONDS", 60))
+
+# Shared caches may reuse a document this long (seconds)
+MAX_AGE = 60
+
+# Slideshow derivatives (build_images.py output) served under /static/img
+IMAGE_DIR = os.path.realpath(os.path.join(APP_DIR, "static", "img"))
+
+# Their paths change whenever their content does, so browsers may keep them
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Seconds between keep-alive comments on an idle event stream, and the
+# reconnect delay (milliseconds) suggested to clients
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 5000
+
+
+class Feed:
+    """Current JSON document for every hosted trip, and the event that wakes
+    stream subscribers when a new weather snapshot is published.
+
+    Lives on the server's event loop; the refresher thread only ever
+    schedules notify() onto it.
+    """
+
+    def __init__(self, loop, hosted_trips, refresher):
+        self.loop = loop
+        self.trips = hosted_trips
+        self.refresher = refresher
+        self.subscribers = 0
+        self._documents = {}  # slug -> (snapshot version, started, etag, body)
+        self._changed = asyncio.Event()
+        refresher.add_listener(lambda: loop.call_soon_threadsafe(self.notify))
+        # The trip starting changes its document too
+        for trip in hosted_trips.values():
+            now = datetime.now(trip.date.tzinfo)
+            if trip.date > now:
+                loop.call_later((trip.date - now).total_seconds() + 1, self.notify)
+
+    def notify(self):
+        """Wake every subscriber waiting on the current event."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def changed(self):
+        """An event set the next time anything may have changed."""
+        return self._changed
+
+    def document(self, slug):
+        """(etag, body bytes) of a trip's current document, rebuilt only when
+        its snapshot or started state has changed."""
+        trip = self.trips[slug]
+        snapshot = self.refresher.snapshot(slug)
+        started = calculate_countdown(trip.date) is None
+        cached = self._documents.get(slug)
+        if cached is not None and cached[:2] == (snapshot.version, started):
+            return cached[2:]
+        body = json.dumps({
+            "trip": trip.slug,
+            "title": trip.title,
+            "resort": trip.resort,
+            "trip_date": trip.date.isoformat(),
+            "target_ms": countdown_target_ms(trip.date),
+            "started": started,
+            "weather": summarize_weather(snapshot.conditions, snapshot.base_depth),
+            "stale": snapshot.stale,
+        }, ensure_ascii=False, separators=(",", ":")).encode()
+        # A republish of unchanged data hashes to the same ETag, so streams
+        # skip it
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        self._documents[slug] = (snapshot.version, started, etag, body)
+        return etag, body
+
+
+_feed = None
+
+
+def get_feed():
+    """The process-wide Feed, created (and its refresher started) on first
+    use from inside the server's event loop."""
+    global _feed
+    if _feed is None:
+        # The app's cache file, so the API serves what the app fetched
+        hosted_trips = trips.load_trips()
+        refresher = WeatherRefresher(interval=REFRESH_SECONDS, trips=hosted_trips.values(),
+                                     cache=open_shared_cache(), history=open_shared_history())
+        _feed = Feed(asyncio.get_running_loop(), hosted_trips, refresher)
+        refresher.start()
+    return _feed
+
+
+def _subscriber_metrics():
+    if _feed is not None:
+        yield "api_event_subscribers", {}, _feed.subscribers
+
+
+metrics.register_gauges(_subscriber_metrics)
+
+COMMON_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+
+async def _respond(send, status, headers, body=b"", head=False):
+    """Send a complete response; head=True sends only its headers."""
+    headers = COMMON_HEADERS + headers + [(b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+async def _json(send, scope, etag, body):
+    """Send a JSON document, or a 304 if the client already has it."""
+    headers = [(b"etag", etag.encode()), (b"cache-control", f"public, max-age={MAX_AGE}".encode())]
+    request_headers = dict(scope["headers"])
+    if request_headers.get(b"if-none-match", b"").decode() == etag:
+        await _respond(send, 304, headers)
+        return 304
+    await _respond(send, 200, headers + [(b"content-type", b"application/json; charset=utf-8")],
+                   body, head=scope["method"] == "HEAD")
+    return 200
+
+
+def _read_image(relative_path):
+    """(etag, content type, bytes) of a file under IMAGE_DIR, or None if
+    there is no such file (or the path leads outside it)."""
+    path = os.path.realpath(os.path.join(IMAGE_DIR, relative_path))
+    if not path.startswith(IMAGE_DIR + os.sep) or not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        body = f.read()
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f'"{hashlib.sha1(body).hexdigest()[:16]}"', content_type, body
+
+
+async def _image(send, scope, relative_path):
+    """Send a slideshow derivative, or a 304 if the client already has it."""
+    found = await asyncio.to_thread(_read_image, relative_path)
+    if found is None:
+        await _respond(send, 404, [(b"content-type", b"text/plain")], b"Not found")
+        return 404
+    etag, content_type, body = found
+    headers = [(b"etag", etag.encode()), (b"cache-control", IMMUTABLE.encode())]
+    if dict(scope["headers"]).get(b"if-none-match", b"").decode() == etag:
+        await _respond(send, 304, headers)
+        return 304
+    await _respond(send, 200, headers + [(b"content-type", content_type.encode())],
+                   body, head=scope["method"] == "HEAD")
+    return 200
+
+
+async def _stream(send, receive, scope, feed, slug):
+    """Send the trip's document as an event now (unless the client already
+    has it, per Last-Event-ID) and after every change, until the client
+    goes away."""
+    stream = asyncio.current_task()
+
+    async def watch_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        stream.cancel()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    last_sent = dict(scope["headers"]).get(b"last-event-id", b"").decode()
+    feed.subscribers += 1
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": COMMON_HEADERS + [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),  # Don't let a proxy buffer the stream
+        ]})
+        await send({"type": "http.response.body", "body": f"retry: {RETRY_MS}\n\n".encode(),
+                    "more_body": True})
+        while True:
+            changed = feed.changed()
+            etag, body = feed.document(slug)
+            if etag != last_sent:
+                message = b"id: %s\nevent: snapshot\ndata: %s\n\n" % (etag.encode(), body)
+                await send({"type": "http.response.body", "body": message, "more_body": True})
+                last_sent = etag
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                await send({"type": "http.response.body", "body": b": keepalive\n\n",
+                            "more_body": True})
+    except asyncio.CancelledError:
+        pass  # Client disconnected
+    finally:
+        feed.subscribers -= 1
+        watcher.cancel()
+
+
+async def app(scope, receive, send):
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                get_feed()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    parts = scope["path"].strip("/").split("/")
+    feed = None if parts[0] == "static" else get_feed()
+    if scope["method"] not in ("GET", "HEAD"):
+        route, status = "other", 405
+        await _respond(send, status, [(b"allow", b"GET, HEAD")])
+    elif feed is None:
+        route = "image"
+        status = await _image(send, scope, "/".join(parts[2:]) if parts[1:2] == ["img"] else "")
+    elif parts == ["trips"]:
+        route = "trips"
+        body = json.dumps({
+            slug: {"title": trip.title, "url": f"/trips/{slug}", "events": f"/trips/{slug}/events"}
+            for slug, trip in feed.trips.items()
+        }, ensure_ascii=False).encode()
+        status = await _json(send, scope, f'"{hashlib.sha1(body).hexdigest()[:16]}"', body)
+    elif len(parts) == 2 and parts[0] == "trips" and parts[1] in feed.trips:
+        route = "document"
+        status = await _json(send, scope, *feed.document(parts[1]))
+    elif len(parts) == 3 and parts[0] == "trips" and parts[1] in feed.trips and parts[2] == "events":
+        route, status = "events", 200
+        await _stream(send, receive, scope, feed, parts[1])
+    else:
+        route, status = "other", 404
+        await _respond(send, status, [(b"content-type", b"text/plain")], b"Not found")
+    metrics.inc("api_requests_total", doc="API requests by route and status",
+                route=route, status=str(status))
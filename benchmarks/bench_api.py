@@ -0,0 +1,267 @@
+"""Load test for the JSON/SSE API (api.py) on a single uvicorn process.
+
+Starts the API against the upstream stubs with its own weather cache file,
+then drives it from local asyncio clients:
+
+- json: keep-alive clients fetching a trip's document, unconditionally and
+  with If-None-Match (answered 304), reported as requests per second
+- events: N concurrent Server-Sent Events subscribers; time until all of
+  them have their first event, and the server's resident memory with all
+  of them connected
+- push: a new weather payload is written to the shared cache (as the app
+  would after a refresh); time from the write until each subscriber has
+  the new event, and how many got it exactly once
+
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --subscribers 5000 --output api.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from stub_server import start_stubs  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return None
+
+
+def start_server(port, cache_path):
+    env = dict(os.environ, WEATHER_CACHE_PATH=cache_path, COUNTDOWN_API_REFRESH_SECONDS="1",
+               SNOW_HISTORY_PATH=os.path.join(os.path.dirname(cache_path), "history.sqlite3"))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--host", HOST, "--port", str(port),
+         "--log-level", "warning", "--no-access-log", "--backlog", "4096"],
+        cwd=REPO_DIR, env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://{HOST}:{port}/trips", timeout=1) as response:
+                slug = next(iter(json.load(response)))
+            with urllib.request.urlopen(f"http://{HOST}:{port}/trips/{slug}", timeout=1) as response:
+                if json.load(response)["weather"]:
+                    return proc, slug
+        except OSError:
+            pass
+        time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("API did not start")
+
+
+async def read_response(reader):
+    """(status, headers, body) of one non-streamed response."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = dict(line.split(": ", 1) for line in lines[1:] if line)
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers, body
+
+
+async def json_client(port, path, requests, etag=None):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    extra = f"If-None-Match: {etag}\r\n" if etag else ""
+    request = f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n{extra}\r\n".encode()
+    statuses = []
+    for _ in range(requests):
+        writer.write(request)
+        status, _, _ = await read_response(reader)
+        statuses.append(status)
+    writer.close()
+    return statuses
+
+
+async def bench_json(port, path, clients, requests):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode())
+    _, headers, body = await read_response(reader)
+    writer.close()
+    results = {"body_bytes": len(body)}
+    for name, etag in (("plain", None), ("conditional", headers["etag"])):
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(json_client(port, path, requests, etag)
+                                          for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        flat = [s for batch in statuses for s in batch]
+        results[name] = {
+            "requests": len(flat),
+            "requests_per_s": round(len(flat) / elapsed),
+            "statuses": sorted(set(flat)),
+        }
+    return results
+
+
+class Subscriber:
+    """One event-stream client; records when each snapshot event arrives."""
+
+    def __init__(self):
+        self.arrivals = []
+        self.first = asyncio.Event()
+        self.writer = None
+
+    async def run(self, port, path):
+        reader, self.writer = await asyncio.open_connection(HOST, port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n"
+                          f"Accept: text/event-stream\r\n\r\n".encode())
+        buffer = b""
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            buffer += chunk
+            found = buffer.count(b"event: snapshot\n")
+            if found:
+                now = time.perf_counter()
+                self.arrivals.extend([now] * found)
+                buffer = buffer[buffer.rfind(b"event: snapshot\n") + 16:]
+                self.first.set()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def publish_change(cache_path, slug):
+    """Write a changed conditions payload into the shared cache, as a peer
+    process would after fetching new weather."""
+    from trips import load_trips
+    from weather import CONDITIONS_KEY, SOURCE_TTLS, cache_key
+    from weather_cache import SqliteCache
+    trip = load_trips()[slug]
+    cache = SqliteCache(cache_path)
+    key = cache_key(CONDITIONS_KEY, trip.location_key)
+    value = dict(cache.get(key).value)
+    value["temperature"] = round(value["temperature"] + 1.0, 1)
+    value["temperature_label"] = f"{value['temperature']}°F"
+    cache.set(key, value, SOURCE_TTLS[CONDITIONS_KEY])
+
+
+def ms_percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {"p50_ms": pick(0.5), "p99_ms": pick(0.99), "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+async def bench_events(port, path, count, server_pid, cache_path, slug):
+    subscribers = [Subscriber() for _ in range(count)]
+    gate = asyncio.Semaphore(256)  # Don't overflow the accept backlog
+
+    async def connect(sub):
+        async with gate:
+            task = asyncio.create_task(sub.run(port, path))
+            await sub.first.wait()
+            return task
+
+    start = time.perf_counter()
+    tasks = await asyncio.gather(*(connect(sub) for sub in subscribers))
+    connected_s = time.perf_counter() - start
+    rss_connected = rss_kb(server_pid)
+
+    publish_change(cache_path, slug)
+    written = time.perf_counter()
+    deadline = written + 30
+    while time.perf_counter() < deadline and any(len(s.arrivals) < 2 for s in subscribers):
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(1.5)  # Catch any duplicate pushes from later refreshes
+    latencies = [s.arrivals[1] - written for s in subscribers if len(s.arrivals) >= 2]
+    exactly_once = sum(len(s.arrivals) == 2 for s in subscribers)
+
+    for sub in subscribers:
+        sub.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "subscribers": count,
+        "all_connected_s": round(connected_s, 3),
+        "server_rss_mb": round(rss_connected / 1024, 1),
+        "push": {
+            "received": len(latencies),
+            "exactly_once": exactly_once,
+            # Includes up to COUNTDOWN_API_REFRESH_SECONDS (1 s) until the
+            # server's refresher reads the cache
+            **ms_percentiles(latencies or [float("nan")]),
+            "fanout_ms": round((max(latencies) - min(latencies)) * 1000, 1) if latencies else None,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--json-clients", type=int, default=50)
+    parser.add_argument("--json-requests", type=int, default=200, help="requests per JSON client")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    # Each subscriber holds a socket on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.subscribers * 2 + 100 > hard:
+        parser.error(f"--subscribers needs ~{args.subscribers * 2 + 100} file descriptors; limit is {hard}")
+
+    start_stubs()
+    cache_path = os.path.join(tempfile.mkdtemp(), "weather.sqlite3")
+    port = free_port()
+    proc, slug = start_server(port, cache_path)
+    try:
+        rss_idle = rss_kb(proc.pid)
+        json_results = asyncio.run(bench_json(port, f"/trips/{slug}", args.json_clients,
+                                              args.json_requests))
+        event_results = asyncio.run(bench_events(port, f"/trips/{slug}/events", args.subscribers,
+                                                 proc.pid, cache_path, slug))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "server_rss_idle_mb": round(rss_idle / 1024, 1),
+        "json": json_results,
+        "events": event_results,
+    }
+    event_results["rss_per_subscriber_kb"] = round(
+        (event_results["server_rss_mb"] - results["server_rss_idle_mb"]) * 1024 / args.subscribers, 2)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Upstream bytes fetched per day, before and after the lean request layer.
+
+Replays one simulated day of weather refreshes against the local stubs, with
+the upstream data changing on its own schedule (Open-Meteo's current
+conditions every 15 minutes, a resort report twice a day):
+
+- before: every 30-minute refresh fetches both sources unconditionally,
+  with the old Open-Meteo field list (including the unused
+  precipitation_sum)
+- after: the app's own fetchers, asking only for the fields shown, each
+  source refetched on its SOURCE_TTLS cadence and as a conditional GET
+
+Bytes are response bodies as sent on the wire (gzipped when the client
+accepts it); headers are not counted.
+
+    python benchmarks/bench_bandwidth.py
+    python benchmarks/bench_bandwidth.py --om-change 3600 --output bandwidth.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from stub_server import start_stubs  # noqa: E402
+
+DAY = 86400
+CHECK_INTERVAL = 1800  # The app's WEATHER_REFRESH_SECONDS
+
+LEGACY_DAILY = "snowfall_sum,temperature_2m_max,temperature_2m_min,precipitation_sum"
+
+
+def legacy_fetch(weather, hosted_trips):
+    """The request pair every refresh made before: full field list, no
+    validators."""
+    trip = hosted_trips[0]
+    session = weather._get_session()
+    session.get(os.environ["OPEN_METEO_URL"], params={
+        "latitude": str(trip.latitude),
+        "longitude": str(trip.longitude),
+        "current": "temperature_2m,weather_code,wind_speed_10m",
+        "daily": LEGACY_DAILY,
+        "timezone": trip.timezone,
+        "forecast_days": 7,
+        "temperature_unit": "fahrenheit",
+        "wind_speed_unit": "mph",
+        "precipitation_unit": "inch",
+    }, timeout=10).raise_for_status()
+    session.get(os.environ["SNOCOUNTRY_URL"], params={
+        "apiKey": "SnoCountry.example", "ids": trip.resort_id,
+    }, timeout=10).raise_for_status()
+
+
+def simulate_day(mode, changes):
+    """Run one day of refresh checks in the given mode against fresh stubs;
+    returns per-source request, 304 and byte counts."""
+    stubs = dict(zip(("open_meteo", "snocountry"), start_stubs()))
+    import weather
+    from trips import load_trips
+    weather.OPEN_METEO_URL = os.environ["OPEN_METEO_URL"]
+    weather.SNOCOUNTRY_URL = os.environ["SNOCOUNTRY_URL"]
+    weather._validated.clear()
+    hosted_trips = list(load_trips().values())
+    fetchers = {
+        weather.CONDITIONS_KEY: weather.get_snow_conditions,
+        weather.BASE_DEPTH_KEY: weather.get_resort_base_depths,
+    }
+
+    last_fetch = {}
+    for now in range(0, DAY, CHECK_INTERVAL):
+        for key, stub in stubs.items():
+            if now and now // changes[key] != (now - CHECK_INTERVAL) // changes[key]:
+                stub.update()
+        if mode == "before":
+            legacy_fetch(weather, hosted_trips)
+            continue
+        for key, fetch in fetchers.items():
+            if now - last_fetch.get(key, -DAY) >= weather.SOURCE_TTLS[key]:
+                fetch(hosted_trips)
+                last_fetch[key] = now
+
+    result = {}
+    for key, stub in stubs.items():
+        result[key] = {
+            "requests": stub.requests,
+            "not_modified": stub.not_modified,
+            "bytes": stub.bytes_sent,
+        }
+        stub.stop()
+    result["total_bytes"] = sum(r["bytes"] for r in result.values())
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--om-change", type=int, default=900,
+                        help="seconds between Open-Meteo data changes")
+    parser.add_argument("--snocountry-change", type=int, default=43200,
+                        help="seconds between resort report changes")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    changes = {"open_meteo": args.om_change, "snocountry": args.snocountry_change}
+    before = simulate_day("before", changes)
+    after = simulate_day("after", changes)
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "before": before,
+        "after": after,
+        "reduction": round(1 - after["total_bytes"] / before["total_bytes"], 3),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
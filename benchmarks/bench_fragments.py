@@ -0,0 +1,103 @@
+"""Per-rerun render CPU with and without the shared fragment cache.
+
+Simulates 1, 100 and 1,000 sessions rerunning together. Each round
+publishes a new weather snapshot version (far more often than the real
+30-minute refresh, so the cached numbers include a re-render every round)
+and then every session renders the page:
+
+- per_session: each session builds the header, countdown, weather sidebar
+  and slideshow itself
+- shared: each session builds only its countdown and takes the rest from
+  one FragmentCache
+
+    python benchmarks/bench_fragments.py
+    python benchmarks/bench_fragments.py --sessions 1 100 1000 --rounds 20 --output fragments.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from conditions import parse_conditions  # noqa: E402
+from fragment_cache import FragmentCache  # noqa: E402
+from page import (  # noqa: E402
+    build_countdown_html, build_main_html, build_slideshow_html, build_trip_header_html,
+    build_weather_html, calculate_countdown, find_slide_images, load_image_manifest,
+)
+from trips import load_trips  # noqa: E402
+
+STATIC_BASE = "app/static"
+BASE_DEPTH = 48
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--rounds", type=int, default=20, help="reruns per session")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(BENCH_DIR, "fixtures", "open_meteo.json")) as f:
+        conditions = parse_conditions(json.load(f))
+    trip = next(iter(load_trips().values()))
+    image_files = find_slide_images()
+    manifest = load_image_manifest()
+
+    def per_session(version):
+        countdown = calculate_countdown(trip.date)
+        return (build_main_html(trip, countdown),
+                build_weather_html(conditions, BASE_DEPTH),
+                build_slideshow_html(image_files, manifest, STATIC_BASE))
+
+    fragments = FragmentCache()
+
+    def shared(version):
+        countdown = calculate_countdown(trip.date)
+        main_html = (fragments.get(f"header:{trip.slug}", trip, lambda: build_trip_header_html(trip))
+                     + build_countdown_html(trip, countdown))
+        return (main_html,
+                fragments.get(f"weather:{trip.slug}", version,
+                              lambda: build_weather_html(conditions, BASE_DEPTH)),
+                fragments.get("slideshow", tuple(image_files),
+                              lambda: build_slideshow_html(image_files, manifest, STATIC_BASE)))
+
+    assert per_session(1) == shared(1)
+
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "rounds": args.rounds,
+        },
+    }
+    for sessions in args.sessions:
+        row = {}
+        for name, render in (("per_session", per_session), ("shared", shared)):
+            fragments.clear()
+            start = time.process_time()
+            for version in range(args.rounds):
+                for _ in range(sessions):
+                    render(version)
+            cpu = time.process_time() - start
+            row[name] = {
+                "cpu_us_per_rerun": round(cpu / (args.rounds * sessions) * 1e6, 3),
+                "cpu_ms_per_round": round(cpu / args.rounds * 1000, 3),
+            }
+        row["speedup"] = round(row["per_session"]["cpu_us_per_rerun"]
+                               / row["shared"]["cpu_us_per_rerun"], 2)
+        results[f"{sessions}_sessions"] = row
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Insert and query cost of the snow history store on a synthetic history.
+
+Fills a fresh SnowHistory with several years of half-hourly samples (one
+per refresh) for a few locations, then times:
+
+- appending one refresh's samples, as the weather refresher does
+- a raw range query covering one season
+- downsampling that season to a few hundred buckets inside SQLite, next to
+  the same aggregation done in Python over the raw range
+
+    python benchmarks/bench_history.py
+    python benchmarks/bench_history.py --years 5 --locations 10 --output history.json
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from snow_history import SnowHistory  # noqa: E402
+
+STEP = 1800  # One sample per 30-minute refresh
+SEASON = 180 * 86400
+METRICS = ("temperature", "wind_speed", "snowfall_7day", "base_depth")
+
+
+def synthetic_samples(location, start, count, seed):
+    """Plausible-looking seasonal series for one location."""
+    rng = random.Random(seed)
+    for i in range(count):
+        ts = start + i * STEP
+        season = math.sin(2 * math.pi * i * STEP / (365 * 86400))
+        yield location, "temperature", ts, 30 - 25 * season + rng.gauss(0, 5)
+        yield location, "wind_speed", ts, abs(rng.gauss(8, 4))
+        yield location, "snowfall_7day", ts, max(0.0, 10 * season + rng.gauss(0, 4))
+        yield location, "base_depth", ts, max(0.0, 60 * season)
+
+
+def timed(fn, repeat=5):
+    """Best-of-repeat wall time of fn() in milliseconds, and its result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3), result
+
+
+def python_downsample(rows, start, end, buckets):
+    width = (end - start) / buckets
+    acc = {}
+    for ts, value in rows:
+        b = acc.setdefault(int((ts - start) // width), [value, value, 0.0, 0])
+        b[0] = min(b[0], value)
+        b[1] = max(b[1], value)
+        b[2] += value
+        b[3] += 1
+    return [(start + k * width, lo, hi, total / n, n) for k, (lo, hi, total, n) in sorted(acc.items())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--locations", type=int, default=3)
+    parser.add_argument("--buckets", type=int, default=300)
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "history.sqlite3")
+    history = SnowHistory(path)
+    count = args.years * 365 * 86400 // STEP
+    start = time.time() - count * STEP
+    locations = [f"open_meteo:loc{i}" for i in range(args.locations)]
+
+    load_start = time.perf_counter()
+    for seed, location in enumerate(locations):
+        history.record_many(synthetic_samples(location, start, count, seed))
+    load_s = time.perf_counter() - load_start
+    total = count * len(METRICS) * len(locations)
+
+    # One refresh's worth of samples: every metric for every location
+    refreshes = itertools.count(start + count * STEP, STEP)
+
+    def append_refresh():
+        ts = next(refreshes)
+        history.record_many((location, metric, ts, 1.0)
+                            for location in locations for metric in METRICS)
+
+    append_ms, _ = timed(append_refresh, repeat=50)
+
+    end = start + count * STEP  # Season queries stop before the appended refreshes
+    season_start = end - SEASON
+    location = locations[0]
+    range_ms, rows = timed(lambda: history.range(location, "snowfall_7day", season_start, end))
+    downsample_ms, buckets = timed(
+        lambda: history.downsample(location, "snowfall_7day", season_start, end, args.buckets))
+    python_ms, _ = timed(lambda: python_downsample(
+        history.range(location, "snowfall_7day", season_start, end), season_start, end, args.buckets))
+
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "load": {
+            "samples": total,
+            "seconds": round(load_s, 3),
+            "samples_per_s": round(total / load_s),
+            "file_bytes": os.path.getsize(path),
+            "bytes_per_sample": round(os.path.getsize(path) / total, 1),
+        },
+        "append_refresh_ms": append_ms,
+        "season_query": {
+            "rows": len(rows),
+            "range_ms": range_ms,
+            "downsample_rows": len(buckets),
+            "downsample_ms": downsample_ms,
+            "python_downsample_ms": python_ms,
+        },
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Soak test: server memory and work with hundreds of background tabs.
+
+Runs the app under `streamlit run` against the upstream stubs and connects
+N simulated browser tabs over Streamlit's websocket protocol. Each tab runs
+the script once, then reports itself hidden the way page.TAB_VISIBILITY_JS
+does, and the server is left alone with them for the soak period while its
+resident memory and metrics are sampled:
+
+- memory before the tabs, with them open, once hidden and over the soak
+  (with its trend in MB per minute)
+- script runs during the soak, which should be none (a hidden tab has no
+  refresh timer)
+- sessions{state=active|suspended} and sessions_evicted_total as the tabs
+  pass --evict-after
+- at the end, a sample of tabs comes back: ones hidden for less than
+  --evict-after report visible and the rest reload, as the page script
+  does, and the time until each has a fresh render
+
+    python benchmarks/bench_idle_sessions.py
+    python benchmarks/bench_idle_sessions.py --tabs 500 --soak 600 --evict-after 300 --output idle.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import websockets  # noqa: E402
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+
+from harness import APP_PATH  # noqa: E402
+from stub_server import start_stubs  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def start_server(port, metrics_port, evict_after):
+    tmp = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        COUNTDOWN_METRICS="1",
+        COUNTDOWN_METRICS_PORT=str(metrics_port),
+        COUNTDOWN_IDLE_EVICT_SECONDS=str(evict_after),
+        WEATHER_CACHE_PATH=os.path.join(tmp, "weather.sqlite3"),
+        WEATHER_SNAPSHOT_PATH=os.path.join(tmp, "weather_snapshot.json"),
+        SNOW_HISTORY_PATH=os.path.join(tmp, "history.sqlite3"),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("streamlit did not start")
+
+
+def read_metrics(port):
+    """{name{labels}: value} from the app's /metrics endpoint."""
+    try:
+        with urllib.request.urlopen(f"http://{HOST}:{port}/metrics", timeout=5) as response:
+            text = response.read().decode()
+    except OSError:
+        return {}
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            values[name] = float(value)
+    return values
+
+
+def rerun_message(widgets=()):
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    msg.rerun_script.page_script_hash = ""
+    for widget_id, value in widgets:
+        state = msg.rerun_script.widget_states.widgets.add()
+        state.id = widget_id
+        state.json_value = json.dumps(value)
+    return msg.SerializeToString()
+
+
+class Tab:
+    """One browser tab: a websocket session that runs the script on demand."""
+
+    def __init__(self, port, evict_after):
+        self.url = f"ws://{HOST}:{port}/_stcore/stream"
+        self.evict_after = evict_after
+        self.ws = None
+        self.visibility_id = None
+        self.hidden_at = None
+        self.reloaded = False
+        self.auto_rerun = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def run(self, widgets=()):
+        """Request a script run and wait for it to finish; returns seconds."""
+        start = time.perf_counter()
+        self.auto_rerun = None
+        await self.ws.send(rerun_message(widgets))
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                if element.WhichOneof("type") == "bidi_component":
+                    self.visibility_id = element.bidi_component.id
+            elif kind == "auto_rerun":
+                self.auto_rerun = msg.auto_rerun.interval
+            elif kind == "script_finished":
+                return time.perf_counter() - start
+
+    async def open(self):
+        await self.connect()
+        return await self.run()
+
+    async def hide(self):
+        self.hidden_at = time.monotonic()
+        return await self.run([(self.visibility_id, {"visible": False})])
+
+    async def show(self):
+        """Come back to the tab: report visible, or reload if it was hidden
+        long enough for its session to have been closed."""
+        if time.monotonic() - self.hidden_at >= self.evict_after:
+            self.reloaded = True
+            await self.ws.close()
+            return await self.open()
+        return await self.run([(self.visibility_id, {"visible": True})])
+
+
+def percentiles_ms(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 1),
+    }
+
+
+async def soak(port, metrics_port, pid, args):
+    timeline = []
+
+    def sample(phase, t0):
+        m = read_metrics(metrics_port)
+        timeline.append({
+            "t": round(time.perf_counter() - t0, 1),
+            "phase": phase,
+            "rss_mb": rss_mb(pid),
+            "active": m.get('sessions{state="active"}'),
+            "suspended": m.get('sessions{state="suspended"}'),
+            "evicted": m.get("sessions_evicted_total", 0),
+            "script_runs": m.get("script_runs_total", 0),
+        })
+        return timeline[-1]
+
+    t0 = time.perf_counter()
+    baseline = sample("baseline", t0)
+    gate = asyncio.Semaphore(args.concurrency)
+    tabs = [Tab(port, args.evict_after) for _ in range(args.tabs)]
+
+    async def limited(coro):
+        async with gate:
+            return await coro
+
+    open_s = await asyncio.gather(*(limited(tab.open()) for tab in tabs))
+    opened = sample("open", t0)
+    hide_s = await asyncio.gather(*(limited(tab.hide()) for tab in tabs))
+    hidden = sample("hidden", t0)
+    timers_left = sum(tab.auto_rerun is not None for tab in tabs)
+
+    end = time.perf_counter() + args.soak
+    while time.perf_counter() < end:
+        await asyncio.sleep(min(args.sample_every, max(end - time.perf_counter(), 0)))
+        sample("soak", t0)
+
+    returning = tabs[:args.returning]
+    show_s = await asyncio.gather(*(limited(tab.show()) for tab in returning))
+    final = sample("returned", t0)
+    for tab in tabs:
+        await tab.ws.close()
+
+    soak_points = [p for p in timeline if p["phase"] == "soak"]
+    minutes = (soak_points[-1]["t"] - hidden["t"]) / 60 if soak_points else 0
+    return {
+        "rss_mb": {
+            "baseline": baseline["rss_mb"],
+            "tabs_open": opened["rss_mb"],
+            "tabs_hidden": hidden["rss_mb"],
+            "soak_max": max((p["rss_mb"] for p in soak_points), default=None),
+            "soak_end": soak_points[-1]["rss_mb"] if soak_points else None,
+            "soak_trend_mb_per_min": round((soak_points[-1]["rss_mb"] - hidden["rss_mb"]) / minutes, 2)
+            if minutes else None,
+        },
+        "first_render": percentiles_ms(open_s),
+        "hide_render": percentiles_ms(hide_s),
+        "refresh_timers_left_after_hide": timers_left,
+        "script_runs_during_soak": (soak_points[-1]["script_runs"] - hidden["script_runs"])
+        if soak_points else None,
+        "evicted": int(final["evicted"]),
+        "returning": {
+            "tabs": len(returning),
+            "reloaded": sum(tab.reloaded for tab in returning),
+            **percentiles_ms(show_s),
+        },
+        "timeline": timeline,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tabs", type=int, default=300)
+    parser.add_argument("--soak", type=float, default=180, help="seconds to leave the tabs hidden")
+    parser.add_argument("--evict-after", type=float, default=90,
+                        help="COUNTDOWN_IDLE_EVICT_SECONDS for the server")
+    parser.add_argument("--returning", type=int, default=20, help="tabs shown again at the end")
+    parser.add_argument("--concurrency", type=int, default=20, help="tabs opening at once")
+    parser.add_argument("--sample-every", type=float, default=10)
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    start_stubs()
+    port, metrics_port = free_port(), free_port()
+    proc = start_server(port, metrics_port, args.evict_after)
+    try:
+        results = asyncio.run(soak(port, metrics_port, proc.pid, args))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        **results,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
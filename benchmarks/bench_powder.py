@@ -0,0 +1,127 @@
+"""Cost of the powder outlook over multi-resort, multi-week hourly arrays.
+
+Scores synthetic hourly snowfall/temperature/wind for N resorts over a
+forecast window of W weeks two ways, and checks they agree:
+
+- numpy: powder.score_days() over (resorts, hours) arrays
+- python: the same aggregates and scores computed hour by hour in plain
+  Python, as the sidebar's daily sums used to be
+
+    python benchmarks/bench_powder.py
+    python benchmarks/bench_powder.py --resorts 1 10 100 1000 --weeks 1 2 --output powder.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import powder  # noqa: E402
+from powder import (  # noqa: E402
+    CALM_MPH, COLD_SPAN, LIFTS_OPEN_HOUR, POWDER_DEPTH, WARM_F, WIND_SPAN, score_days,
+)
+
+
+def synthetic_hourly(resorts, hours, seed=0):
+    """Storm cycles of snowfall with diurnal temperature and gusty wind."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(hours)
+    storms = np.clip(np.sin(2 * np.pi * (t / 96 + rng.random((resorts, 1)))), 0, None)
+    snowfall = np.round(storms * rng.gamma(1.5, 0.25, (resorts, hours)), 2)
+    temperature = np.round(20 + 10 * np.sin(2 * np.pi * (t - 9) / 24)
+                           + rng.normal(0, 3, (resorts, hours)), 1)
+    wind = np.round(np.abs(rng.normal(12, 6, (resorts, hours))), 1)
+    return snowfall, temperature, wind
+
+
+def python_scores(snowfall, temperature, wind):
+    """Reference implementation: one resort and one hour at a time."""
+    results = []
+    for snow, temp, gusts in zip(snowfall.tolist(), temperature.tolist(), wind.tolist()):
+        days = len(snow) // 24
+        quality = [min(max((WARM_F - tp) / COLD_SPAN, 0.0), 1.0)
+                   * min(max(1.0 - (w - CALM_MPH) / WIND_SPAN, 0.0), 1.0)
+                   for tp, w in zip(temp, gusts)]
+        scores, highs = [], []
+        for d in range(days):
+            hours = slice(d * 24, d * 24 + 24)
+            highs.append(max(temp[hours]))
+            end = d * 24 + LIFTS_OPEN_HOUR
+            window = range(max(end - 24, 0), end)
+            fresh = sum(snow[h] for h in window)
+            if fresh > 0.005:
+                q = sum(snow[h] * quality[h] for h in window) / fresh
+                scores.append(round(100 * (1 - math.exp(-fresh / POWDER_DEPTH)) * q))
+            else:
+                scores.append(0)
+        results.append((scores, highs))
+    return results
+
+
+def best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--resorts", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--weeks", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+        },
+    }
+    for weeks in args.weeks:
+        for resorts in args.resorts:
+            arrays = synthetic_hourly(resorts, weeks * 7 * 24)
+            vectorized = score_days(*arrays)
+            reference = python_scores(*arrays)
+            # Rounding can differ by one point where a score lands on .5
+            assert all(
+                np.abs(vectorized["score"][i] - scores).max() <= 1
+                and np.allclose(vectorized["high"][i], highs)
+                for i, (scores, highs) in enumerate(reference)
+            ), "numpy and python scores disagree"
+            numpy_ms = best_ms(lambda: score_days(*arrays), args.repeat)
+            python_ms = best_ms(lambda: python_scores(*arrays), args.repeat)
+            results[f"{resorts}_resorts_{weeks}_weeks"] = {
+                "hourly_values": int(arrays[0].size * 3),
+                "numpy_ms": round(numpy_ms, 3),
+                "python_ms": round(python_ms, 3),
+                "numpy_us_per_resort": round(numpy_ms * 1000 / resorts, 2),
+                "speedup": round(python_ms / numpy_ms, 1),
+            }
+
+    # End to end for one real fetch: payload parsing plus scoring
+    with open(os.path.join(BENCH_DIR, "fixtures", "open_meteo.json")) as f:
+        payload = json.load(f)
+    results["fixture_forecast_ms"] = round(best_ms(lambda: powder.forecast(payload), args.repeat), 3)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
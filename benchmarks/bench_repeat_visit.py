@@ -0,0 +1,269 @@
+"""Slideshow bytes and requests on a first visit and on repeat visits.
+
+Loads every slideshow photo a browser would pick (see bench_slideshow.py)
+from each origin the app can load them from, through a browser-style HTTP
+cache, then visits again after each --after interval:
+
+- github: hot-linked from GITHUB_RAW_BASE (the default), played by a local
+  stand-in that sends raw.githubusercontent.com's caching headers
+  (max-age=300, a strong ETag, 304 for a matching If-None-Match)
+- api: the API app's /static (api.py under uvicorn), which the app uses
+  when COUNTDOWN_STATIC_URL points at it
+- streamlit: Streamlit's own static file serving (/app/static), with
+  whatever caching headers this Streamlit version sends
+
+The cache follows HTTP caching rules: a stored response is reused without
+a request while it is fresh (Cache-Control max-age, or a tenth of its age
+since Last-Modified when there is none), revalidated with If-None-Match or
+If-Modified-Since once stale, and refetched when it has neither. Repeat
+visits move the cache's clock forward instead of waiting.
+
+    python benchmarks/bench_repeat_visit.py
+    python benchmarks/bench_repeat_visit.py --after 60 3600 86400 --viewport 1280 --dpr 1
+"""
+import argparse
+import functools
+import hashlib
+import http.client
+import http.server
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_slideshow import (  # noqa: E402
+    DESKTOP_SLOT, DPR, MOBILE_BREAKPOINT, VIEWPORT, SlideParser, choose,
+)
+from harness import APP_PATH  # noqa: E402
+from page import build_slide_html, find_slide_images, load_image_manifest  # noqa: E402
+
+HOST = "127.0.0.1"
+
+# What raw.githubusercontent.com sends
+GITHUB_MAX_AGE = 300
+
+
+class GithubRawHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves the repo with raw.githubusercontent.com's caching headers."""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError:
+            self.send_error(404)
+            return None
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        status = 304 if self.headers.get("If-None-Match") == etag else 200
+        self.send_response(status)
+        self.send_header("Cache-Control", f"max-age={GITHUB_MAX_AGE}")
+        self.send_header("ETag", etag)
+        self.send_header("Date", formatdate(usegmt=True))
+        if status == 304:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return None
+
+    def do_GET(self):
+        self.send_head()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_github_stand_in():
+    server = http.server.ThreadingHTTPServer(
+        (HOST, 0), functools.partial(GithubRawHandler, directory=REPO_DIR))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://{HOST}:{server.server_address[1]}"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+# How to start each served origin, and the URL path that answers once it is up
+SERVERS = {
+    "api": (["-m", "uvicorn", "api:app", "--host", HOST, "--port", "{port}",
+             "--log-level", "warning", "--no-access-log"], "/static", "/trips"),
+    "streamlit": (["-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+                   "--server.port", "{port}", "--server.fileWatcherType", "none",
+                   "--browser.gatherUsageStats", "false"], "/app/static", "/_stcore/health"),
+}
+
+
+def start_server(name, port):
+    """Start one of SERVERS against a scratch weather cache (nothing here
+    asks for weather, so neither calls upstream); returns (process, the URL
+    that serves static/)."""
+    args, static_path, health_path = SERVERS[name]
+    tmp = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        WEATHER_CACHE_PATH=os.path.join(tmp, "weather.sqlite3"),
+        WEATHER_SNAPSHOT_PATH=os.path.join(tmp, "weather_snapshot.json"),
+        SNOW_HISTORY_PATH=os.path.join(tmp, "history.sqlite3"),
+    )
+    proc = subprocess.Popen(
+        [sys.executable] + [arg.format(port=port) for arg in args],
+        cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{port}{health_path}", timeout=1)
+            return proc, f"http://{HOST}:{port}{static_path}"
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{name} did not start")
+
+
+def slide_urls(static_base, slot_px, formats):
+    """The URL of every slide's photo a browser picks for the slot."""
+    manifest = load_image_manifest()
+    parser = SlideParser()
+    parser.feed("".join(build_slide_html(f, manifest, static_base) for f in find_slide_images()))
+    return [choose(slide, slot_px, formats)[0] for slide in parser.slides]
+
+
+def freshness_lifetime(headers):
+    """Seconds a stored response may be reused without revalidating."""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return float(match.group(1))
+    if "last-modified" in headers and "date" in headers:
+        # Heuristic freshness, as browsers apply it
+        age = (parsedate_to_datetime(headers["date"])
+               - parsedate_to_datetime(headers["last-modified"])).total_seconds()
+        return max(0.0, age / 10)
+    return 0.0
+
+
+class BrowserCache:
+    """A private HTTP cache plus one keep-alive connection per origin."""
+
+    def __init__(self):
+        self.entries = {}  # url -> (stored at, lowercased headers)
+        self.connections = {}
+
+    def _request(self, url, headers):
+        parts = urlparse(url)
+        connection = self.connections.get(parts.netloc)
+        if connection is None:
+            connection = self.connections[parts.netloc] = http.client.HTTPConnection(
+                parts.hostname, parts.port, timeout=30)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, len(body)
+
+    def load(self, url, now):
+        """Load url at simulated time now; returns (outcome, body bytes),
+        outcome being "cached", "not_modified" or "fetched"."""
+        stored = self.entries.get(url)
+        headers = {}
+        if stored is not None:
+            stored_at, stored_headers = stored
+            if now - stored_at < freshness_lifetime(stored_headers):
+                return "cached", 0
+            if "etag" in stored_headers:
+                headers["If-None-Match"] = stored_headers["etag"]
+            if "last-modified" in stored_headers:
+                headers["If-Modified-Since"] = stored_headers["last-modified"]
+        status, response_headers, size = self._request(url, headers)
+        if status == 304 and stored is not None:
+            self.entries[url] = (now, {**stored[1], **response_headers})
+            return "not_modified", size
+        self.entries[url] = (now, response_headers)
+        return "fetched", size
+
+
+def visit(cache, urls, now):
+    outcomes = {"cached": 0, "not_modified": 0, "fetched": 0}
+    body_bytes = 0
+    for url in urls:
+        outcome, size = cache.load(url, now)
+        outcomes[outcome] += 1
+        body_bytes += size
+    return {"requests": outcomes["not_modified"] + outcomes["fetched"], **outcomes,
+            "bytes": body_bytes}
+
+
+def measure(urls, after):
+    cache = BrowserCache()
+    start = time.time()
+    results = {"first_visit": visit(cache, urls, start)}
+    sample = cache.entries[urls[0]][1]
+    results["headers"] = {name: sample.get(name) for name in
+                          ("cache-control", "etag", "last-modified")}
+    for seconds in after:
+        results[f"repeat_after_{seconds:g}s"] = visit(cache, urls, start + seconds)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--after", nargs="+", type=float, default=[60, 3600, 86400],
+                        help="seconds after the first visit to visit again (cumulative clock)")
+    parser.add_argument("--viewport", type=int, default=VIEWPORT, help="viewport width (CSS px)")
+    parser.add_argument("--dpr", type=float, default=DPR, help="device pixel ratio")
+    parser.add_argument("--formats", nargs="+", default=["avif", "webp"],
+                        help="<source> formats the browser accepts")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    css_px = args.viewport if args.viewport <= MOBILE_BREAKPOINT else DESKTOP_SLOT
+    slot_px = round(css_px * args.dpr)
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "slot_px": slot_px,
+            "args": vars(args),
+        },
+    }
+    github = serve_github_stand_in()
+    results["github"] = measure(slide_urls(f"{github}/static", slot_px, args.formats), args.after)
+    for name in SERVERS:
+        proc, static_base = start_server(name, free_port())
+        try:
+            results[name] = measure(slide_urls(static_base, slot_px, args.formats), args.after)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Script reruns and server CPU per connected viewer, before and after the
+browser-side countdown ticker.
+
+Serves each version of the app with `streamlit run` against the upstream
+stubs, connects N viewers over Streamlit's websocket protocol and leaves
+them on the page for a measured window:
+
+- before: the app as of --before-rev (default: the repo's first commit),
+  which slept 5 s at the end of every run and called st.rerun(), so every
+  open session re-executed the whole script every 5 s. Its hard-coded
+  upstream URLs are pointed at the stubs.
+- after: the working tree, where the countdown ticks in the browser and
+  the server only reruns the render_page fragment when the weather is due.
+
+Viewers behave like the Streamlit frontend: they ask for one script run on
+connect and then only for the fragment reruns the server schedules
+(auto_rerun). For each version it reports script runs per viewer-minute,
+server CPU seconds per viewer-minute and the server's thread count with
+everyone connected.
+
+    python benchmarks/bench_reruns.py
+    python benchmarks/bench_reruns.py --viewers 100 --seconds 120 --output reruns.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import websockets  # noqa: E402
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+
+from harness import APP_PATH  # noqa: E402
+from stub_server import start_stubs  # noqa: E402
+
+HOST = "127.0.0.1"
+
+# Upstream URLs hard-coded in the original app
+ORIGINAL_URLS = {
+    "OPEN_METEO_URL": "https://api.open-meteo.com/v1/forecast",
+    "SNOCOUNTRY_URL": "http://feeds.snocountry.net/conditions.php",
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time the process has used."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def thread_count(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("Threads:"):
+                return int(line.split()[1])
+    return None
+
+
+def checkout_app(rev):
+    """The app script as of a git revision, in a scratch directory, with its
+    hard-coded upstream URLs pointed at the stubs."""
+    source = subprocess.check_output(
+        ["git", "show", f"{rev}:crested_butte_countdown.py"], cwd=REPO_DIR, text=True)
+    for env_name, url in ORIGINAL_URLS.items():
+        source = source.replace(url, os.environ[env_name])
+    path = os.path.join(tempfile.mkdtemp(), "crested_butte_countdown.py")
+    with open(path, "w") as f:
+        f.write(source)
+    return path
+
+
+def start_server(app_path, port):
+    tmp = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        WEATHER_CACHE_PATH=os.path.join(tmp, "weather.sqlite3"),
+        WEATHER_SNAPSHOT_PATH=os.path.join(tmp, "weather_snapshot.json"),
+        SNOW_HISTORY_PATH=os.path.join(tmp, "history.sqlite3"),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app_path, "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(app_path), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("streamlit did not start")
+
+
+def rerun_message(fragment_id=None):
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    msg.rerun_script.page_script_hash = ""
+    if fragment_id:
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.is_auto_rerun = True
+    return msg.SerializeToString()
+
+
+class Viewer:
+    """One open page: a run on connect, then whatever reruns the server
+    starts itself or schedules through auto_rerun."""
+
+    def __init__(self, port):
+        self.url = f"ws://{HOST}:{port}/_stcore/stream"
+        self.runs = 0
+        self.first_run = asyncio.Event()
+
+    async def watch(self):
+        async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None) as ws:
+            await ws.send(rerun_message())
+            timers = []
+            try:
+                async for data in ws:
+                    msg = ForwardMsg()
+                    msg.ParseFromString(data)
+                    kind = msg.WhichOneof("type")
+                    if kind == "script_finished":
+                        self.runs += 1
+                        self.first_run.set()
+                    elif kind == "auto_rerun":
+                        timers.append(asyncio.create_task(
+                            self._auto_rerun(ws, msg.auto_rerun.interval, msg.auto_rerun.fragment_id)))
+            finally:
+                for timer in timers:
+                    timer.cancel()
+
+    async def _auto_rerun(self, ws, interval, fragment_id):
+        while True:
+            await asyncio.sleep(interval)
+            await ws.send(rerun_message(fragment_id))
+
+
+async def measure(port, pid, viewers, seconds):
+    crowd = [Viewer(port) for _ in range(viewers)]
+    tasks = [asyncio.create_task(viewer.watch()) for viewer in crowd]
+    await asyncio.wait_for(asyncio.gather(*(v.first_run.wait() for v in crowd)), 120)
+
+    runs_start = sum(v.runs for v in crowd)
+    cpu_start = cpu_seconds(pid)
+    await asyncio.sleep(seconds)
+    cpu = cpu_seconds(pid) - cpu_start
+    runs = sum(v.runs for v in crowd) - runs_start
+    threads = thread_count(pid)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    viewer_minutes = viewers * seconds / 60
+    return {
+        "script_runs": runs,
+        "runs_per_viewer_minute": round(runs / viewer_minutes, 2),
+        "cpu_s": round(cpu, 2),
+        "cpu_ms_per_viewer_minute": round(cpu * 1000 / viewer_minutes, 1),
+        "server_threads": threads,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--viewers", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=60, help="measured window per version")
+    parser.add_argument("--before-rev", help="git revision of the 'before' app "
+                                             "(default: the repo's first commit)")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    start_stubs()
+    before_rev = args.before_rev or subprocess.check_output(
+        ["git", "rev-list", "--max-parents=0", "HEAD"], cwd=REPO_DIR, text=True).split()[0]
+    versions = {"before": checkout_app(before_rev), "after": APP_PATH}
+
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "before_rev": before_rev,
+            "args": vars(args),
+        },
+    }
+    for name, app_path in versions.items():
+        port = free_port()
+        proc = start_server(app_path, port)
+        try:
+            results[name] = asyncio.run(measure(port, proc.pid, args.viewers, args.seconds))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""Slideshow photo traffic in the first seconds of a visit.
+
+Replays the photo requests a browser makes for the slideshow over a
+throttled link to a local file server, and reports when the first slide
+has finished downloading and how many bytes arrived in the first --seconds:
+
+- originals: every full-size imageNN.jpg, all requested as the page loads
+  (the page before responsive derivatives and deferred loading)
+- eager: the responsive derivatives, all requested as the page loads
+- deferred: the page as built today (page.build_slideshow_html), where only
+  the first EAGER_SLIDES are requested up front and SLIDESHOW_LOADER_JS
+  requests each further slide when the one before it starts its fadeInOut
+  slot, SLIDE_SECONDS apart
+
+Each slide is fetched as a browser would pick it: the first <source> in a
+format it accepts, and from a srcset the smallest candidate at least as
+wide as the slot (SLIDE_SIZES at the viewport width times the device pixel
+ratio). At most --connections downloads run at once, each pays one
+round trip before its first byte, and all of them share the bandwidth.
+This models the browser's fetch schedule rather than driving a browser, so
+it runs anywhere; decoding and paint time are not included.
+
+    python benchmarks/bench_slideshow.py
+    python benchmarks/bench_slideshow.py --mbps 4 --rtt-ms 150 --viewport 1280 --dpr 1
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from page import (  # noqa: E402
+    EAGER_SLIDES, SLIDE_SECONDS, build_slide_html, build_slideshow_html, find_slide_images,
+    load_image_manifest,
+)
+
+MODES = ("originals", "eager", "deferred")
+
+# A phone-sized viewport
+VIEWPORT = 390
+DPR = 3
+
+# Slot width from page.SLIDE_SIZES: full width up to 768px, else 800px
+MOBILE_BREAKPOINT = 768
+DESKTOP_SLOT = 800
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_repo():
+    """Serve the repo (photos and static/) on a local port; returns its URL."""
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(QuietHandler, directory=REPO_DIR))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class SlideParser(HTMLParser):
+    """Collects each slide's <source>s and <img> attributes, deferred
+    (data-) or not."""
+
+    def __init__(self):
+        super().__init__()
+        self.slides = []
+        self._in_picture = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "picture":
+            self._in_picture = True
+            self.slides.append({"sources": [], "img": None})
+        elif tag == "source" and self._in_picture:
+            self.slides[-1]["sources"].append(attrs)
+        elif tag == "img":
+            if not self._in_picture:
+                self.slides.append({"sources": [], "img": None})
+            self.slides[-1]["img"] = attrs
+
+    def handle_endtag(self, tag):
+        if tag == "picture":
+            self._in_picture = False
+
+
+def pick_candidate(srcset, slot_px):
+    """The srcset URL a browser would fetch for a slot slot_px device pixels wide."""
+    candidates = []
+    for item in srcset.split(","):
+        url, width = item.split()
+        candidates.append((int(width[:-1]), url))
+    candidates.sort()
+    for width, url in candidates:
+        if width >= slot_px:
+            return url
+    return candidates[-1][1]
+
+
+def choose(slide, slot_px, formats):
+    """(url, deferred) of the file the browser fetches for one slide."""
+    for source in slide["sources"]:
+        if source.get("type", "").split("/")[-1] in formats:
+            deferred = "srcset" not in source
+            return pick_candidate(source.get("srcset") or source["data-srcset"], slot_px), deferred
+    img = slide["img"]
+    deferred = "src" not in img
+    srcset = img.get("srcset") or img.get("data-srcset")
+    if srcset:
+        return pick_candidate(srcset, slot_px), deferred
+    return img.get("src") or img["data-src"], deferred
+
+
+def schedule(mode, base_url, slot_px, formats):
+    """[(seconds after load, url)] of every slide request in a mode."""
+    image_files = find_slide_images()
+    if mode == "originals":
+        return [(0.0, f"{base_url}/{filename}") for filename in image_files]
+    manifest = load_image_manifest()
+    static_base = f"{base_url}/static"
+    if mode == "eager":
+        html = "".join(build_slide_html(f, manifest, static_base) for f in image_files)
+    else:
+        html = build_slideshow_html(image_files, manifest, static_base)
+    parser = SlideParser()
+    parser.feed(html)
+    requests = []
+    for i, slide in enumerate(parser.slides):
+        url, deferred = choose(slide, slot_px, formats)
+        # A deferred slide is promoted when the slide before it starts its slot
+        requests.append(((i - 1) * SLIDE_SECONDS if deferred else 0.0, url))
+    return requests
+
+
+class Link:
+    """Bandwidth shared by every download, handed out in arrival order."""
+
+    def __init__(self, bytes_per_s):
+        self.bytes_per_s = bytes_per_s
+        self._free_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def transfer(self, size):
+        async with self._lock:
+            now = time.perf_counter()
+            self._free_at = max(now, self._free_at) + size / self.bytes_per_s
+            done = self._free_at
+        await asyncio.sleep(max(0.0, done - time.perf_counter()))
+
+
+async def download(url, link, rtt, t0, arrivals):
+    """GET url through the link; records (time since load, bytes) per chunk
+    and returns the time the body finished."""
+    parts = urlparse(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode())
+    await asyncio.sleep(rtt)
+    await reader.readuntil(b"\r\n\r\n")
+    while True:
+        chunk = await reader.read(16384)
+        if not chunk:
+            break
+        await link.transfer(len(chunk))
+        arrivals.append((time.perf_counter() - t0, len(chunk)))
+    writer.close()
+    return time.perf_counter() - t0
+
+
+async def replay(requests, args):
+    link = Link(args.mbps * 1_000_000 / 8)
+    gate = asyncio.Semaphore(args.connections)
+    arrivals = []
+    t0 = time.perf_counter()
+
+    async def fetch(at, url):
+        await asyncio.sleep(max(0.0, at - (time.perf_counter() - t0)))
+        async with gate:
+            return await download(url, link, args.rtt_ms / 1000, t0, arrivals)
+
+    tasks = [asyncio.create_task(fetch(at, url)) for at, url in requests]
+    # Run the window, and past it if the first slide still hasn't arrived
+    first = await asyncio.wait_for(asyncio.shield(tasks[0]), args.max_seconds)
+    remaining = args.seconds - (time.perf_counter() - t0)
+    if remaining > 0:
+        await asyncio.wait(tasks, timeout=remaining)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    in_window = [(t, size) for t, size in arrivals if t <= args.seconds]
+    return {
+        "slides": len(requests),
+        "requested_in_window": sum(at <= args.seconds for at, _ in requests),
+        "time_to_first_slide_s": round(first, 2),
+        "bytes_in_window": sum(size for _, size in in_window),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seconds", type=float, default=10, help="window bytes are counted over")
+    parser.add_argument("--max-seconds", type=float, default=120,
+                        help="give up waiting for the first slide after this long")
+    parser.add_argument("--mbps", type=float, default=10, help="link bandwidth (megabits/s)")
+    parser.add_argument("--rtt-ms", type=float, default=60, help="round trip before each first byte")
+    parser.add_argument("--connections", type=int, default=6, help="concurrent downloads (per origin)")
+    parser.add_argument("--viewport", type=int, default=VIEWPORT, help="viewport width (CSS px)")
+    parser.add_argument("--dpr", type=float, default=DPR, help="device pixel ratio")
+    parser.add_argument("--formats", nargs="+", default=["avif", "webp"],
+                        help="<source> formats the browser accepts")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    base_url = serve_repo()
+    css_px = args.viewport if args.viewport <= MOBILE_BREAKPOINT else DESKTOP_SLOT
+    slot_px = round(css_px * args.dpr)
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "eager_slides": EAGER_SLIDES,
+            "slot_px": slot_px,
+            "args": vars(args),
+        },
+    }
+    for mode in args.modes:
+        results[mode] = asyncio.run(replay(schedule(mode, base_url, slot_px, args.formats), args))
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
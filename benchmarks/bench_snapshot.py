@@ -0,0 +1,91 @@
+"""Per-rerun cost of reading the weather from cache and rendering it.
+
+Compares the two ways a rerun can get at the weather:
+
+- raw: the whole Open-Meteo JSON is cached and copied out on every hit (as
+  st.cache_data does by pickling), then parsed and formatted for the page
+- parsed: the fetch layer has already parsed it into a conditions.Conditions
+  record that every rerun reads by reference from the published snapshot
+
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --iterations 50000 --output snapshot.json
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from conditions import parse_conditions  # noqa: E402
+from page import build_weather_html  # noqa: E402
+from trips import load_trips  # noqa: E402
+from weather import WeatherRefresher  # noqa: E402
+from weather_cache import MemoryCache  # noqa: E402
+
+FIXTURE = os.path.join(BENCH_DIR, "fixtures", "open_meteo.json")
+BASE_DEPTH = 48
+
+
+def per_call_us(fn, iterations):
+    """Best-of-5 mean microseconds per call."""
+    best = min(timeit.repeat(fn, number=iterations, repeat=5))
+    return round(best / iterations * 1e6, 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=20000, help="cache hits per timing run")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    with open(FIXTURE) as f:
+        payload = json.load(f)
+    cached_raw = pickle.dumps(payload)
+
+    trip = next(iter(load_trips().values()))
+    refresher = WeatherRefresher(interval=1800, trips=[trip], cache=MemoryCache())
+    refresher._publish({trip.location_key: parse_conditions(payload)},
+                       {trip.resort_id: BASE_DEPTH}, stale=False)
+
+    def raw_hit():
+        data = pickle.loads(cached_raw)
+        return build_weather_html(parse_conditions(data), BASE_DEPTH)
+
+    def parsed_hit():
+        snapshot = refresher.snapshot(trip.slug)
+        return build_weather_html(snapshot.conditions, snapshot.base_depth)
+
+    assert raw_hit() == parsed_hit()
+    conditions = refresher.snapshot(trip.slug).conditions
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "iterations": args.iterations,
+        },
+        "raw_payload": {
+            "cached_bytes": len(cached_raw),
+            "hit_us": per_call_us(raw_hit, args.iterations),
+        },
+        "parsed_snapshot": {
+            "cached_bytes": len(json.dumps(conditions.to_dict()).encode("utf-8")),
+            "hit_us": per_call_us(parsed_hit, args.iterations),
+        },
+    }
+    results["speedup"] = round(results["raw_payload"]["hit_us"] / results["parsed_snapshot"]["hit_us"], 2)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""Browser-side cost of the snow effect, traced in headless Chromium.
+
+Loads the countdown page (header, countdown, weather note and the fading
+slideshow) with each snow renderer on a throttled phone-sized viewport and
+records a performance trace while it runs:
+
+- none: no snow, the baseline
+- css: page.snow_html, 20 animated text-shadow DOM nodes
+- canvas: page.SNOWFALL_JS, one canvas layer
+- canvas-reduced-motion: the same under prefers-reduced-motion
+- canvas-hidden: the same with another tab in front
+
+For each it reports frames per second and, per second of wall time, the
+milliseconds spent by the renderer's main thread (and on style, layout,
+paint and script within it), its compositor thread and the GPU process.
+
+Requires Playwright and its Chromium (not needed by the app):
+
+    pip install playwright && playwright install chromium
+    python benchmarks/bench_snowfall.py
+    python benchmarks/bench_snowfall.py --seconds 20 --cpu-throttle 6 --trace-dir traces
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from page import (  # noqa: E402
+    SLIDESHOW_LOADER_JS, SNOWFALL_JS, STYLESHEET_PATH, build_layout_html, build_main_html,
+    build_slideshow_css, build_slideshow_html, build_weather_html, calculate_countdown,
+    find_slide_images, load_image_manifest, minify_css, snow_html,
+)
+from trips import load_trips  # noqa: E402
+
+MODES = ("none", "css", "canvas", "canvas-reduced-motion", "canvas-hidden")
+
+# Trace events (renderer main thread) reported individually
+PHASES = {
+    "style": ("UpdateLayoutTree", "RecalculateStyles"),
+    "layout": ("Layout",),
+    "paint": ("PrePaint", "Paint", "Layerize", "UpdateLayer"),
+    "script": ("FunctionCall", "FireAnimationFrame", "EvaluateScript"),
+}
+
+# A mid-range phone
+VIEWPORT = {"width": 390, "height": 844}
+DEVICE_SCALE_FACTOR = 3
+
+
+def build_page(mode):
+    """The countdown page with the given snow renderer, as served by the
+    static snapshot but without its live-app loader."""
+    trip = next(iter(load_trips().values()))
+    image_files = find_slide_images()
+    with open(STYLESHEET_PATH) as f:
+        css = f.read() + build_slideshow_css(len(image_files))
+    layout = build_layout_html(
+        build_main_html(trip, calculate_countdown(trip.date)),
+        build_slideshow_html(image_files, load_image_manifest(), "/static"),
+        build_weather_html(None, None),
+    )
+    snow = {"none": "", "css": snow_html}.get(mode, SNOWFALL_JS)
+    return (f'<!DOCTYPE html><html><head><meta charset="UTF-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1.0">'
+            f'<style>{minify_css(css)}</style></head><body>'
+            f'{layout}{SLIDESHOW_LOADER_JS}{snow}</body></html>').encode()
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    """Serves the repo (for the slideshow photos) plus /bench/<mode>.html."""
+    pages = {}
+
+    def do_GET(self):
+        body = self.pages.get(self.path)
+        if body is None:
+            return super().do_GET()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_pages():
+    Handler.pages = {f"/bench/{mode}.html": build_page(mode) for mode in MODES}
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(Handler, directory=REPO_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# Counts animation frames in the page over the measured window
+FRAME_COUNTER_JS = """
+(seconds) => new Promise((resolve) => {
+    let frames = 0;
+    const start = performance.now();
+    function tick(now) {
+        frames++;
+        if (now - start < seconds * 1000) requestAnimationFrame(tick);
+        else resolve({frames, visibility: document.visibilityState});
+    }
+    requestAnimationFrame(tick);
+    // rAF doesn't run in a hidden tab
+    setTimeout(() => resolve({frames, visibility: document.visibilityState}), seconds * 1000 + 500);
+})
+"""
+
+
+def summarize_trace(trace, seconds):
+    """Milliseconds per second of wall time by thread and main-thread phase."""
+    events = trace["traceEvents"]
+    names = {(e["pid"], e["tid"]): e["args"]["name"] for e in events
+             if e.get("ph") == "M" and e.get("name") == "thread_name"}
+    busy = defaultdict(float)
+    by_thread = defaultdict(float)
+    by_phase = defaultdict(float)
+    for e in events:
+        if e.get("ph") != "X" or "dur" not in e:
+            continue
+        thread = names.get((e["pid"], e["tid"]), "")
+        if e["name"] in ("ThreadControllerImpl::RunTask", "RunTask"):
+            by_thread[(e["pid"], thread)] += e["dur"]
+            if thread == "CrRendererMain":
+                busy[e["pid"]] += e["dur"]
+    # The benchmarked page's renderer is the one whose main thread ran most
+    renderer = max(busy, key=busy.get) if busy else None
+    for e in events:
+        if e.get("ph") == "X" and e.get("pid") == renderer and "dur" in e \
+                and names.get((e["pid"], e["tid"])) == "CrRendererMain":
+            for phase, event_names in PHASES.items():
+                if e["name"] in event_names:
+                    by_phase[phase] += e["dur"]
+
+    def per_second(us):
+        return round(us / 1000 / seconds, 2)
+
+    gpu = sum(us for (pid, thread), us in by_thread.items() if thread == "CrGpuMain")
+    return {
+        "main_thread_ms_per_s": per_second(by_thread.get((renderer, "CrRendererMain"), 0)),
+        "compositor_ms_per_s": per_second(by_thread.get((renderer, "Compositor"), 0)),
+        "gpu_ms_per_s": per_second(gpu),
+        **{f"{phase}_ms_per_s": per_second(by_phase[phase]) for phase in PHASES},
+    }
+
+
+def measure(browser, base_url, mode, args):
+    context = browser.new_context(
+        viewport=VIEWPORT, device_scale_factor=DEVICE_SCALE_FACTOR, is_mobile=True,
+        reduced_motion="reduce" if mode == "canvas-reduced-motion" else "no-preference",
+    )
+    page = context.new_page()
+    cdp = context.new_cdp_session(page)
+    cdp.send("Emulation.setCPUThrottlingRate", {"rate": args.cpu_throttle})
+    page.goto(f"{base_url}/bench/{mode}.html", wait_until="load")
+    if mode == "canvas-hidden":
+        context.new_page().bring_to_front()
+    time.sleep(args.warmup)
+
+    browser.start_tracing(page=page, categories=["devtools.timeline", "toplevel",
+                                                 "disabled-by-default-devtools.timeline"])
+    frames = page.evaluate(FRAME_COUNTER_JS, args.seconds)
+    trace = json.loads(browser.stop_tracing())
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+        with open(os.path.join(args.trace_dir, f"{mode}.json"), "w") as f:
+            json.dump(trace, f)
+
+    result = {
+        "visibility": frames["visibility"],
+        "fps": round(frames["frames"] / args.seconds, 1),
+        **summarize_trace(trace, args.seconds),
+    }
+    if mode.startswith("canvas"):
+        result["snowfall"] = page.evaluate("window.snowfall")
+    context.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seconds", type=float, default=10, help="traced seconds per mode")
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--cpu-throttle", type=float, default=4,
+                        help="CPU slowdown factor, to approximate a low-end phone")
+    parser.add_argument("--trace-dir", help="also save each mode's trace here (chrome://tracing, Perfetto)")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    from playwright.sync_api import sync_playwright
+
+    base_url = serve_pages()
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        results = {
+            "meta": {
+                "python": sys.version.split()[0],
+                "browser": browser.version,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "args": vars(args),
+            },
+        }
+        for mode in args.modes:
+            results[mode] = measure(browser, base_url, mode, args)
+        browser.close()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Cold-start cost of the countdown app, as paid when a sleeping app wakes.
+
+Every measurement runs in a fresh interpreter:
+
+- import: time to import Streamlit and the app's own modules, and whether
+  requests got imported along the way (it should only load on a fetch)
+- first_render: the first AppTest script run in a new process, against
+  upstream stubs with injected latency, with an empty weather cache and
+  with a saved weather snapshot to warm from
+- server_ttfb: from launching `streamlit run` until its first HTTP response
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5 --latency 3 --output startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from harness import APP_PATH  # noqa: E402
+from stub_server import start_stubs  # noqa: E402
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit, streamlit.components.v1
+streamlit_done = time.perf_counter()
+import conditions, fragment_cache, metrics, page, snow_history, trips, weather, weather_cache
+app_done = time.perf_counter()
+print(json.dumps({
+    "streamlit_ms": (streamlit_done - start) * 1000,
+    "app_modules_ms": (app_done - streamlit_done) * 1000,
+    "requests_imported": "requests" in sys.modules,
+}))
+"""
+
+FIRST_RENDER_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {bench_dir!r})
+from harness import new_session, timed_run
+start = time.perf_counter()
+app = new_session()
+elapsed = timed_run(app)
+print(json.dumps({{"first_run_ms": elapsed * 1000, "total_ms": (time.perf_counter() - start) * 1000}}))
+"""
+
+
+def run_json(script, env):
+    out = subprocess.check_output([sys.executable, "-c", script], cwd=REPO_DIR, env=env,
+                                  stderr=subprocess.DEVNULL, text=True)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def median_of(samples, key):
+    return round(statistics.median(s[key] for s in samples), 3)
+
+
+def fresh_env(warm_snapshot=None):
+    """Environment for one cold start: cache files in a new empty directory,
+    plus a copy of warm_snapshot to warm from if one is given."""
+    run_dir = tempfile.mkdtemp()
+    env = dict(os.environ)
+    env["WEATHER_CACHE_PATH"] = os.path.join(run_dir, "weather.sqlite3")
+    env["SNOW_HISTORY_PATH"] = os.path.join(run_dir, "history.sqlite3")
+    env["WEATHER_SNAPSHOT_PATH"] = os.path.join(run_dir, "weather_snapshot.json")
+    if warm_snapshot:
+        shutil.copyfile(warm_snapshot, env["WEATHER_SNAPSHOT_PATH"])
+    return env
+
+
+def save_warm_snapshot(path):
+    """Fetch once from the stubs and save the snapshot a cold start warms from."""
+    from trips import load_trips
+    from weather import WeatherRefresher
+    WeatherRefresher(interval=1800, trips=load_trips().values(), snapshot_path=path).refresh()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_ttfb(env, timeout=60):
+    """Seconds from spawning `streamlit run` to its first HTTP response."""
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    response.read(1)
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError("streamlit did not start")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per measurement")
+    parser.add_argument("--latency", type=float, default=2.0,
+                        help="seconds of latency injected by the upstream stubs")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    start_stubs(latency=args.latency)
+    warm_snapshot = os.path.join(tempfile.mkdtemp(), "weather_snapshot.json")
+    save_warm_snapshot(warm_snapshot)
+
+    imports = [run_json(IMPORT_SCRIPT, fresh_env()) for _ in range(args.repeat)]
+    render_script = FIRST_RENDER_SCRIPT.format(bench_dir=BENCH_DIR)
+    first_render = {}
+    for mode, snapshot in (("empty_cache", None), ("warm_snapshot", warm_snapshot)):
+        runs = [run_json(render_script, fresh_env(snapshot)) for _ in range(args.repeat)]
+        first_render[mode] = {
+            "first_run_ms": median_of(runs, "first_run_ms"),
+            "process_total_ms": median_of(runs, "total_ms"),
+        }
+    ttfb = [server_ttfb(fresh_env(warm_snapshot)) for _ in range(args.repeat)]
+
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "import": {
+            "streamlit_ms": median_of(imports, "streamlit_ms"),
+            "app_modules_ms": median_of(imports, "app_modules_ms"),
+            "requests_imported": any(i["requests_imported"] for i in imports),
+        },
+        "first_render": first_render,
+        "server_ttfb_ms": round(statistics.median(ttfb) * 1000, 3),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
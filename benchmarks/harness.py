@@ -0,0 +1,37 @@
+"""AppTest session helpers shared by the benchmark scripts.
+
+Kept in their own module so multiprocessing can pickle them by reference.
+Spawned workers still re-import the parent's __main__, which Streamlit
+leaves pointing at the app script after a run, so run.py restores its own
+before starting a pool.
+"""
+import os
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "crested_butte_countdown.py")
+
+
+def new_session():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(APP_PATH, default_timeout=60)
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"App raised: {app.exception[0].value}")
+    return elapsed
+
+
+def run_viewer(reruns):
+    """One simulated viewer: a session that runs and then reruns.
+
+    Returns (per-run latencies, CPU seconds this process spent on the runs).
+    """
+    app = new_session()
+    cpu_start = time.process_time()
+    latencies = [timed_run(app) for _ in range(reruns + 1)]
+    return latencies, time.process_time() - cpu_start
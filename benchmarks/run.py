@@ -0,0 +1,181 @@
+"""Benchmark and load-test suite for the countdown app.
+
+Drives crested_butte_countdown.py headlessly with Streamlit's AppTest
+against local stubs that serve recorded Open-Meteo and SnoCountry fixtures,
+then writes the results as JSON so runs can be compared:
+
+    python benchmarks/run.py --output bench.json
+    python benchmarks/run.py --baseline bench.json --output bench-new.json
+
+Measures script-run latency percentiles (cold and warm), traced memory per
+session, process CPU under N concurrent simulated viewers, HTML bytes sent
+per session and upstream request counts.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from harness import new_session, run_viewer, timed_run  # noqa: E402
+from stub_server import start_stubs  # noqa: E402
+
+# Running the app script swaps sys.modules["__main__"] for the app's module
+# and leaves it there; spawned workers re-import whatever __main__ is
+MAIN_MODULE = sys.modules["__main__"]
+
+
+def percentiles(samples):
+    """p50/p90/p99/max of a list of seconds, reported in milliseconds."""
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "p50_ms": round(pick(0.50), 3),
+        "p90_ms": round(pick(0.90), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "samples": len(ordered),
+    }
+
+
+def bench_script_runs(reruns):
+    """Cold first run, then warm reruns of a single session."""
+    app = new_session()
+    cold = timed_run(app)
+    first_bytes = app.session_state["html_bytes_sent"]
+    warm = [timed_run(app) for _ in range(reruns)]
+    total_bytes = app.session_state["html_bytes_sent"]
+    return {
+        "cold_run_ms": round(cold * 1000, 3),
+        "warm_runs": percentiles(warm),
+        "bytes_first_run": first_bytes,
+        "bytes_per_rerun": round((total_bytes - first_bytes) / max(reruns, 1)),
+    }
+
+
+def bench_memory(sessions):
+    """Traced Python heap growth per additional live session."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    apps = []
+    for _ in range(sessions):
+        app = new_session()
+        app.run()
+        apps.append(app)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "sessions": sessions,
+        "bytes_per_session": round((after - before) / sessions),
+    }
+
+
+def bench_concurrency(viewers, reruns):
+    """CPU and throughput with many sessions rerunning at once.
+
+    AppTest is not thread-safe, so each viewer runs in its own process and
+    reports the CPU it spent on its runs (interpreter startup excluded).
+    All viewers share the on-disk weather cache, as replicas of the app would.
+    """
+    # Put this script back as __main__ first, or every worker would
+    # re-execute the app script on import instead of this guarded module
+    sys.modules["__main__"] = MAIN_MODULE
+    ctx = multiprocessing.get_context("spawn")
+    wall_start = time.perf_counter()
+    with ctx.Pool(viewers) as pool:
+        per_viewer = pool.map(run_viewer, [reruns] * viewers)
+    wall = time.perf_counter() - wall_start
+
+    latencies = [elapsed for runs, _ in per_viewer for elapsed in runs]
+    cpu = sum(cpu for _, cpu in per_viewer)
+    return {
+        "viewers": viewers,
+        "runs": len(latencies),
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "cpu_ms_per_run": round(cpu * 1000 / len(latencies), 3),
+        "runs_per_s": round(len(latencies) / wall, 2),
+        "latency": percentiles(latencies),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, path=""):
+    """Print every numeric result next to its baseline value."""
+    for key, value in current.items():
+        name = f"{path}.{key}" if path else key
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            compare(old or {}, value, name)
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)):
+            change = f"{100 * (value - old) / old:+.1f}%" if old else "n/a"
+            print(f"{name:45} {old:>14,.3f} -> {value:>14,.3f}  {change}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--reruns", type=int, default=20, help="warm reruns per session")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions for the memory test")
+    parser.add_argument("--viewers", type=int, default=20, help="concurrent simulated viewers")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds of latency injected by the upstream stubs")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    open_meteo, snocountry = start_stubs(latency=args.latency)
+    # Keep the stub data out of the repo's cache, warm-start snapshot and
+    # snow history; the viewer processes inherit these
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault("WEATHER_CACHE_PATH", os.path.join(tmp, "weather.sqlite3"))
+    os.environ.setdefault("WEATHER_SNAPSHOT_PATH", os.path.join(tmp, "weather_snapshot.json"))
+    os.environ.setdefault("SNOW_HISTORY_PATH", os.path.join(tmp, "history.sqlite3"))
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "script_runs": bench_script_runs(args.reruns),
+        "memory": bench_memory(args.sessions),
+        "concurrency": bench_concurrency(args.viewers, args.reruns),
+    }
+    results["upstream_requests"] = {
+        "open_meteo": open_meteo.requests,
+        "snocountry": snocountry.requests,
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Local stand-ins for Open-Meteo and SnoCountry serving recorded fixtures.
+
+Each stub answers every GET with its fixture after an optional injected
+delay and counts the requests it served and the body bytes it sent, so
+benchmarks can measure latency effects, upstream call volume and bandwidth
+without touching the network.
+
+Like the real services, a stub returns only the current, hourly and daily
+variables the request names (dropping sections it doesn't ask for) over
+the forecast_days asked for, gzips the body when the client accepts it and
+serves ETag/Last-Modified validators, answering a matching conditional GET
+with a bodyless 304 until update() marks the data as changed.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class StubServer:
+    """Serve one fixture file on a local port from a daemon thread."""
+
+    def __init__(self, fixture, latency=0.0, status=200, validators=True):
+        with open(os.path.join(FIXTURES_DIR, fixture)) as f:
+            self.payload = json.load(f)
+        self.latency = latency
+        self.status = status
+        self.validators = validators
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.version = 0
+        self.modified_at = int(time.time())
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, body, headers = stub.respond(
+                    parse_qs(urlparse(self.path).query), self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with stub._lock:
+                    stub.bytes_sent += len(body)
+                    stub.not_modified += status == 304
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def update(self):
+        """Mark the upstream data as changed, invalidating its validators."""
+        with self._lock:
+            self.version += 1
+            self.modified_at = max(int(time.time()), self.modified_at + 1)
+
+    def respond(self, query, request_headers):
+        """(status, body bytes, headers) for a GET with this query string."""
+        if self.status != 200:
+            return self.status, b"{}", {"Content-Type": "application/json"}
+        payload = dict(self.payload)
+        for section in ("current", "hourly", "daily"):
+            if section not in payload:
+                continue
+            if section not in query:
+                payload.pop(section)
+                payload.pop(f"{section}_units", None)
+                continue
+            wanted = {"time", "interval", *query[section][0].split(",")}
+            payload[section] = {k: v for k, v in payload[section].items() if k in wanted}
+            if section != "current" and "forecast_days" in query:
+                steps = int(query["forecast_days"][0]) * (24 if section == "hourly" else 1)
+                payload[section] = {k: v[:steps] for k, v in payload[section].items()}
+            payload[f"{section}_units"] = {k: v for k, v in payload[f"{section}_units"].items()
+                                           if k in wanted}
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.validators:
+            with self._lock:
+                version, modified_at = self.version, self.modified_at
+            etag = '"%s"' % hashlib.sha1(body + str(version).encode()).hexdigest()[:16]
+            headers["ETag"] = etag
+            headers["Last-Modified"] = formatdate(modified_at, usegmt=True)
+            if_none_match = request_headers.get("If-None-Match")
+            if_modified_since = request_headers.get("If-Modified-Since")
+            if if_none_match is not None:
+                unchanged = if_none_match == etag
+            elif if_modified_since is not None:
+                try:
+                    unchanged = parsedate_to_datetime(if_modified_since).timestamp() >= modified_at
+                except (TypeError, ValueError):
+                    unchanged = False
+            else:
+                unchanged = False
+            if unchanged:
+                return 304, b"", headers
+        if "gzip" in request_headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+        return 200, body, headers
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_stubs(latency=0.0):
+    """Start Open-Meteo and SnoCountry stubs and point the app at them via
+    the OPEN_METEO_URL / SNOCOUNTRY_URL environment overrides."""
+    open_meteo = StubServer("open_meteo.json", latency=latency).start()
+    snocountry = StubServer("snocountry.json", latency=latency).start()
+    os.environ["OPEN_METEO_URL"] = open_meteo.url
+    os.environ["SNOCOUNTRY_URL"] = snocountry.url
+    return open_meteo, snocountry
@@ -0,0 +1,26 @@
+"""Prebuild the app's static chrome into static/chrome.html.
+
+The app loads this file at startup instead of reading, minifying and
+assembling the stylesheet and slideshow timing itself. The file records a
+fingerprint of its inputs (page.chrome_digest); if the stylesheet, the
+slideshow timing, the set of slides or the code that assembles the chrome
+has changed since it was built, the app ignores it and builds the chrome
+on the fly, so a stale file is never served. Re-run after changing any of
+those:
+
+    python build_chrome.py
+"""
+import os
+import sys
+
+from page import CHROME_PATH, find_slide_images, write_static_chrome
+
+
+def main():
+    write_static_chrome(len(find_slide_images()))
+    print(f"Wrote {os.path.relpath(CHROME_PATH)} ({os.path.getsize(CHROME_PATH):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Build responsive slideshow image derivatives.
+
+Resizes each imageNN.jpg in the repo into width buckets and encodes them as
+AVIF, WebP and JPEG under static/img/<content-hash>/, then writes
+static/img/manifest.json, which the app uses to emit <picture>/srcset markup
+instead of the multi-megabyte originals. Everything lands in static/ so
+Streamlit's static file serving can deliver it from the app's own origin.
+A photo whose content hash and formats match its manifest entry, and whose
+derivatives are all on disk, is not decoded again, so re-running only
+rebuilds changed photos.
+
+Requires Pillow (build-time only, not needed by the app itself):
+
+    pip install pillow
+    python build_images.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(REPO_DIR, "static")
+CACHE_DIR = os.path.join(STATIC_DIR, "img")
+MANIFEST_PATH = os.path.join(CACHE_DIR, "manifest.json")
+
+# Width buckets - the slideshow is at most 800px wide, so 1600 covers 2x screens
+WIDTHS = [480, 800, 1200, 1600]
+
+# Encoders in order of preference; AVIF is skipped if Pillow lacks support
+FORMATS = {
+    "avif": {"format": "AVIF", "quality": 50},
+    "webp": {"format": "WEBP", "quality": 75, "method": 6},
+    "jpg": {"format": "JPEG", "quality": 80, "optimize": True, "progressive": True},
+}
+
+# Width used when reporting bytes saved (what a desktop visitor downloads)
+REPORT_WIDTH = 800
+
+
+def content_hash(path):
+    """Short SHA-256 of a file's bytes, used as its cache directory name."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def available_formats():
+    return [ext for ext in FORMATS if ext != "avif" or features.check("avif")]
+
+
+def load_manifest():
+    """The manifest from the previous run, or {} if there is none."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_current(entry, digest, formats):
+    """Whether a previous manifest entry still describes the photo: same
+    content hash, same formats and every derivative still on disk."""
+    return (
+        entry is not None
+        and entry.get("hash") == digest
+        and sorted(entry.get("variants", {})) == sorted(formats)
+        and all(os.path.exists(os.path.join(STATIC_DIR, rel_path))
+                for variants in entry["variants"].values() for _, rel_path, _ in variants)
+    )
+
+
+def build_image(filename, formats, previous=None):
+    """Build every derivative for one source image; runs in a worker process.
+
+    previous is the photo's entry from the last manifest, returned as is
+    when it is still current.
+    """
+    src_path = os.path.join(REPO_DIR, filename)
+    digest = content_hash(src_path)
+    if is_current(previous, digest, formats):
+        return filename, previous
+    out_dir = os.path.join(CACHE_DIR, digest)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with Image.open(src_path) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        widths = [w for w in WIDTHS if w < img.width] or [img.width]
+        variants = {ext: [] for ext in formats}
+        for width in widths:
+            height = round(img.height * width / img.width)
+            resized = img.resize((width, height), Image.LANCZOS)
+            for ext in formats:
+                rel_path = f"img/{digest}/{width}.{ext}"
+                out_path = os.path.join(STATIC_DIR, rel_path)
+                if not os.path.exists(out_path):
+                    tmp_path = out_path + ".tmp"
+                    resized.save(tmp_path, **FORMATS[ext])
+                    os.replace(tmp_path, out_path)
+                variants[ext].append([width, rel_path, os.path.getsize(out_path)])
+        size = [img.width, img.height]
+
+    return filename, {
+        "hash": digest,
+        "size": size,
+        "bytes": os.path.getsize(src_path),
+        "variants": variants,
+    }
+
+
+def report(filename, entry):
+    """Print original size vs the REPORT_WIDTH (or largest) derivative per format."""
+    original = entry["bytes"]
+    parts = []
+    for ext, variants in entry["variants"].items():
+        width, _, size = min(variants, key=lambda v: abs(v[0] - REPORT_WIDTH))
+        saved = 100 * (original - size) / original
+        parts.append(f"{ext} {width}w {size:,} B ({saved:.0f}% saved)")
+    print(f"{filename}: {original:,} B -> " + ", ".join(parts))
+
+
+def main():
+    sources = sorted(
+        name for name in os.listdir(REPO_DIR)
+        if name.startswith("image") and name.endswith(".jpg")
+    )
+    formats = available_formats()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    previous = load_manifest()
+
+    manifest = {}
+    with ProcessPoolExecutor() as pool:
+        futures = [pool.submit(build_image, name, formats, previous.get(name)) for name in sources]
+        for future in futures:
+            filename, entry = future.result()
+            manifest[filename] = entry
+            report(filename, entry)
+
+    with open(MANIFEST_PATH + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(MANIFEST_PATH + ".tmp", MANIFEST_PATH)
+
+    # Drop derivatives of photos that have since changed or been removed
+    live = {entry["hash"] for entry in manifest.values()}
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if os.path.isdir(path) and name not in live:
+            shutil.rmtree(path)
+
+    total_before = sum(e["bytes"] for e in manifest.values())
+    total_after = sum(
+        min(e["variants"]["webp"], key=lambda v: abs(v[0] - REPORT_WIDTH))[2]
+        for e in manifest.values()
+    )
+    print(f"Total: {total_before:,} B originals -> {total_after:,} B "
+          f"at {REPORT_WIDTH}w WebP")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Compact, parsed form of an Open-Meteo forecast.
+
+The fetch layer parses each Open-Meteo response once into a Conditions
+record holding only the fields the page shows, with the 7-day snowfall
+total and every display label already computed. Snapshots hand the same
+record to every render by reference, so a rerun does no parsing, copying or
+formatting of the upstream payload.
+"""
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+
+from powder import PowderForecast, forecast as forecast_powder
+
+# Weather code to description mapping
+WEATHER_CODES = {
+    0: "Clear sky ☀️",
+    1: "Mainly clear 🌤️",
+    2: "Partly cloudy ⛅",
+    3: "Overcast ☁️",
+    45: "Foggy 🌫️",
+    48: "Rime fog 🌫️",
+    51: "Light drizzle 🌧️",
+    53: "Drizzle 🌧️",
+    55: "Dense drizzle 🌧️",
+    61: "Slight rain 🌧️",
+    63: "Rain 🌧️",
+    65: "Heavy rain 🌧️",
+    71: "Slight snow 🌨️",
+    73: "Snow 🌨️",
+    75: "Heavy snow ❄️",
+    77: "Snow grains 🌨️",
+    80: "Slight showers 🌧️",
+    81: "Showers 🌧️",
+    82: "Violent showers 🌧️",
+    85: "Slight snow showers 🌨️",
+    86: "Heavy snow showers ❄️",
+    95: "Thunderstorm ⛈️",
+}
+
+def get_weather_description(code):
+    return WEATHER_CODES.get(code, "Unknown")
+
+
+@dataclass(frozen=True, slots=True)
+class Conditions:
+    """Current conditions and the 7-day outlook for one location.
+
+    Raw values are None when Open-Meteo didn't report them. The ``*_label``
+    fields are the strings the weather sidebar shows; ``snowfall_label``,
+    ``high_low_label`` and ``powder_label`` are None when there is no
+    forecast to show. ``powder`` is the day-by-day powder outlook (see
+    powder.py), if the hourly forecast was available.
+    """
+    observed_at: str
+    temperature: float
+    weather_code: int
+    wind_speed: float
+    snowfall_7day: float
+    high: float
+    low: float
+    updated_label: str
+    description: str
+    temperature_label: str
+    wind_label: str
+    snowfall_label: str
+    high_low_label: str
+    powder: PowderForecast
+    powder_label: str
+
+    def to_dict(self):
+        """JSON-able form for the weather cache."""
+        data = {field.name: getattr(self, field.name) for field in fields(self)}
+        if self.powder is not None:
+            data["powder"] = self.powder.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict(); raises TypeError for anything else."""
+        if not isinstance(data, dict):
+            raise TypeError("Conditions.from_dict expects a dict")
+        if data.get("powder") is not None:
+            data = {**data, "powder": PowderForecast.from_dict(data["powder"])}
+        return cls(**data)
+
+
+def _powder_label(powder):
+    """Best powder day as shown in the sidebar, e.g. 'Sat, Feb 14 · 4.1"'."""
+    best = powder.best_day if powder is not None else None
+    if best is None:
+        return None
+    return f'{date.fromisoformat(best.date):%a, %b %-d} · {best.fresh_snow:.1f}"'
+
+
+def parse_conditions(payload, powder=None):
+    """Parse one Open-Meteo location payload into Conditions.
+
+    The 7-day snowfall and today's high/low come from the powder outlook
+    when the payload has hourly data (pass a precomputed one from
+    powder.forecast_many() as ``powder``), otherwise from its daily series.
+    """
+    current = payload.get("current", {})
+    daily = payload.get("daily", {})
+    if powder is None:
+        powder = forecast_powder(payload)
+
+    observed_at = current.get("time", "")
+    updated_label = ""
+    if observed_at:
+        try:
+            obs_dt = datetime.strptime(observed_at, "%Y-%m-%dT%H:%M")
+            updated_label = obs_dt.strftime("%-I:%M %p, %b %-d")
+        except ValueError:
+            updated_label = observed_at
+
+    temperature = current.get("temperature_2m")
+    weather_code = current.get("weather_code", 0)
+    wind_speed = current.get("wind_speed_10m")
+
+    snowfall_7day = high = low = None
+    if powder is not None:
+        snowfall_7day = round(sum(day.snowfall for day in powder.days[:7]), 2)
+        high, low = powder.days[0].high, powder.days[0].low
+    else:
+        if daily.get("snowfall_sum"):
+            snowfall_7day = sum(daily["snowfall_sum"])
+        if daily.get("temperature_2m_max") and daily.get("temperature_2m_min"):
+            high = daily["temperature_2m_max"][0]
+            low = daily["temperature_2m_min"][0]
+
+    return Conditions(
+        observed_at=observed_at,
+        temperature=temperature,
+        weather_code=weather_code,
+        wind_speed=wind_speed,
+        snowfall_7day=snowfall_7day,
+        high=high,
+        low=low,
+        updated_label=updated_label,
+        description=get_weather_description(weather_code),
+        temperature_label=f"{'N/A' if temperature is None else temperature}°F",
+        wind_label=f"{'N/A' if wind_speed is None else wind_speed} mph",
+        snowfall_label=f'{snowfall_7day:.1f}"' if snowfall_7day is not None else None,
+        high_low_label=f"{high}° / {low}°" if high is not None else None,
+        powder=powder,
+        powder_label=_powder_label(powder),
+    )
+
+
+def summarize_weather(conditions, base_depth):
+    """The values shown in the weather sidebar, as plain JSON-able data
+    (used by snapshot.json and the JSON API)."""
+    if not conditions:
+        return None
+    best = conditions.powder.best_day if conditions.powder is not None else None
+    return {
+        "observed_at": conditions.observed_at,
+        "temperature_f": conditions.temperature,
+        "conditions": conditions.description,
+        "base_depth_in": base_depth,
+        "snowfall_7day_in": round(conditions.snowfall_7day, 1) if conditions.snowfall_7day is not None else None,
+        "wind_mph": conditions.wind_speed,
+        "high_f": conditions.high,
+        "low_f": conditions.low,
+        "best_powder_day": {
+            "date": best.date,
+            "fresh_snow_in": best.fresh_snow,
+            "quality": best.quality_label,
+            "score": best.score,
+        } if best is not None else None,
+    }
@@ -1,7 +1,24 @@
 import streamlit as st
-from datetime import datetime
+import streamlit.components.v2
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import metrics
+import os
 import time
-import requests
+from datetime import datetime
+import page
+from page import (
+    GITHUB_RAW_BASE, COUNTDOWN_TICKER_JS, SLIDESHOW_LOADER_JS, SNOWFALL_JS, TAB_VISIBILITY_JS,
+    snow_html,
+    build_countdown_html, build_layout_html, build_slideshow_html, build_trip_header_html,
+    build_og_meta, build_weather_html, calculate_countdown, load_static_chrome, og_image_url,
+)
+import trips
+from fragment_cache import FragmentCache
+from sessions import HIDDEN_AFTER_SECONDS, IDLE_EVICT_SECONDS, SessionTracker
+from snow_history import BASE_DEPTH_METRIC, open_shared_history
+from weather import BASE_DEPTH_KEY, CONDITIONS_KEY, WEATHER_SNAPSHOT_PATH, WeatherRefresher, cache_key
+from weather_cache import open_shared_cache
 
 # App version
 APP_VERSION = "1.9"
@@ -13,591 +30,279 @@ st.set_page_config(
     layout="wide"
 )
 
-# GitHub raw URL for images
-GITHUB_RAW_BASE = "https://raw.githubusercontent.com/weljim73-spec/crestedbutte2026countdown/main"
-
-# Crested Butte Mountain coordinates
-CB_LAT = 38.8697
-CB_LON = -106.9878
-
-# Function to fetch snow conditions from Open-Meteo API
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
-def get_snow_conditions():
-    """Fetch current weather and snow conditions for Crested Butte."""
-    max_retries = 3
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
-        "latitude": CB_LAT,
-        "longitude": CB_LON,
-        "current": "temperature_2m,weather_code,wind_speed_10m",
-        "daily": "snowfall_sum,temperature_2m_max,temperature_2m_min,precipitation_sum",
-        "timezone": "America/Denver",
-        "forecast_days": 7,
-        "temperature_unit": "fahrenheit",
-        "wind_speed_unit": "mph",
-        "precipitation_unit": "inch"
-    }
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                return response.json()
-        except Exception:
-            pass
-        if attempt < max_retries - 1:
-            time.sleep(2 ** attempt)  # Exponential backoff: 1s, 2s
-    raise RuntimeError("Failed to fetch snow conditions after retries")
-
-# SnoCountry API - resort-reported snow base depth
-SNOCOUNTRY_URL = "http://feeds.snocountry.net/conditions.php"
-CB_RESORT_ID = "303010"  # Crested Butte Mountain Resort
-
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
-def get_resort_base_depth():
-    """Fetch Crested Butte resort-reported base depth from SnoCountry."""
+# Where the slideshow derivatives are loaded from: the URL that serves the
+# repo's static/. Set COUNTDOWN_STATIC_URL to the API app's /static (see
+# api.py) to serve them from your own host as immutable, with 304s. The
+# default hot-links GITHUB_RAW_BASE, which at least revalidates cheaply;
+# Streamlit's own app/static (.streamlit/config.toml) sends no Cache-Control
+# and never a 304, so browsers download every photo again on later visits.
+STATIC_BASE = os.environ.get("COUNTDOWN_STATIC_URL", f"{GITHUB_RAW_BASE}/static")
+
+# Falling snow: "canvas" (one canvas layer, see page.SNOWFALL_JS), "css"
+# (the original animated DOM snowflakes) or None for no snow
+SNOW_EFFECT = "canvas"
+
+# How often the weather sidebar is re-rendered and the weather checked for
+# expired sources (seconds); weather.SOURCE_TTLS decides what gets refetched
+WEATHER_REFRESH_SECONDS = 1800
+
+# While there is no weather to show and a fetch that could bring some is in
+# flight (the first refresh, or a Retry), how often the sidebar checks for
+# it (seconds), so the result shows up without another click
+WEATHER_POLL_SECONDS = 5
+
+# Span and resolution of the trend chart
+TREND_DAYS = 180
+TREND_POINTS = 300
+
+# Set COUNTDOWN_METRICS=1 to record metrics (see metrics.py); they show up
+# under ?debug=metrics and, if COUNTDOWN_METRICS_PORT is set, at /metrics
+# on that port - on loopback unless COUNTDOWN_METRICS_HOST says otherwise
+# (e.g. 0.0.0.0 for a scraper on another machine)
+@st.cache_resource
+def start_metrics_endpoint():
+    port = os.environ.get("COUNTDOWN_METRICS_PORT")
+    if metrics.ENABLED and port:
+        return metrics.serve(int(port), os.environ.get("COUNTDOWN_METRICS_HOST", "127.0.0.1"))
+
+start_metrics_endpoint()
+metrics.inc("script_runs_total", doc="Full script runs across all sessions")
+
+@st.cache_resource
+def load_trips():
+    """Trips hosted by this deployment (see trips.json), read once."""
+    return trips.load_trips()
+
+@st.cache_resource
+def get_snow_history():
+    """The process-wide snow history store (the append-only record of every
+    fetch behind ?view=trend), or None if it can't be opened."""
+    return open_shared_history()
+
+@st.cache_resource
+def get_weather_refresher():
+    """Start the process-wide background weather refresher (once); it keeps
+    every hosted trip's weather current in shared, batched fetches."""
+    return WeatherRefresher(interval=WEATHER_REFRESH_SECONDS, trips=load_trips().values(),
+                            cache=open_shared_cache(), history=get_snow_history(),
+                            snapshot_path=WEATHER_SNAPSHOT_PATH).start()
+
+@st.cache_resource
+def get_fragment_cache():
+    """Rendered HTML shared by every session (see fragment_cache.py)."""
+    return FragmentCache()
+
+def server_event_loop(runtime):
+    """The event loop the Streamlit server runs on, or None if this
+    Streamlit doesn't expose it (Runtime.stopped is a Future on that loop)."""
     try:
-        response = requests.get(SNOCOUNTRY_URL, params={
-            "apiKey": "SnoCountry.example",
-            "ids": CB_RESORT_ID,
-        }, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        if data.get("items"):
-            resort = data["items"][0]
-            base_min = resort.get("avgBaseDepthMin", "")
-            base_max = resort.get("avgBaseDepthMax", "")
-            if base_min and base_max and base_min == base_max:
-                return int(base_min)
-            elif base_min and base_max:
-                return f'{base_min}-{base_max}'
-            elif base_min:
-                return int(base_min)
-    except Exception:
-        pass
-    return None
-
-# Open Graph meta tags for link previews
-st.markdown(f"""
-<meta property="og:title" content="Crested Butte Trip Countdown" />
-<meta property="og:description" content="Counting down to our ski adventure in Crested Butte, Colorado - March 14, 2026!" />
-<meta property="og:image" content="{GITHUB_RAW_BASE}/preview.png" />
-<meta property="og:type" content="website" />
-<meta name="twitter:card" content="summary_large_image" />
-<meta name="twitter:title" content="Crested Butte Trip Countdown" />
-<meta name="twitter:description" content="Counting down to our ski adventure in Crested Butte, Colorado!" />
-<meta name="twitter:image" content="{GITHUB_RAW_BASE}/preview.png" />
-""", unsafe_allow_html=True)
+        return runtime.stopped.get_loop()
+    except (AttributeError, RuntimeError):
+        return None
+
+@st.cache_resource
+def get_session_tracker():
+    """Which sessions' tabs are hidden (see sessions.py), closing sessions
+    left hidden past IDLE_EVICT_SECONDS. Without a server (e.g. under
+    AppTest) or its event loop it only keeps count."""
+    if not Runtime.exists():
+        return SessionTracker()
+    runtime = Runtime.instance()
+    loop = server_event_loop(runtime)
+    if loop is None:
+        # Can't close sessions safely - track and count only
+        return SessionTracker(is_alive=runtime.is_active_session).start()
+
+    def close(session_id):
+        # close_session must run on the server's event loop
+        loop.call_soon_threadsafe(runtime.close_session, session_id)
+
+    return SessionTracker(close=close, is_alive=runtime.is_active_session).start()
+
+# ?trip=<slug> picks the countdown; the first trip in trips.json is the default
+TRIPS = load_trips()
+trip = TRIPS.get(st.query_params.get("trip"), next(iter(TRIPS.values())))
 
 # Version display - top left corner
 st.caption(f"v{APP_VERSION}")
 
-# Build image URLs list for 10 images
-image_urls = [f"{GITHUB_RAW_BASE}/image{str(i).zfill(2)}.jpg" for i in range(1, 11)]
-
-# Custom CSS for styling with slideshow and snow effect
-st.markdown("""
-<style>
-    /* Snow animation */
-    .snowflakes {
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        pointer-events: none;
-        z-index: 9999;
-        overflow: hidden;
-    }
-
-    .snowflake {
-        position: absolute;
-        top: -20px;
-        color: white;
-        font-size: 1.5em;
-        text-shadow: 0 0 5px rgba(255,255,255,0.8);
-        animation: fall linear infinite;
-        opacity: 0.8;
-    }
-
-    @keyframes fall {
-        0% {
-            transform: translateY(-10px) rotate(0deg);
-            opacity: 1;
-        }
-        100% {
-            transform: translateY(100vh) rotate(360deg);
-            opacity: 0.3;
-        }
-    }
-
-    /* Different snowflake positions and speeds */
-    .snowflake:nth-child(1) { left: 5%; animation-duration: 8s; animation-delay: 0s; font-size: 1.2em; }
-    .snowflake:nth-child(2) { left: 10%; animation-duration: 12s; animation-delay: 1s; font-size: 1.8em; }
-    .snowflake:nth-child(3) { left: 15%; animation-duration: 10s; animation-delay: 2s; font-size: 1em; }
-    .snowflake:nth-child(4) { left: 20%; animation-duration: 14s; animation-delay: 0.5s; font-size: 1.5em; }
-    .snowflake:nth-child(5) { left: 25%; animation-duration: 9s; animation-delay: 3s; font-size: 1.3em; }
-    .snowflake:nth-child(6) { left: 30%; animation-duration: 11s; animation-delay: 1.5s; font-size: 2em; }
-    .snowflake:nth-child(7) { left: 35%; animation-duration: 13s; animation-delay: 2.5s; font-size: 1.1em; }
-    .snowflake:nth-child(8) { left: 40%; animation-duration: 8s; animation-delay: 4s; font-size: 1.6em; }
-    .snowflake:nth-child(9) { left: 45%; animation-duration: 10s; animation-delay: 0.8s; font-size: 1.4em; }
-    .snowflake:nth-child(10) { left: 50%; animation-duration: 15s; animation-delay: 3.5s; font-size: 1.9em; }
-    .snowflake:nth-child(11) { left: 55%; animation-duration: 9s; animation-delay: 1.2s; font-size: 1.2em; }
-    .snowflake:nth-child(12) { left: 60%; animation-duration: 12s; animation-delay: 2.8s; font-size: 1.7em; }
-    .snowflake:nth-child(13) { left: 65%; animation-duration: 11s; animation-delay: 0.3s; font-size: 1em; }
-    .snowflake:nth-child(14) { left: 70%; animation-duration: 14s; animation-delay: 4.5s; font-size: 1.5em; }
-    .snowflake:nth-child(15) { left: 75%; animation-duration: 8s; animation-delay: 1.8s; font-size: 1.3em; }
-    .snowflake:nth-child(16) { left: 80%; animation-duration: 10s; animation-delay: 3.2s; font-size: 2.1em; }
-    .snowflake:nth-child(17) { left: 85%; animation-duration: 13s; animation-delay: 0.6s; font-size: 1.1em; }
-    .snowflake:nth-child(18) { left: 90%; animation-duration: 9s; animation-delay: 2.2s; font-size: 1.8em; }
-    .snowflake:nth-child(19) { left: 95%; animation-duration: 11s; animation-delay: 4.2s; font-size: 1.4em; }
-    .snowflake:nth-child(20) { left: 3%; animation-duration: 12s; animation-delay: 1.7s; font-size: 1.6em; }
-
-    .countdown-container {
-        text-align: center;
-        padding: 20px;
-    }
-    .countdown-title {
-        font-size: 2.5rem;
-        color: #1E88E5;
-        margin-bottom: 10px;
-    }
-    .countdown-subtitle {
-        font-size: 1.2rem;
-        color: #666;
-        margin-bottom: 30px;
-    }
-
-    /* Countdown flexbox - always horizontal */
-    .countdown-flex {
-        display: flex;
-        justify-content: center;
-        gap: 10px;
-        flex-wrap: nowrap;
-        margin: 20px 0;
-    }
-    .countdown-flex .time-unit {
-        flex: 1 1 0;
-        max-width: 140px;
-        text-align: center;
-    }
-    .time-value {
-        font-size: 3.5rem;
-        font-weight: bold;
-        color: #2E7D32;
-        background: linear-gradient(135deg, #E8F5E9 0%, #C8E6C9 100%);
-        padding: 20px 25px;
-        border-radius: 15px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        min-width: 60px;
-        display: block;
-    }
-    .time-label {
-        font-size: 1rem;
-        color: #666;
-        margin-top: 10px;
-        text-transform: uppercase;
-        letter-spacing: 2px;
-    }
-    .mountain-emoji {
-        font-size: 4rem;
-        margin: 20px 0;
-        text-align: center;
-    }
-
-    /* Slideshow styles */
-    .slideshow-container {
-        position: relative;
-        width: 100%;
-        max-width: 800px;
-        height: 400px;
-        margin: 30px auto;
-        border-radius: 20px;
-        overflow: hidden;
-        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-        background-color: #000;
-    }
-
-    .slideshow-container img {
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        object-fit: contain;
-        opacity: 0;
-        animation: fadeInOut 50s infinite;
-    }
-
-    /* Stagger the animations for each image */
-    .slideshow-container img:nth-child(1) { animation-delay: 0s; }
-    .slideshow-container img:nth-child(2) { animation-delay: 5s; }
-    .slideshow-container img:nth-child(3) { animation-delay: 10s; }
-    .slideshow-container img:nth-child(4) { animation-delay: 15s; }
-    .slideshow-container img:nth-child(5) { animation-delay: 20s; }
-    .slideshow-container img:nth-child(6) { animation-delay: 25s; }
-    .slideshow-container img:nth-child(7) { animation-delay: 30s; }
-    .slideshow-container img:nth-child(8) { animation-delay: 35s; }
-    .slideshow-container img:nth-child(9) { animation-delay: 40s; }
-    .slideshow-container img:nth-child(10) { animation-delay: 45s; }
-
-    @keyframes fadeInOut {
-        0% { opacity: 0; }
-        2% { opacity: 1; }
-        10% { opacity: 1; }
-        12% { opacity: 0; }
-        100% { opacity: 0; }
-    }
-
-    /* Snow conditions styling */
-    .snow-metric {
-        background: linear-gradient(135deg, #E3F2FD 0%, #BBDEFB 100%);
-        padding: 4px;
-        border-radius: 5px;
-        margin: 3px 0;
-        text-align: center;
-    }
-    .snow-metric-value {
-        font-size: 0.9rem;
-        font-weight: bold;
-        color: #1565C0;
-    }
-    .snow-metric-label {
-        font-size: 0.5rem;
-        color: #666;
-        text-transform: uppercase;
-    }
-    .snow-updated-badge {
-        text-align: center;
-        font-size: 0.55rem;
-        color: #90A4AE;
-        margin-bottom: 4px;
-    }
-
-    /* ===== Mobile-first layout ===== */
-    /* Default (mobile): single column, natural DOM order */
-    .layout-wrapper {
-        display: block;
-    }
-    .layout-main {
-        order: 1;
-    }
-    .layout-weather {
-        order: 2;
-        margin-top: 20px;
-        padding-bottom: 200px;
-    }
-
-    /* Desktop: CSS grid with weather as left sidebar */
-    @media (min-width: 769px) {
-        .layout-wrapper {
-            display: grid;
-            grid-template-columns: 1fr 3fr;
-            gap: 20px;
-            align-items: start;
-        }
-        .layout-main {
-            order: 2;
-        }
-        .layout-weather {
-            order: 1;
-            margin-top: 280px;
-        }
-    }
-
-    /* Mobile responsive styles */
-    @media (max-width: 768px) {
-        .mountain-emoji {
-            margin-top: 0 !important;
-            padding-top: 0 !important;
-        }
-        .countdown-title {
-            font-size: 1.5rem !important;
-        }
-        .countdown-subtitle {
-            font-size: 1rem !important;
-        }
-        .countdown-flex .time-value {
-            font-size: 2rem !important;
-            padding: 10px 8px !important;
-            min-width: 45px !important;
-        }
-        .countdown-flex .time-label {
-            font-size: 0.7rem !important;
-            letter-spacing: 1px !important;
-        }
-        .slideshow-container {
-            height: 250px !important;
-            max-width: 100% !important;
-            margin: 15px auto !important;
-        }
-        .mountain-emoji {
-            font-size: 2.5rem !important;
-        }
-        .snow-metric {
-            padding: 3px !important;
-            margin: 2px 0 !important;
-        }
-        .snow-metric-value {
-            font-size: 0.8rem !important;
-        }
-    }
-
-    @media (max-width: 480px) {
-        .countdown-title {
-            font-size: 1.2rem !important;
-        }
-        .countdown-flex .time-value {
-            font-size: 1.5rem !important;
-            padding: 8px 4px !important;
-            min-width: 35px !important;
-        }
-        .countdown-flex .time-label {
-            font-size: 0.6rem !important;
-        }
-        .slideshow-container {
-            height: 200px !important;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Trip date
-TRIP_DATE = datetime(2026, 3, 14, 0, 0, 0)
-
-def calculate_countdown():
-    """Calculate time remaining until the trip."""
-    now = datetime.now()
-    delta = TRIP_DATE - now
-
-    if delta.total_seconds() <= 0:
-        return None  # Trip has started!
-
-    total_seconds = int(delta.total_seconds())
-
-    weeks = total_seconds // (7 * 24 * 3600)
-    remaining = total_seconds % (7 * 24 * 3600)
-
-    days = remaining // (24 * 3600)
-    remaining = remaining % (24 * 3600)
-
-    hours = remaining // 3600
-    remaining = remaining % 3600
-
-    minutes = remaining // 60
-    seconds = remaining % 60
-
-    return {
-        'weeks': weeks,
-        'days': days,
-        'hours': hours,
-        'minutes': minutes,
-        'seconds': seconds
-    }
-
-# Weather code to description mapping
-def get_weather_description(code):
-    weather_codes = {
-        0: "Clear sky ☀️",
-        1: "Mainly clear 🌤️",
-        2: "Partly cloudy ⛅",
-        3: "Overcast ☁️",
-        45: "Foggy 🌫️",
-        48: "Rime fog 🌫️",
-        51: "Light drizzle 🌧️",
-        53: "Drizzle 🌧️",
-        55: "Dense drizzle 🌧️",
-        61: "Slight rain 🌧️",
-        63: "Rain 🌧️",
-        65: "Heavy rain 🌧️",
-        71: "Slight snow 🌨️",
-        73: "Snow 🌨️",
-        75: "Heavy snow ❄️",
-        77: "Snow grains 🌨️",
-        80: "Slight showers 🌧️",
-        81: "Showers 🌧️",
-        82: "Violent showers 🌧️",
-        85: "Slight snow showers 🌨️",
-        86: "Heavy snow showers ❄️",
-        95: "Thunderstorm ⛈️",
+# Slideshow photos and their responsive derivatives (see page.py)
+image_files = page.find_slide_images()
+load_image_manifest = st.cache_resource(page.load_image_manifest)
+
+@st.cache_resource
+def build_static_chrome():
+    """The page's styles as one HTML string, loaded once per
+    process from the file prebuilt by build_chrome.py. It is only sent on
+    full script runs; the render_page fragment that reruns on a timer never
+    re-sends it."""
+    return load_static_chrome(len(image_files))
+
+def send_html(html, component=None):
+    """Send raw HTML to the browser, tallying bytes sent to this session.
+
+    With component (a name), html is a single inline <script> and runs as a
+    components.v2 component of that name (st.markdown strips <script>
+    tags); otherwise it goes out through st.markdown.
+    """
+    if "html_bytes_sent" not in st.session_state:
+        st.session_state.html_bytes_sent = 0
+        st.session_state.session_started = time.time()
+    size = len(html.encode("utf-8"))
+    st.session_state.html_bytes_sent += size
+    metrics.inc("html_bytes_sent_total", size, doc="Raw HTML bytes sent to browsers")
+    if component:
+        script_component(component, html)(key=component)
+    else:
+        st.markdown(html, unsafe_allow_html=True)
+
+def script_component(name, script):
+    """A components.v2 component running an inline <script> in the page.
+
+    The script becomes the component's module-level code, which the browser
+    evaluates once per page however often the component is re-rendered;
+    that is what starts its timers and listeners exactly once.
+    """
+    body = script.strip().removeprefix("<script>").removesuffix("</script>")
+    return st.components.v2.component(name, js=f"{body}\nexport default function () {{}}\n")
+
+# Link-preview tags point at the trip's latest daily preview image, which
+# snapshot_site.py renders and publishes alongside the repo's static/
+@st.cache_resource(ttl=3600)
+def build_og_meta_html(slug):
+    image_url = og_image_url(slug, page.load_og_manifest(), f"{GITHUB_RAW_BASE}/static")
+    return build_og_meta(TRIPS[slug], image_url).strip()
+
+send_html(f"{build_og_meta_html(trip.slug)}\n\n{build_static_chrome()}")
+# Also only on full script runs; the canvas renderer starts once per page
+if SNOW_EFFECT == "canvas":
+    send_html(SNOWFALL_JS, component="snowfall")
+elif SNOW_EFFECT == "css":
+    send_html(snow_html)
+
+# A tab in the background reports hidden, which reruns the script without
+# the render_page refresh timer; showing it again reruns it with the timer
+# and renders straight away
+tab_visibility = st.components.v2.component("tab_visibility", js=TAB_VISIBILITY_JS)
+tab_visible = tab_visibility(
+    key="tab_visibility",
+    data={"hiddenAfterMs": HIDDEN_AFTER_SECONDS * 1000, "evictAfterMs": IDLE_EVICT_SECONDS * 1000},
+    default={"visible": True},
+    on_visible_change=lambda: None,
+).get("visible", True)
+get_session_tracker().report(get_script_run_ctx().session_id, tab_visible)
+
+def render_trend(trip):
+    """Line chart of the 7-day snowfall forecast and resort base depth over
+    the last TREND_DAYS, downsampled to TREND_POINTS bucket means."""
+    import pandas as pd  # Only needed for this view
+
+    history = get_snow_history()
+    if history is None:
+        st.caption("Snow history is unavailable.")
+        return
+    end = time.time()
+    start = end - TREND_DAYS * 86400
+    series = {
+        "7-day snow forecast (in)": (cache_key(CONDITIONS_KEY, trip.location_key), "snowfall_7day"),
     }
-    return weather_codes.get(code, "Unknown")
-
-# === Build all content as HTML for mobile-first layout ===
-
-# -- Main content section --
-main_html = ''
-
-# Header (icons)
-main_html += '''<div class="mountain-emoji">🏔️⛷️🎿
-<svg width="64" height="64" viewBox="0 0 64 64" style="vertical-align: middle; margin-left: 5px;">
-  <!-- Wooden barrel base -->
-  <ellipse cx="32" cy="48" rx="28" ry="10" fill="#8B4513"/>
-  <rect x="4" y="28" width="56" height="20" fill="#CD853F"/>
-  <ellipse cx="32" cy="28" rx="28" ry="10" fill="#DEB887"/>
-  <!-- Water -->
-  <ellipse cx="32" cy="28" rx="24" ry="7" fill="#87CEEB"/>
-  <!-- Bubbles -->
-  <circle cx="20" cy="26" r="3" fill="white" opacity="0.8"/>
-  <circle cx="28" cy="24" r="2" fill="white" opacity="0.7"/>
-  <circle cx="38" cy="27" r="2.5" fill="white" opacity="0.8"/>
-  <circle cx="44" cy="25" r="2" fill="white" opacity="0.6"/>
-  <circle cx="24" cy="29" r="1.5" fill="white" opacity="0.7"/>
-  <circle cx="40" cy="30" r="1.5" fill="white" opacity="0.6"/>
-</svg>
-</div>'''
-
-# Title and subtitle
-main_html += '<h1 class="countdown-title">Crested Butte Trip Countdown</h1>'
-main_html += '<p class="countdown-subtitle">Adventure begins: March 14, 2026</p>'
-
-# Countdown (always-horizontal flexbox)
-countdown = calculate_countdown()
-
-if countdown is None:
-    main_html += '<div style="text-align:center; font-size:2rem; color:#2E7D32;">🎉 The trip has begun! Have an amazing time in Crested Butte! 🎉</div>'
-else:
-    main_html += '<div class="countdown-flex">'
-    for label, value, fmt in [
-        ("Weeks", countdown['weeks'], str(countdown['weeks'])),
-        ("Days", countdown['days'], str(countdown['days'])),
-        ("Hours", countdown['hours'], f"{countdown['hours']:02d}"),
-        ("Minutes", countdown['minutes'], f"{countdown['minutes']:02d}"),
-        ("Seconds", countdown['seconds'], f"{countdown['seconds']:02d}"),
-    ]:
-        main_html += f'''<div class="time-unit">
-    <div class="time-value">{fmt}</div>
-    <div class="time-label">{label}</div>
-</div>'''
-    main_html += '</div>'
-
-# -- Weather section --
-weather_html = ''
-try:
-    weather_data = get_snow_conditions()
-except RuntimeError:
-    weather_data = None
-
-if weather_data:
-    current = weather_data.get("current", {})
-    daily = weather_data.get("daily", {})
-
-    # Last updated badge
-    obs_time = current.get("time", "")
-    if obs_time:
-        try:
-            obs_dt = datetime.strptime(obs_time, "%Y-%m-%dT%H:%M")
-            updated_label = obs_dt.strftime("%-I:%M %p, %b %-d")
-        except ValueError:
-            updated_label = obs_time
-        weather_html += f'<div class="snow-updated-badge">Updated {updated_label}</div>'
-
-    # Current temperature
-    temp = current.get("temperature_2m", "N/A")
-    weather_html += f'''<div class="snow-metric">
-    <div class="snow-metric-value">{temp}°F</div>
-    <div class="snow-metric-label">Current Temp</div>
-</div>'''
-
-    # Weather condition
-    weather_code = current.get("weather_code", 0)
-    weather_desc = get_weather_description(weather_code)
-    weather_html += f'''<div class="snow-metric">
-    <div class="snow-metric-value" style="font-size: 0.75rem;">{weather_desc}</div>
-    <div class="snow-metric-label">Conditions</div>
-</div>'''
-
-    # Resort-reported snow base depth from SnoCountry
-    base_depth = get_resort_base_depth()
-    base_display = f'{base_depth}"' if base_depth is not None else "N/A"
-    weather_html += f'''<div class="snow-metric">
-    <div class="snow-metric-value">{base_display}</div>
-    <div class="snow-metric-label">Snow Base</div>
-</div>'''
-
-    # 7-day snowfall forecast
-    if daily.get("snowfall_sum"):
-        total_7day_snow = sum(daily["snowfall_sum"])
-        weather_html += f'''<div class="snow-metric">
-    <div class="snow-metric-value">{total_7day_snow:.1f}"</div>
-    <div class="snow-metric-label">7-Day Snow Forecast</div>
-</div>'''
-
-    # Wind speed
-    wind = current.get("wind_speed_10m", "N/A")
-    weather_html += f'''<div class="snow-metric">
-    <div class="snow-metric-value">{wind} mph</div>
-    <div class="snow-metric-label">Wind Speed</div>
-</div>'''
-
-    # High/Low today
-    if daily.get("temperature_2m_max") and daily.get("temperature_2m_min"):
-        high = daily["temperature_2m_max"][0]
-        low = daily["temperature_2m_min"][0]
-        weather_html += f'''<div class="snow-metric">
-    <div class="snow-metric-value">{high}° / {low}°</div>
-    <div class="snow-metric-label">High / Low Today</div>
-</div>'''
-else:
-    weather_html += '<div style="color: orange; text-align: center;">Unable to fetch snow conditions</div>'
-
-# -- Slideshow --
-slideshow_html = '<div class="slideshow-container">'
-for url in image_urls:
-    slideshow_html += f'<img src="{url}" alt="" onerror="this.style.display=\'none\'">'
-slideshow_html += '</div>'
-
-# === Render the layout ===
-# Mobile-first: main content (icons, title, countdown) then weather then slideshow
-# Desktop: CSS grid repositions weather to left sidebar
-st.markdown(f'''
-<div class="layout-wrapper">
-    <div class="layout-main">
-        {main_html}
-        {slideshow_html}
-    </div>
-    <div class="layout-weather">
-        {weather_html}
-    </div>
-</div>
-''', unsafe_allow_html=True)
-
-# Handle retry for weather errors (needs Streamlit widget outside the HTML)
-if not weather_data:
-    if st.button("Retry", key="retry_weather"):
-        st.cache_data.clear()
-        st.rerun()
-
-# Balloons if trip has started
-if countdown is None:
-    st.balloons()
-
-# Snow effect
-snow_html = '''
-<div class="snowflakes">
-    <div class="snowflake">❄</div>
-    <div class="snowflake">❅</div>
-    <div class="snowflake">❆</div>
-    <div class="snowflake">❄</div>
-    <div class="snowflake">❅</div>
-    <div class="snowflake">❆</div>
-    <div class="snowflake">❄</div>
-    <div class="snowflake">❅</div>
-    <div class="snowflake">❆</div>
-    <div class="snowflake">❄</div>
-    <div class="snowflake">❅</div>
-    <div class="snowflake">❆</div>
-    <div class="snowflake">❄</div>
-    <div class="snowflake">❅</div>
-    <div class="snowflake">❆</div>
-    <div class="snowflake">❄</div>
-    <div class="snowflake">❅</div>
-    <div class="snowflake">❆</div>
-    <div class="snowflake">❄</div>
-    <div class="snowflake">❅</div>
-</div>
-'''
-st.markdown(snow_html, unsafe_allow_html=True)
-
-# Auto-refresh every 5 seconds
-time.sleep(5)
-st.rerun()
+    if trip.resort_id:
+        series["Base depth (in)"] = (cache_key(BASE_DEPTH_KEY, trip.resort_id), BASE_DEPTH_METRIC)
+    columns = {}
+    for label, (location, metric) in series.items():
+        rows = history.downsample(location, metric, start, end, TREND_POINTS)
+        columns[label] = pd.Series(
+            [mean for _, _, _, mean, _ in rows],
+            index=[datetime.fromtimestamp(bucket) for bucket, *_ in rows],
+            dtype=float,
+        )
+    chart = pd.DataFrame(columns)
+    if chart.empty:
+        st.caption("No snow history recorded yet.")
+    else:
+        st.line_chart(chart)
+
+def render_page(polling=False):
+    """Render the countdown, weather sidebar and slideshow. Runs as a
+    fragment, rerun every WEATHER_REFRESH_SECONDS while the tab is shown,
+    or every WEATHER_POLL_SECONDS (polling=True) while it waits on a fetch
+    for weather it has none of."""
+    laps = metrics.section_timer()
+    metrics.inc("page_renders_total", doc="render_page runs across all sessions")
+    st.session_state.page_renders = st.session_state.get("page_renders", 0) + 1
+
+    # === Build all content as HTML for mobile-first layout ===
+    # Everything but the countdown is rendered once per data version and
+    # shared by reference across sessions
+    fragments = get_fragment_cache()
+    countdown = calculate_countdown(trip.date)
+    main_html = (fragments.get(f"header:{trip.slug}", trip, lambda: build_trip_header_html(trip))
+                 + build_countdown_html(trip, countdown))
+    laps.lap("main_html")
+
+    # Only renders during the first refresh attempt after a cold start wait
+    # on the upstream APIs; once it has failed, the error and Retry show
+    # straight away
+    refresher = get_weather_refresher()
+    snapshot = refresher.wait_until_ready(trip.slug, timeout=15)
+    weather_data = snapshot.conditions
+    laps.lap("weather_snapshot")
+    if polling and (weather_data or not refresher.fetching()):
+        st.rerun()  # Weather arrived or the fetch failed: back to the normal timer
+
+    weather_html = fragments.get(f"weather:{trip.slug}", snapshot.version,
+                                 lambda: build_weather_html(weather_data, snapshot.base_depth))
+    laps.lap("weather_html")
+
+    slideshow_html = fragments.get("slideshow", tuple(image_files),
+                                   lambda: build_slideshow_html(image_files, load_image_manifest(), STATIC_BASE))
+    laps.lap("slideshow_html")
+
+    send_html(build_layout_html(main_html, slideshow_html, weather_html))
+    laps.lap("send_layout")
+
+    # Handle retry for weather errors (needs Streamlit widget outside the HTML)
+    if not weather_data:
+        if st.button("Retry", key="retry_weather"):
+            # Refetch only the sources that failed, in the background;
+            # concurrent clicks from other sessions share the same in-flight
+            # fetch, and the WEATHER_POLL_SECONDS timer shows the result
+            # (a click inside RETRY_COOLDOWN starts nothing to wait for)
+            refresher.retry(CONDITIONS_KEY)
+            if snapshot.base_depth is None:
+                refresher.retry(BASE_DEPTH_KEY)
+            if refresher.fetching() and not polling:
+                st.rerun()  # Start the WEATHER_POLL_SECONDS timer
+
+    send_html(SLIDESHOW_LOADER_JS, component="slideshow_loader")
+
+    # Balloons if trip has started
+    if countdown is None:
+        st.balloons()
+    else:
+        send_html(COUNTDOWN_TICKER_JS, component="countdown_ticker")
+
+    # ?view=trend adds the season trend chart below the page
+    if st.query_params.get("view") == "trend":
+        render_trend(trip)
+
+    # ?debug=bytes shows how much HTML this session has been sent;
+    # ?debug=metrics adds its render rate and the process-wide metrics
+    debug = st.query_params.get("debug")
+    if debug in ("bytes", "metrics"):
+        sent = st.session_state.html_bytes_sent
+        renders = st.session_state.page_renders
+        minutes = max((time.time() - st.session_state.session_started) / 60, 1 / 60)
+        st.caption(f"HTML sent this session: {sent:,} B ({sent / minutes:,.0f} B/min), "
+                   f"{renders} renders ({renders / minutes:.2f}/min)")
+    if debug == "metrics":
+        if metrics.ENABLED:
+            st.code(metrics.render_prometheus(), language=None)
+        else:
+            st.caption("Set COUNTDOWN_METRICS=1 to record metrics.")
+
+
+refresher = get_weather_refresher()
+polling = refresher.snapshot(trip.slug).conditions is None and refresher.fetching()
+refresh_every = WEATHER_POLL_SECONDS if polling else WEATHER_REFRESH_SECONDS
+st.fragment(run_every=refresh_every if tab_visible else None)(render_page)(polling)
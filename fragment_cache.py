@@ -0,0 +1,45 @@
+"""Process-wide cache of rendered HTML fragments.
+
+Most of the page is the same for every viewer until the data behind it
+changes: the weather sidebar changes once per published weather snapshot,
+the slideshow and trip header only on deploy. FragmentCache renders each
+such fragment once per version and hands every session the same string, so
+a rerun only builds the per-second countdown itself.
+"""
+import threading
+
+import metrics
+
+
+class FragmentCache:
+    """Rendered fragments keyed by name, each tagged with the version of
+    the data it was rendered from.
+
+    Only the latest version of each fragment is kept: asking for a newer
+    version re-renders and replaces it. Renders happen under a lock, so
+    concurrent sessions hitting a new version render it exactly once.
+    """
+
+    def __init__(self):
+        self._fragments = {}  # name -> (version, html)
+        self._lock = threading.Lock()
+
+    def get(self, name, version, render):
+        """Return the fragment for (name, version), calling render() to
+        build it if the cached copy is missing or for another version."""
+        cached = self._fragments.get(name)
+        if cached is not None and cached[0] == version:
+            metrics.inc("fragment_cache_lookups_total", doc="Rendered-fragment cache lookups",
+                        result="hit")
+            return cached[1]
+        with self._lock:
+            cached = self._fragments.get(name)
+            if cached is None or cached[0] != version:
+                metrics.inc("fragment_cache_lookups_total", doc="Rendered-fragment cache lookups",
+                            result="miss")
+                cached = self._fragments[name] = (version, render())
+            return cached[1]
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
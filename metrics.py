@@ -0,0 +1,156 @@
+"""Lightweight, process-wide instrumentation for the countdown app.
+
+Counters and histograms are rendered in the Prometheus text format, either
+in the app's ?debug=metrics panel or from a tiny HTTP endpoint started with
+serve(). Nothing is recorded unless COUNTDOWN_METRICS=1 is set, and when it
+is off every hook is a cheap early return.
+"""
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("COUNTDOWN_METRICS") == "1"
+
+# Latency buckets in seconds, for render sections and upstream calls alike
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_help = {}
+_gauges = []      # callables returning [(name, labels, value), ...]
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, doc="", **labels):
+    """Add amount to a counter."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _help.setdefault(name, doc)
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, doc="", **labels):
+    """Record one observation (in seconds) in a histogram."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _help.setdefault(name, doc)
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+
+class _SectionTimer:
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def lap(self, section):
+        """Record the time since the previous lap (or creation) for section."""
+        now = time.perf_counter()
+        observe("render_section_seconds", now - self._last,
+                doc="Wall time per render section", section=section)
+        self._last = now
+
+
+class _NullSectionTimer:
+    def lap(self, section):
+        pass
+
+
+_NULL_TIMER = _NullSectionTimer()
+
+
+def section_timer():
+    """Stopwatch for consecutive render sections: call .lap(name) at the end
+    of each one. Returns a shared no-op object when metrics are disabled."""
+    return _SectionTimer() if ENABLED else _NULL_TIMER
+
+
+def register_gauges(fn):
+    """Register a callable returning [(name, labels_dict, value), ...] that is
+    read at export time, for values owned elsewhere (e.g. breaker state)."""
+    _gauges.append(fn)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items())
+        help_text = dict(_help)
+
+    seen = set()
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {help_text.get(name, '')}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), hist in histograms:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {help_text.get(name, '')}")
+            lines.append(f"# TYPE {name} histogram")
+        for bound, count in zip(BUCKETS, hist):
+            le = _format_labels(labels + (("le", bound),))
+            lines.append(f"{name}_bucket{le} {count}")
+        inf = _format_labels(labels + (("le", "+Inf"),))
+        lines.append(f"{name}_bucket{inf} {hist[-1]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist[-2]:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+
+    for fn in _gauges:
+        for name, labels, value in fn():
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics on host:port from a daemon thread; returns the server.
+    Loopback only by default - pass host="" to expose it to scrapers on
+    other machines."""
+    # Imported here so that merely importing metrics stays cheap on cold starts
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
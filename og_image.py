@@ -0,0 +1,154 @@
+"""Render each trip's daily link-preview image.
+
+Composites the days remaining (from calculate_countdown()) and the latest
+snow numbers onto one of the slideshow photos at the 1200x630 size Open
+Graph and Twitter cards use, and encodes it as a progressive JPEG under
+MAX_BYTES (JPEG rather than WebP because every link-preview crawler reads
+it). Images land in static/og/<slug>-<content-hash>.jpg, so every new image
+gets a new URL and crawlers never keep showing yesterday's count;
+static/og/manifest.json records the current one per trip and which day it
+was rendered for, so an image is rendered at most once a day however often
+snapshot_site.py runs.
+
+Requires Pillow (build-time only, not needed by the app itself, which only
+reads the manifest):
+
+    pip install pillow
+"""
+import hashlib
+import io
+import json
+import os
+import re
+from datetime import date
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from page import (
+    APP_DIR, OG_IMAGE_DIR, OG_MANIFEST_PATH, calculate_countdown, find_slide_images,
+    load_og_manifest,
+)
+
+# Open Graph / Twitter summary_large_image size
+OG_SIZE = (1200, 630)
+
+# Largest acceptable encoded image; JPEG quality steps down until it fits
+MAX_BYTES = 150_000
+JPEG_QUALITIES = (85, 80, 75, 70, 60, 50)
+
+MARGIN = 64
+
+
+def _font(size):
+    # Pillow's bundled FreeType font, so rendering needs no system fonts
+    return ImageFont.load_default(size=size)
+
+
+def _days_left(countdown):
+    return countdown["total_seconds"] // 86400 if countdown else None
+
+
+def _snow_line(conditions, base_depth):
+    """One line of snow numbers, or None if there is no weather to show."""
+    parts = []
+    if conditions is not None and conditions.snowfall_label:
+        parts.append(f"{conditions.snowfall_label} snow next 7 days")
+    if base_depth is not None:
+        parts.append(f'{base_depth}" base')
+    if conditions is not None and conditions.temperature is not None:
+        parts.append(conditions.temperature_label)
+    return "  ·  ".join(parts) or None
+
+
+def render_preview(trip, countdown, conditions, base_depth, photo):
+    """The preview image for a trip as a PIL image, drawn over photo (a
+    path to one of the slideshow photos)."""
+    with Image.open(photo) as img:
+        img.draft("RGB", OG_SIZE)  # Let the JPEG decoder downscale for us
+        img = ImageOps.fit(ImageOps.exif_transpose(img).convert("RGB"), OG_SIZE, Image.LANCZOS)
+
+    # Darken the photo, most of all under the text, so white text stays
+    # legible on bright snow
+    shade = Image.linear_gradient("L").rotate(90).resize(OG_SIZE).point(lambda v: 90 + v * 100 // 255)
+    img = Image.composite(Image.new("RGB", OG_SIZE, "black"), img, shade)
+    draw = ImageDraw.Draw(img)
+    text = {"fill": "white", "stroke_width": 2, "stroke_fill": "#0D1B2A", "anchor": "ls"}
+
+    draw.text((MARGIN, MARGIN + 48), trip.title, font=_font(52), **text)
+    days = _days_left(countdown)
+    if days is None:
+        headline, headline_font, caption = "It's ski time!", _font(128), ""
+    else:
+        headline, headline_font = str(days), _font(200)
+        caption = "day to go" if days == 1 else "days to go"
+    baseline = 330
+    draw.text((MARGIN, baseline), headline, font=headline_font, **text)
+    if caption:
+        left = draw.textbbox((MARGIN, baseline), headline, font=headline_font, anchor="ls")[2]
+        draw.text((left + 28, baseline), caption, font=_font(60), **text)
+    draw.text((MARGIN, baseline + 80), f"{trip.resort} · {trip.date:%B %-d, %Y}",
+              font=_font(40), **{**text, "fill": "#E3F2FD"})
+
+    snow = _snow_line(conditions, base_depth)
+    if snow:
+        draw.text((MARGIN, OG_SIZE[1] - MARGIN), snow, font=_font(44), **text)
+    return img
+
+
+def encode_preview(img):
+    """JPEG bytes for img at the highest quality in JPEG_QUALITIES that fits
+    in MAX_BYTES (the lowest one if none does)."""
+    for quality in JPEG_QUALITIES:
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        data = buffer.getvalue()
+        if len(data) <= MAX_BYTES:
+            break
+    return data
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_preview(trip, conditions, base_depth, today=None):
+    """Render today's preview image for trip unless it already exists, and
+    return its path relative to static/.
+
+    An image rendered before any weather was available is redrawn once
+    weather turns up, still at most once more that day. Older images of the
+    trip are removed.
+    """
+    today = (today or date.today()).isoformat()
+    has_weather = conditions is not None
+    manifest = load_og_manifest()
+    entry = manifest.get(trip.slug)
+    if (entry and entry["day"] == today and (entry["weather"] or not has_weather)
+            and os.path.exists(os.path.join(APP_DIR, "static", entry["path"]))):
+        return entry["path"]
+
+    photos = find_slide_images()
+    photo = os.path.join(APP_DIR, photos[date.fromisoformat(today).toordinal() % len(photos)])
+    img = render_preview(trip, calculate_countdown(trip.date), conditions, base_depth, photo)
+    data = encode_preview(img)
+
+    os.makedirs(OG_IMAGE_DIR, exist_ok=True)
+    filename = f"{trip.slug}-{hashlib.sha256(data).hexdigest()[:12]}.jpg"
+    _write_atomic(os.path.join(OG_IMAGE_DIR, filename), data)
+    manifest[trip.slug] = {
+        "day": today,
+        "path": f"og/{filename}",
+        "bytes": len(data),
+        "weather": has_weather,
+    }
+    _write_atomic(OG_MANIFEST_PATH, (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode())
+
+    # Drop this trip's earlier images; crawlers that cached them keep their copy
+    pattern = re.compile(rf"{re.escape(trip.slug)}-[0-9a-f]{{12}}\.jpg")
+    for name in os.listdir(OG_IMAGE_DIR):
+        if pattern.fullmatch(name) and name != filename:
+            os.remove(os.path.join(OG_IMAGE_DIR, name))
+    return manifest[trip.slug]["path"]
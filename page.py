@@ -0,0 +1,644 @@
+"""HTML building blocks for the countdown page.
+
+Everything here is plain Python with no Streamlit dependency, so the live
+app (crested_butte_countdown.py) and the static snapshot generator
+(snapshot_site.py) render the countdown, weather and slideshow from the
+same code.
+"""
+import hashlib
+import inspect
+import html
+import json
+import os
+import re
+from datetime import datetime
+
+# GitHub raw URL for images
+GITHUB_RAW_BASE = "https://raw.githubusercontent.com/weljim73-spec/crestedbutte2026countdown/main"
+
+# Directory the app (and its photos) are deployed from
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def calculate_countdown(trip_date):
+    """Calculate time remaining until the trip starts at trip_date (a
+    trips.Trip date: timezone-aware, or naive server-local time)."""
+    now = datetime.now(trip_date.tzinfo)
+    delta = trip_date - now
+
+    if delta.total_seconds() <= 0:
+        return None  # Trip has started!
+
+    total_seconds = int(delta.total_seconds())
+
+    weeks = total_seconds // (7 * 24 * 3600)
+    remaining = total_seconds % (7 * 24 * 3600)
+
+    days = remaining // (24 * 3600)
+    remaining = remaining % (24 * 3600)
+
+    hours = remaining // 3600
+    remaining = remaining % 3600
+
+    minutes = remaining // 60
+    seconds = remaining % 60
+
+    return {
+        'total_seconds': total_seconds,
+        'weeks': weeks,
+        'days': days,
+        'hours': hours,
+        'minutes': minutes,
+        'seconds': seconds
+    }
+
+def countdown_target_ms(trip_date):
+    """Epoch milliseconds of trip_date (in its own timezone, or server-local
+    time if it is naive), which the
+    browser-side ticker counts down to. Fixed, so pages built from it at
+    different times come out identical."""
+    return int(trip_date.timestamp() * 1000)
+
+# -- Slideshow --
+
+def find_slide_images():
+    """The imageNN.jpg files that actually ship with the app, so gaps in the
+    numbering never turn into 404 requests."""
+    return sorted(f for f in os.listdir(APP_DIR) if re.fullmatch(r"image\d{2}\.jpg", f))
+
+# Seconds each slide is on screen (fadeInOut runs for one slot per slide)
+SLIDE_SECONDS = 5
+
+# Slides rendered with real URLs up front: the current one and the next.
+# The rest are loaded by SLIDESHOW_LOADER_JS just before their time slot.
+EAGER_SLIDES = 2
+
+# Responsive derivatives produced by build_images.py (optional)
+IMAGE_MANIFEST_PATH = os.path.join(APP_DIR, "static", "img", "manifest.json")
+
+# Rendered slide width: full width on mobile, capped at 800px on desktop
+SLIDE_SIZES = "(max-width: 768px) 100vw, 800px"
+
+def load_image_manifest():
+    """Load the derivative manifest, or an empty one if it hasn't been built."""
+    try:
+        with open(IMAGE_MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build_slide_html(filename, manifest, static_base, eager=True):
+    """Markup for one slide: a <picture> with AVIF/WebP/JPEG srcsets when
+    derivatives exist, otherwise the full-size original.
+
+    Derivatives are linked under static_base (the URL that serves static/).
+    Deferred slides (eager=False) carry data-src/data-srcset instead, so the
+    browser fetches nothing until SLIDESHOW_LOADER_JS promotes them.
+    """
+    attr = "" if eager else "data-"
+    entry = manifest.get(filename)
+    if not entry:
+        return f'<img {attr}src="{GITHUB_RAW_BASE}/{filename}" alt="" onerror="this.style.display=\'none\'">'
+
+    # Derivative paths are already content-hashed; the ?v= fingerprint also
+    # makes tornado-based Streamlit send a far-future Cache-Control header
+    def asset_url(path):
+        return f"{static_base}/{path}?v={entry['hash']}"
+
+    def srcset(variants):
+        return ", ".join(f"{asset_url(path)} {width}w" for width, path, _ in variants)
+
+    variants = entry["variants"]
+    slide = '<picture>'
+    for ext in ("avif", "webp"):
+        if variants.get(ext):
+            slide += f'<source type="image/{ext}" {attr}srcset="{srcset(variants[ext])}" sizes="{SLIDE_SIZES}">'
+    fallback_path = min(variants["jpg"], key=lambda v: abs(v[0] - 800))[1]
+    slide += (f'<img {attr}src="{asset_url(fallback_path)}" {attr}srcset="{srcset(variants["jpg"])}" '
+              f'sizes="{SLIDE_SIZES}" alt="" onerror="this.parentNode.style.display=\'none\'">')
+    slide += '</picture>'
+    return slide
+
+def build_slideshow_html(image_files, manifest, static_base):
+    """The slideshow container with one slide per image file."""
+    slides = (build_slide_html(filename, manifest, static_base, eager=i < EAGER_SLIDES)
+              for i, filename in enumerate(image_files))
+    return f'<div class="slideshow-container">{"".join(slides)}</div>'
+
+def build_slideshow_css(count):
+    """fadeInOut timing for however many slides exist: each slide fades in
+    over 1s, holds until the end of its SLIDE_SECONDS slot and fades out
+    over the first second of the next slot."""
+    cycle = count * SLIDE_SECONDS
+
+    def pct(seconds):
+        return f"{100 * seconds / cycle:.3f}%"
+
+    css = f'.slideshow-container > img, .slideshow-container > picture {{ animation-duration: {cycle}s; }}\n'
+    for i in range(count):
+        css += f'.slideshow-container > :nth-child({i + 1}) {{ animation-delay: {i * SLIDE_SECONDS}s; }}\n'
+    css += f"""@keyframes fadeInOut {{
+    0% {{ opacity: 0; }}
+    {pct(1)} {{ opacity: 1; }}
+    {pct(SLIDE_SECONDS)} {{ opacity: 1; }}
+    {pct(SLIDE_SECONDS + 1)} {{ opacity: 0; }}
+    100% {{ opacity: 0; }}
+}}
+"""
+    return css
+
+# -- Page sections --
+
+HEADER_HTML = '''<div class="mountain-emoji">🏔️⛷️🎿
+<svg width="64" height="64" viewBox="0 0 64 64" style="vertical-align: middle; margin-left: 5px;">
+  <!-- Wooden barrel base -->
+  <ellipse cx="32" cy="48" rx="28" ry="10" fill="#8B4513"/>
+  <rect x="4" y="28" width="56" height="20" fill="#CD853F"/>
+  <ellipse cx="32" cy="28" rx="28" ry="10" fill="#DEB887"/>
+  <!-- Water -->
+  <ellipse cx="32" cy="28" rx="24" ry="7" fill="#87CEEB"/>
+  <!-- Bubbles -->
+  <circle cx="20" cy="26" r="3" fill="white" opacity="0.8"/>
+  <circle cx="28" cy="24" r="2" fill="white" opacity="0.7"/>
+  <circle cx="38" cy="27" r="2.5" fill="white" opacity="0.8"/>
+  <circle cx="44" cy="25" r="2" fill="white" opacity="0.6"/>
+  <circle cx="24" cy="29" r="1.5" fill="white" opacity="0.7"/>
+  <circle cx="40" cy="30" r="1.5" fill="white" opacity="0.6"/>
+</svg>
+</div>'''
+
+# Precompiled templates for the repeated blocks; sections are assembled with
+# str.join rather than repeated += on a growing string
+TIME_UNIT_TEMPLATE = '''<div class="time-unit">
+    <div class="time-value" data-unit="{unit}">{value}</div>
+    <div class="time-label">{label}</div>
+</div>'''.format
+
+METRIC_TEMPLATE = '''<div class="snow-metric">
+    <div class="snow-metric-value"{style}>{value}</div>
+    <div class="snow-metric-label">{label}</div>
+</div>'''.format
+
+def build_trip_header_html(trip):
+    """Header icons, trip title and subtitle for a trips.Trip. The same for
+    every viewer of the trip, so it can be rendered once and shared."""
+    return (f'{HEADER_HTML}'
+            f'<h1 class="countdown-title">{html.escape(trip.title)}</h1>'
+            f'<p class="countdown-subtitle">Adventure begins: {trip.date:%B %-d, %Y}</p>')
+
+def build_trip_begun_html(trip):
+    """The note that replaces the countdown once the trip has started."""
+    return f'<div style="text-align:center; font-size:2rem; color:#2E7D32;">🎉 The trip has begun! Have an amazing time in {html.escape(trip.resort)}! 🎉</div>'
+
+def build_countdown_html(trip, countdown):
+    """Countdown boxes (always-horizontal flexbox), or the trip-has-begun
+    note once countdown is None. The only per-session part of the page."""
+    if countdown is None:
+        return build_trip_begun_html(trip)
+    # Seed the browser-side ticker with an absolute target timestamp, and
+    # give it the trip-has-begun note to swap in when that passes
+    return ''.join([
+        f'<template class="countdown-begun">{build_trip_begun_html(trip)}</template>',
+        f'<div class="countdown-flex" data-target="{countdown_target_ms(trip.date)}">',
+        TIME_UNIT_TEMPLATE(unit="weeks", value=countdown['weeks'], label="Weeks"),
+        TIME_UNIT_TEMPLATE(unit="days", value=countdown['days'], label="Days"),
+        TIME_UNIT_TEMPLATE(unit="hours", value=f"{countdown['hours']:02d}", label="Hours"),
+        TIME_UNIT_TEMPLATE(unit="minutes", value=f"{countdown['minutes']:02d}", label="Minutes"),
+        TIME_UNIT_TEMPLATE(unit="seconds", value=f"{countdown['seconds']:02d}", label="Seconds"),
+        '</div>',
+    ])
+
+def build_main_html(trip, countdown):
+    """Header icons, trip title and countdown boxes (or the trip-has-begun
+    note) for a trips.Trip."""
+    return build_trip_header_html(trip) + build_countdown_html(trip, countdown)
+
+def build_weather_html(conditions, base_depth):
+    """Weather sidebar metrics from the parsed Open-Meteo conditions (see
+    conditions.py) and the SnoCountry base depth, or an error note if there
+    are no conditions."""
+    if not conditions:
+        return '<div style="color: orange; text-align: center;">Unable to fetch snow conditions</div>'
+
+    parts = []
+    # Last updated badge
+    if conditions.updated_label:
+        parts.append(f'<div class="snow-updated-badge">Updated {conditions.updated_label}</div>')
+    parts.append(METRIC_TEMPLATE(style="", value=conditions.temperature_label, label="Current Temp"))
+    parts.append(METRIC_TEMPLATE(style=' style="font-size: 0.75rem;"', value=conditions.description,
+                                 label="Conditions"))
+    # Resort-reported snow base depth from SnoCountry
+    base_display = f'{base_depth}"' if base_depth is not None else "N/A"
+    parts.append(METRIC_TEMPLATE(style="", value=base_display, label="Snow Base"))
+    if conditions.snowfall_label:
+        parts.append(METRIC_TEMPLATE(style="", value=conditions.snowfall_label, label="7-Day Snow Forecast"))
+    parts.append(METRIC_TEMPLATE(style="", value=conditions.wind_label, label="Wind Speed"))
+    if conditions.high_low_label:
+        parts.append(METRIC_TEMPLATE(style="", value=conditions.high_low_label, label="High / Low Today"))
+    if conditions.powder_label:
+        parts.append(METRIC_TEMPLATE(style=' style="font-size: 0.9rem;"', value=conditions.powder_label,
+                                     label="Best Powder Day"))
+    return ''.join(parts)
+
+def build_layout_html(main_html, slideshow_html, weather_html):
+    """Mobile-first: main content (icons, title, countdown) then weather then
+    slideshow. Desktop: CSS grid repositions weather to left sidebar."""
+    return f'''
+<div class="layout-wrapper">
+    <div class="layout-main">
+        {main_html}
+        {slideshow_html}
+    </div>
+    <div class="layout-weather">
+        {weather_html}
+    </div>
+</div>
+'''
+
+# Snow effect, two ways:
+# - snow_html: one DOM node per flake, each with its own glyph, text-shadow
+#   and infinite keyframe animation, all composited every frame
+# - SNOWFALL_JS (below): every flake drawn on one canvas layer
+snow_html = '''
+<div class="snowflakes">
+    <div class="snowflake">❄</div>
+    <div class="snowflake">❅</div>
+    <div class="snowflake">❆</div>
+    <div class="snowflake">❄</div>
+    <div class="snowflake">❅</div>
+    <div class="snowflake">❆</div>
+    <div class="snowflake">❄</div>
+    <div class="snowflake">❅</div>
+    <div class="snowflake">❆</div>
+    <div class="snowflake">❄</div>
+    <div class="snowflake">❅</div>
+    <div class="snowflake">❆</div>
+    <div class="snowflake">❄</div>
+    <div class="snowflake">❅</div>
+    <div class="snowflake">❆</div>
+    <div class="snowflake">❄</div>
+    <div class="snowflake">❅</div>
+    <div class="snowflake">❆</div>
+    <div class="snowflake">❄</div>
+    <div class="snowflake">❅</div>
+</div>
+'''
+
+# SNOWFALL_JS settings: flakes at most, the per-frame drawing time it
+# adapts the flake count to (milliseconds), and its frame rate cap
+SNOW_PARTICLES = 40
+SNOW_MIN_PARTICLES = 8
+SNOW_FRAME_BUDGET_MS = 4
+SNOW_FPS = 30
+
+# Stylesheet for the whole page (also usable by static pages built from it)
+STYLESHEET_PATH = os.path.join(APP_DIR, "static", "style.css")
+
+def minify_css(css):
+    """Strip comments and collapse whitespace; keeps the wire size down."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    return css.replace(": ", ":").strip()
+
+# Daily link-preview images rendered by og_image.py (optional), and the
+# static image used for a trip that has none yet
+OG_IMAGE_DIR = os.path.join(APP_DIR, "static", "og")
+OG_MANIFEST_PATH = os.path.join(OG_IMAGE_DIR, "manifest.json")
+PREVIEW_IMAGE_URL = f"{GITHUB_RAW_BASE}/preview.png"
+
+def load_og_manifest():
+    """Load the preview image manifest, or an empty one if none has been
+    rendered."""
+    try:
+        with open(OG_MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def og_image_url(slug, manifest, static_url):
+    """Absolute URL of a trip's latest preview image, given the absolute URL
+    that serves static/; PREVIEW_IMAGE_URL if it has none."""
+    entry = manifest.get(slug)
+    return f"{static_url}/{entry['path']}" if entry else PREVIEW_IMAGE_URL
+
+def build_og_meta(trip, image_url, page_url=None):
+    """Open Graph and Twitter card tags for a trip's page."""
+    title = html.escape(f"{trip.title} 🏔️")
+    description = html.escape(f"Counting down to our ski adventure in {trip.resort} - {trip.date:%B %-d, %Y}!")
+    image_url = html.escape(image_url)
+    url_tag = f'\n<meta property="og:url" content="{html.escape(page_url)}" />' if page_url else ""
+    return f"""
+<meta property="og:title" content="{title}" />
+<meta property="og:description" content="{description}" />
+<meta property="og:image" content="{image_url}" />
+<meta property="og:image:width" content="1200" />
+<meta property="og:image:height" content="630" />
+<meta property="og:type" content="website" />{url_tag}
+<meta name="twitter:card" content="summary_large_image" />
+<meta name="twitter:title" content="{title}" />
+<meta name="twitter:description" content="{description}" />
+<meta name="twitter:image" content="{image_url}" />
+"""
+
+# The app's static chrome (minified styles), prebuilt
+# by build_chrome.py so a cold start reads one file instead of building it
+CHROME_PATH = os.path.join(APP_DIR, "static", "chrome.html")
+
+def chrome_digest(image_count):
+    """Fingerprint of what the chrome is built from: the stylesheet, the
+    slideshow CSS for image_count slides and the code that assembles and
+    minifies them, so edits elsewhere in this module keep the prebuilt file."""
+    digest = hashlib.sha256()
+    with open(STYLESHEET_PATH, "rb") as f:
+        digest.update(f.read())
+    digest.update(build_slideshow_css(image_count).encode())
+    for builder in (build_static_chrome, minify_css):
+        digest.update(inspect.getsource(builder).encode())
+    return digest.hexdigest()[:16]
+
+def build_static_chrome(image_count):
+    """The page's styles as one <style> tag."""
+    with open(STYLESHEET_PATH) as f:
+        css = f.read()
+    css += build_slideshow_css(image_count)
+    return f"<style>{minify_css(css)}</style>"
+
+def load_static_chrome(image_count):
+    """The prebuilt chrome from CHROME_PATH if it matches the current
+    sources, otherwise build it on the spot."""
+    try:
+        with open(CHROME_PATH, encoding="utf-8") as f:
+            header, _, chrome = f.read().partition("\n")
+        if header == f"<!-- chrome {chrome_digest(image_count)} -->":
+            return chrome
+    except OSError:
+        pass
+    return build_static_chrome(image_count)
+
+def write_static_chrome(image_count):
+    """Prebuild CHROME_PATH for load_static_chrome()."""
+    chrome = build_static_chrome(image_count)
+    tmp_path = CHROME_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"<!-- chrome {chrome_digest(image_count)} -->\n{chrome}")
+    os.replace(tmp_path, CHROME_PATH)
+
+# -- Browser-side scripts --
+# They reach into window.parent.document, so they work wherever they run:
+# in the live app each is a components.v2 module in the page itself (see
+# script_component in crested_butte_countdown.py; st.markdown strips
+# <script> tags), and on a static page an inline <script>. Either way
+# window.parent is the page.
+
+# Ticks the countdown boxes in the browser once a second so the server only
+# reruns when the weather is due to refresh, and shows the trip-has-begun
+# note when it reaches zero without going back to the server.
+COUNTDOWN_TICKER_JS = """
+<script>
+(function () {
+    const doc = window.parent.document;
+    const pad = (n) => String(n).padStart(2, "0");
+    function tick() {
+        const box = doc.querySelector(".countdown-flex[data-target]");
+        if (!box) return;
+        let remaining = Math.floor((Number(box.dataset.target) - Date.now()) / 1000);
+        if (remaining <= 0) {
+            // Trip has started: swap in the note here rather than reloading,
+            // since a static page (or a server whose clock is behind) would
+            // only serve the countdown again
+            const begun = doc.querySelector("template.countdown-begun");
+            if (begun) box.replaceWith(begun.content.cloneNode(true));
+            else box.removeAttribute("data-target");
+            return;
+        }
+        const values = {};
+        values.weeks = Math.floor(remaining / 604800);
+        remaining %= 604800;
+        values.days = Math.floor(remaining / 86400);
+        remaining %= 86400;
+        values.hours = pad(Math.floor(remaining / 3600));
+        remaining %= 3600;
+        values.minutes = pad(Math.floor(remaining / 60));
+        values.seconds = pad(remaining % 60);
+        for (const [unit, value] of Object.entries(values)) {
+            const el = box.querySelector(`[data-unit="${unit}"]`);
+            if (el && el.textContent !== String(value)) el.textContent = value;
+        }
+    }
+    tick();
+    setInterval(tick, 1000);
+})();
+</script>
+"""
+
+# Loads each deferred slide when the slide before it starts its fadeInOut
+# slot, so the browser only ever fetches the current and next photo instead
+# of all of them at once. animationstart fires once per slide after its
+# animation-delay; listening on the parent document survives re-renders, so
+# the listener is only added once per page.
+SLIDESHOW_LOADER_JS = """
+<script>
+(function () {
+    const win = window.parent;
+    if (win.__slideLoader) return;
+    win.__slideLoader = true;
+    const doc = win.document;
+    function promote(slide) {
+        if (!slide) return;
+        slide.querySelectorAll("[data-src], [data-srcset]").forEach((el) => {
+            if (el.dataset.srcset) el.srcset = el.dataset.srcset;
+            if (el.dataset.src) el.src = el.dataset.src;
+            delete el.dataset.srcset;
+            delete el.dataset.src;
+        });
+        if (slide.dataset && slide.dataset.src) {
+            slide.src = slide.dataset.src;
+            delete slide.dataset.src;
+        }
+    }
+    doc.addEventListener("animationstart", (event) => {
+        if (event.animationName !== "fadeInOut") return;
+        const slide = event.target;
+        if (!slide.parentElement || !slide.parentElement.classList.contains("slideshow-container")) return;
+        promote(slide.nextElementSibling);
+    }, true);
+})();
+</script>
+"""
+
+# The canvas renderer. The wrapper starts it once per page by injecting it
+# into the page itself, so the animation outlives whatever element it
+# arrived in. Flakes match the "css" renderer (glyphs,
+# glow, 8-15s falls with a full turn, fading out), but each glyph and its
+# glow is drawn once into a sprite and frames only blit sprites, on a frame
+# loop that
+# - stops while the tab is hidden and, with prefers-reduced-motion, entirely
+# - caps the frame rate at config.fps
+# - sheds flakes while drawing a frame takes longer than config.budgetMs on
+#   average, and adds them back once it is well under
+# window.snowfall exposes the current flake count and frame cost.
+SNOWFALL_JS_TEMPLATE = """
+<script>
+(function () {
+    const win = window.parent;
+    if (win.snowfall) return;
+    win.snowfall = {active: 0, cost: 0, frames: 0};
+    const script = win.document.createElement("script");
+    script.textContent = "(" + run.toString() + ")(" + JSON.stringify(__CONFIG__) + ");";
+    win.document.body.appendChild(script);
+
+    function run(config) {
+        const stats = window.snowfall;
+        const canvas = document.createElement("canvas");
+        canvas.className = "snow-canvas";
+        canvas.setAttribute("aria-hidden", "true");
+        document.body.appendChild(canvas);
+        const ctx = canvas.getContext("2d");
+        const reducedMotion = window.matchMedia("(prefers-reduced-motion: reduce)");
+
+        const SPRITE = 64;
+        const sprites = ["\u2744", "\u2745", "\u2746"].map((glyph) => {
+            const sprite = document.createElement("canvas");
+            sprite.width = sprite.height = SPRITE;
+            const g = sprite.getContext("2d");
+            g.font = `${SPRITE * 0.6}px sans-serif`;
+            g.textAlign = "center";
+            g.textBaseline = "middle";
+            g.fillStyle = "white";
+            g.shadowColor = "rgba(255, 255, 255, 0.8)";
+            g.shadowBlur = 5;
+            g.fillText(glyph, SPRITE / 2, SPRITE / 2);
+            return sprite;
+        });
+
+        // x is a fraction of the width and progress of the fall, so a
+        // resize never bunches the flakes up
+        function spawn(flake, anywhere) {
+            flake.x = Math.random();
+            flake.progress = anywhere ? Math.random() : 0;
+            flake.seconds = 8 + Math.random() * 7;
+            flake.size = 24 * (1 + Math.random() * 1.1);
+            flake.sprite = sprites[Math.floor(Math.random() * sprites.length)];
+            return flake;
+        }
+        const flakes = Array.from({length: config.particles}, () => spawn({}, true));
+        stats.active = flakes.length;
+
+        let width = 0, height = 0, scale = 1;
+        function resize() {
+            scale = Math.min(window.devicePixelRatio || 1, 2);
+            width = window.innerWidth;
+            height = window.innerHeight;
+            canvas.width = Math.round(width * scale);
+            canvas.height = Math.round(height * scale);
+        }
+
+        function draw(dt) {
+            ctx.setTransform(1, 0, 0, 1, 0, 0);
+            ctx.clearRect(0, 0, canvas.width, canvas.height);
+            for (let i = 0; i < stats.active; i++) {
+                const flake = flakes[i];
+                flake.progress += dt / flake.seconds;
+                if (flake.progress >= 1) spawn(flake, false);
+                const angle = flake.progress * 2 * Math.PI;
+                const cos = Math.cos(angle) * scale, sin = Math.sin(angle) * scale;
+                ctx.globalAlpha = 0.8 * (1 - 0.7 * flake.progress);
+                ctx.setTransform(cos, sin, -sin, cos, flake.x * width * scale,
+                                 (flake.progress * (height + SPRITE) - SPRITE / 2) * scale);
+                ctx.drawImage(flake.sprite, -flake.size / 2, -flake.size / 2, flake.size, flake.size);
+            }
+        }
+
+        let handle = 0, last = 0;
+        function frame(now) {
+            handle = window.requestAnimationFrame(frame);
+            if (now - last < 1000 / config.fps - 2) return;
+            const dt = Math.min((now - last) / 1000, 0.1);
+            last = now;
+            const start = performance.now();
+            draw(dt);
+            stats.cost = stats.cost * 0.9 + (performance.now() - start) * 0.1;
+            if (++stats.frames % config.fps === 0) {
+                if (stats.cost > config.budgetMs) {
+                    stats.active = Math.max(config.minParticles, Math.floor(stats.active * 0.75));
+                } else if (stats.cost < config.budgetMs / 2) {
+                    stats.active = Math.min(flakes.length, stats.active + 2);
+                }
+            }
+        }
+
+        function update() {
+            const running = !document.hidden && !reducedMotion.matches;
+            if (running && !handle) {
+                last = performance.now();
+                handle = window.requestAnimationFrame(frame);
+            } else if (!running && handle) {
+                window.cancelAnimationFrame(handle);
+                handle = 0;
+            }
+            canvas.hidden = reducedMotion.matches;
+        }
+
+        resize();
+        window.addEventListener("resize", resize);
+        document.addEventListener("visibilitychange", update);
+        reducedMotion.addEventListener("change", update);
+        update();
+    }
+})();
+</script>
+"""
+
+def build_snowfall_js(particles=SNOW_PARTICLES, min_particles=SNOW_MIN_PARTICLES,
+                      budget_ms=SNOW_FRAME_BUDGET_MS, fps=SNOW_FPS):
+    """The canvas snow renderer with the given settings."""
+    config = {"particles": particles, "minParticles": min(min_particles, particles),
+              "budgetMs": budget_ms, "fps": fps}
+    return SNOWFALL_JS_TEMPLATE.replace("__CONFIG__", json.dumps(config))
+
+SNOWFALL_JS = build_snowfall_js()
+
+# Reports the tab's page visibility to the live app as an st.components.v2
+# module (it runs in the app page itself; see sessions.py). A tab reports
+# hidden once it has been in the background for data.hiddenAfterMs, and
+# visible again as soon as it is shown, which reruns the script for a
+# catch-up render. A tab that was hidden for data.evictAfterMs or longer
+# may have had its session closed by the server, so it reloads instead.
+TAB_VISIBILITY_JS = """
+// Module scope, so it survives the component remounting
+let hiddenSince = null;
+let reportedHidden = false;
+let timer = 0;
+
+export default function (component) {
+    const {data, setStateValue} = component;
+    function update() {
+        clearTimeout(timer);
+        if (document.hidden) {
+            if (hiddenSince === null) hiddenSince = Date.now();
+            if (!reportedHidden) {
+                timer = setTimeout(() => {
+                    reportedHidden = true;
+                    setStateValue("visible", false);
+                }, data.hiddenAfterMs);
+            }
+            return;
+        }
+        const hiddenFor = hiddenSince === null ? 0 : Date.now() - hiddenSince;
+        hiddenSince = null;
+        if (!reportedHidden) return;
+        reportedHidden = false;
+        if (hiddenFor >= data.evictAfterMs) {
+            window.location.reload();
+        } else {
+            setStateValue("visible", true);
+        }
+    }
+    document.addEventListener("visibilitychange", update);
+    if (document.hidden) update();
+    return () => {
+        document.removeEventListener("visibilitychange", update);
+        clearTimeout(timer);
+    };
+}
+"""
@@ -0,0 +1,209 @@
+"""Day-by-day powder outlook computed from Open-Meteo's hourly forecast.
+
+Open-Meteo is asked for hourly snowfall, temperature and wind over the whole
+forecast window (FORECAST_DAYS). forecast_many() turns the hourly series of
+every location in a fetched batch into one (locations, days, 24) array per
+variable and computes everything with vectorized NumPy operations, so
+scoring a batch of resorts costs a handful of array passes rather than a
+Python loop per hour:
+
+- daily snowfall, high, low and peak wind
+- the snow that fell in the 24 hours before the lifts open each morning
+- a 0-1 snow quality from the temperature and wind it fell in (cold, calm
+  snow skis lighter than warm or wind-packed snow)
+- a 0-100 powder score per day from that fresh snow and its quality, and
+  the best day in the window
+
+The result is a small PowderForecast of per-day numbers that rides along in
+Conditions, so it is cached and shared with the rest of the snapshot.
+NumPy is only imported when a forecast is computed.
+"""
+from dataclasses import astuple, dataclass
+from datetime import date, timedelta
+
+# Days of hourly forecast requested from Open-Meteo: the week the sidebar
+# shows. Open-Meteo offers up to 16, but every extra day is refetched with
+# the current conditions each hour (SOURCE_TTLS)
+FORECAST_DAYS = 7
+
+# Hourly variables requested, in the order forecast_many() reads them
+HOURLY_VARIABLES = ("snowfall", "temperature_2m", "wind_speed_10m")
+
+# Hour the lifts open; a day's fresh snow is what fell in the 24 hours before
+LIFTS_OPEN_HOUR = 9
+
+# Fresh snow (inches) at which the depth part of the score reaches ~63%;
+# the score saturates rather than growing without bound
+POWDER_DEPTH = 6.0
+
+# Snow falling at or above WARM_F (°F) counts as heavy; at WARM_F - COLD_SPAN
+# and below, as light. Wind above CALM_MPH starts packing it, fully at
+# CALM_MPH + WIND_SPAN.
+WARM_F = 34.0
+COLD_SPAN = 20.0
+CALM_MPH = 15.0
+WIND_SPAN = 25.0
+
+
+@dataclass(frozen=True, slots=True)
+class PowderDay:
+    """Forecast for one day at one location.
+
+    ``quality`` is None on days with no fresh snow to judge.
+    """
+    date: str
+    snowfall: float
+    fresh_snow: float
+    high: float
+    low: float
+    wind_max: float
+    quality: float
+    score: int
+
+    @property
+    def quality_label(self):
+        if self.quality is None:
+            return None
+        if self.quality >= 0.75:
+            return "Light & dry"
+        if self.quality >= 0.45:
+            return "Medium"
+        return "Heavy or wind-packed"
+
+
+@dataclass(frozen=True, slots=True)
+class PowderForecast:
+    """Day-by-day powder outlook for one location; ``best`` is the index of
+    the highest-scoring day in ``days``, or None if no day scores."""
+    days: tuple
+    best: int
+
+    @property
+    def best_day(self):
+        return self.days[self.best] if self.best is not None else None
+
+    def to_dict(self):
+        return {
+            "days": [list(astuple(day)) for day in self.days],
+            "best": self.best,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict(); raises TypeError for anything else."""
+        if not isinstance(data, dict):
+            raise TypeError("PowderForecast.from_dict expects a dict")
+        try:
+            return cls(days=tuple(PowderDay(*day) for day in data["days"]), best=data["best"])
+        except KeyError as exc:
+            raise TypeError(f"PowderForecast.from_dict missing {exc}") from None
+
+
+def score_days(snowfall, temperature, wind):
+    """Per-day aggregates and powder scores for arrays of hourly values.
+
+    Each argument is a (locations, hours) array starting at local midnight;
+    missing values are NaN and trailing hours past the last whole day are
+    ignored. Returns a dict of (locations, days) arrays: snowfall, fresh,
+    high, low, wind_max, quality (NaN without fresh snow) and score, plus
+    best, a (locations,) array of day indexes (-1 where nothing scores).
+    """
+    import numpy as np
+
+    locations, hours = snowfall.shape
+    days = hours // 24
+    hours = days * 24
+    snow = np.nan_to_num(snowfall[:, :hours])
+    temp = temperature[:, :hours]
+    wind = wind[:, :hours]
+
+    by_day = (locations, days, 24)
+    daily_snow = snow.reshape(by_day).sum(axis=2)
+    # fmax/fmin skip NaN hours (and give NaN only for a day with no data)
+    high = np.fmax.reduce(temp.reshape(by_day), axis=2)
+    low = np.fmin.reduce(temp.reshape(by_day), axis=2)
+    wind_max = np.fmax.reduce(wind.reshape(by_day), axis=2)
+
+    # Quality of each hour's snow; unknown weather counts as middling
+    cold = np.clip((WARM_F - temp) / COLD_SPAN, 0.0, 1.0)
+    calm = np.clip(1.0 - (wind - CALM_MPH) / WIND_SPAN, 0.0, 1.0)
+    hourly_quality = np.nan_to_num(cold * calm, nan=0.5)
+
+    # Fresh snow per morning as a difference of running totals over the 24
+    # hours up to LIFTS_OPEN_HOUR (the first morning only sees its own hours)
+    zeros = np.zeros((locations, 1))
+    total = np.concatenate([zeros, snow.cumsum(axis=1)], axis=1)
+    weighted = np.concatenate([zeros, (snow * hourly_quality).cumsum(axis=1)], axis=1)
+    ends = np.arange(days) * 24 + LIFTS_OPEN_HOUR
+    starts = np.clip(ends - 24, 0, None)
+    fresh = total[:, ends] - total[:, starts]
+    has_snow = fresh > 0.005
+    quality = np.divide(weighted[:, ends] - weighted[:, starts], fresh,
+                        out=np.full(fresh.shape, np.nan), where=has_snow)
+
+    depth = 1.0 - np.exp(-np.where(has_snow, fresh, 0.0) / POWDER_DEPTH)
+    score = np.rint(100 * depth * np.nan_to_num(quality)).astype(int)
+    best = np.where(score.max(axis=1) > 0, score.argmax(axis=1), -1)
+    return {
+        "snowfall": daily_snow, "fresh": fresh, "high": high, "low": low,
+        "wind_max": wind_max, "quality": quality, "score": score, "best": best,
+    }
+
+
+def _hourly(payload):
+    """The payload's hourly series if it has every variable and at least one
+    whole day of them, else None."""
+    hourly = payload.get("hourly") or {}
+    if not hourly.get("time") or len(hourly["time"]) < 24:
+        return None
+    if any(len(hourly.get(name) or ()) != len(hourly["time"]) for name in HOURLY_VARIABLES):
+        return None
+    return hourly
+
+
+def _value(x, digits):
+    """Round a NumPy scalar into a plain float, or None for NaN."""
+    return None if x != x else round(float(x), digits)
+
+
+def forecast_many(payloads):
+    """PowderForecast for each Open-Meteo location payload (None for one
+    without usable hourly data), scoring all same-length payloads in one
+    vectorized pass."""
+    import numpy as np
+
+    results = [None] * len(payloads)
+    groups = {}
+    for i, payload in enumerate(payloads):
+        hourly = _hourly(payload)
+        if hourly is not None:
+            groups.setdefault(len(hourly["time"]), []).append(i)
+
+    for indexes in groups.values():
+        # Missing (null) values become NaN under dtype=float
+        arrays = [np.array([payloads[i]["hourly"][name] for i in indexes], dtype=float)
+                  for name in HOURLY_VARIABLES]
+        scored = score_days(*arrays)
+        for row, i in enumerate(indexes):
+            first = date.fromisoformat(payloads[i]["hourly"]["time"][0][:10])
+            days = tuple(
+                PowderDay(
+                    date=(first + timedelta(days=d)).isoformat(),
+                    snowfall=_value(scored["snowfall"][row, d], 2),
+                    fresh_snow=_value(scored["fresh"][row, d], 2),
+                    high=_value(scored["high"][row, d], 1),
+                    low=_value(scored["low"][row, d], 1),
+                    wind_max=_value(scored["wind_max"][row, d], 1),
+                    quality=_value(scored["quality"][row, d], 2),
+                    score=int(scored["score"][row, d]),
+                )
+                for d in range(scored["score"].shape[1])
+            )
+            best = int(scored["best"][row])
+            results[i] = PowderForecast(days=days, best=best if best >= 0 else None)
+    return results
+
+
+def forecast(payload):
+    """PowderForecast for one Open-Meteo location payload, or None."""
+    return forecast_many([payload])[0]
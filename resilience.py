@@ -0,0 +1,102 @@
+"""Retry and circuit-breaker helpers for the upstream weather APIs.
+
+Both run on the weather refresher's worker threads, never on a render
+thread, so backing off or waiting out an open circuit never holds up a page.
+"""
+import random
+import threading
+import time
+from collections import Counter
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls raise CircuitOpenError without touching the network. Once
+    ``reset_timeout`` seconds have passed a single trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    ``transitions`` counts every (from_state, to_state) change for metrics.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.transitions = Counter()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.transitions[(self.state, state)] += 1
+            self.state = state
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.time() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError(f"{self.name} circuit is half-open")
+                self._trial_in_flight = True
+
+    def _after_call(self, ok):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok:
+                self._failures = 0
+                self._set_state(CLOSED)
+                return
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.time()
+                self._set_state(OPEN)
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn through the breaker, recording success or failure."""
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._after_call(ok=False)
+            raise
+        self._after_call(ok=True)
+        return result
+
+
+def call_with_retries(fn, attempts=3, base_delay=1.0, max_delay=8.0, deadline=None):
+    """Call fn, retrying failures with full-jitter exponential backoff.
+
+    Sleeps a random 0..min(max_delay, base_delay * 2**attempt) seconds
+    between attempts, so many callers retrying at once spread out instead
+    of hitting the upstream in lockstep. No retry is started if its backoff
+    would run past ``deadline`` (an absolute time.time() value). The last
+    exception is re-raised when every attempt fails; CircuitOpenError is
+    never retried.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except CircuitOpenError:
+            raise
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            if deadline is not None and time.time() + delay >= deadline:
+                raise
+            time.sleep(delay)
@@ -0,0 +1,111 @@
+"""Which viewers are looking at the countdown, and reclaiming the sessions of
+tabs left open in the background.
+
+People leave the countdown open in background tabs for days. The countdown
+itself ticks in the browser, but every open tab holds a Streamlit session,
+and the render_page fragment's run_every timer reruns it on the server
+every WEATHER_REFRESH_SECONDS. Each tab reports its page visibility (see
+page.TAB_VISIBILITY_JS): after HIDDEN_AFTER_SECONDS in the background it
+reports hidden and the app drops the tab's refresh timer; when it is shown
+again it reports visible and gets an immediate catch-up render.
+
+SessionTracker records what each session last reported. Its reaper thread
+closes sessions that have been hidden for longer than IDLE_EVICT_SECONDS
+and forgets sessions that ended on their own. A tab shown again after that
+long reloads itself into a new session instead of talking to the closed one.
+"""
+import os
+import threading
+import time
+
+import metrics
+
+# Seconds a tab must stay in the background before it reports hidden, so
+# switching tabs back and forth doesn't cost a rerun each time
+HIDDEN_AFTER_SECONDS = 60
+
+# Seconds a tab may stay hidden before its session is closed. A tab counts
+# from when it went to the background and the server from when the report
+# arrived, so a tab always sees at least as long a wait as the server and
+# knows to reload whenever its session may have been closed.
+IDLE_EVICT_SECONDS = float(os.environ.get("COUNTDOWN_IDLE_EVICT_SECONDS", 6 * 3600))
+
+
+class SessionTracker:
+    """Visibility of every session that has reported it, plus a daemon
+    thread that closes sessions hidden for longer than ``evict_after``.
+
+    ``close(session_id)`` shuts a session down; ``is_alive(session_id)``
+    tells whether it is still connected, so sessions that ended on their
+    own are forgotten. Without them the tracker only keeps count.
+    """
+
+    def __init__(self, evict_after=IDLE_EVICT_SECONDS, close=None, is_alive=None):
+        self.evict_after = evict_after
+        # Check often enough that a session outlives its deadline by at most
+        # a tenth of it (and at most a minute)
+        self.reap_interval = max(1.0, min(60.0, evict_after / 10))
+        self._close = close
+        self._is_alive = is_alive
+        self._hidden_since = {}  # session id -> time it reported hidden, None while visible
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def report(self, session_id, visible):
+        """Record a session's visibility as of this script run."""
+        with self._lock:
+            was_hidden = self._hidden_since.get(session_id) is not None
+            if visible:
+                self._hidden_since[session_id] = None
+            elif not was_hidden:
+                self._hidden_since[session_id] = time.monotonic()
+        if was_hidden and visible:
+            metrics.inc("session_resumes_total", doc="Hidden tabs shown again")
+        elif not was_hidden and not visible:
+            metrics.inc("session_suspends_total", doc="Tabs that went to the background")
+
+    def counts(self):
+        """(active, suspended) numbers of tracked sessions."""
+        with self._lock:
+            suspended = sum(since is not None for since in self._hidden_since.values())
+            return len(self._hidden_since) - suspended, suspended
+
+    def reap(self):
+        """Close sessions hidden past the deadline and forget ended ones;
+        returns the ids of the closed sessions."""
+        deadline = time.monotonic() - self.evict_after
+        expired = []
+        with self._lock:
+            for session_id, since in list(self._hidden_since.items()):
+                if self._is_alive is not None and not self._is_alive(session_id):
+                    del self._hidden_since[session_id]
+                elif since is not None and since <= deadline and self._close is not None:
+                    del self._hidden_since[session_id]
+                    expired.append(session_id)
+        for session_id in expired:
+            self._close(session_id)
+            metrics.inc("sessions_evicted_total", doc="Sessions closed after staying hidden too long")
+        return expired
+
+    def start(self):
+        """Start the reaper thread and export the counts as the
+        sessions{state=...} gauge; safe to call more than once."""
+        if self._thread is None:
+            metrics.register_gauges(self._gauges)
+            self._thread = threading.Thread(target=self._run, name="session-reaper", daemon=True)
+            self._thread.start()
+        return self
+
+    def _gauges(self):
+        active, suspended = self.counts()
+        yield "sessions", {"state": "active"}, active
+        yield "sessions", {"state": "suspended"}, suspended
+
+    def _run(self):
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap()
+            except Exception:
+                pass  # Never let one bad pass kill the thread
+
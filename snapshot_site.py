@@ -0,0 +1,225 @@
+"""Write a fully static snapshot of the countdown page.
+
+Renders the countdown, current weather and slideshow with the same code as
+the live app (page.py) into a plain index.html plus a snapshot.json, so
+link previews, crawlers and first paint are served at static-file speed
+instead of each spinning up a Streamlit session. The countdown keeps ticking
+in the browser; the live app only loads once the visitor clicks, taps or
+presses a key on the page.
+
+Run it on a schedule wherever the static site is published from (GitHub
+Pages serves the repo root):
+
+    python snapshot_site.py                 # write index.html + snapshot.json once
+    python snapshot_site.py --every 1800    # keep rewriting them every 30 minutes
+
+Files are only rewritten when their content changes, so between weather
+updates the output stays byte-identical. Each run also saves the app's
+weather_snapshot.json, which the live app publishes on a cold start while
+its first refresh is still in flight, and, where Pillow is installed, the
+first run of each day renders that day's link-preview image into static/og/
+(see og_image.py), which both index.html and the live app point at.
+"""
+import argparse
+import html
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import trips
+from conditions import summarize_weather
+from page import (
+    APP_DIR, COUNTDOWN_TICKER_JS, PREVIEW_IMAGE_URL, SLIDESHOW_LOADER_JS, SNOWFALL_JS,
+    STYLESHEET_PATH, build_layout_html, build_main_html, build_og_meta, build_slideshow_css,
+    build_slideshow_html, build_weather_html, calculate_countdown, countdown_target_ms,
+    find_slide_images, load_image_manifest, minify_css,
+)
+from snow_history import open_shared_history
+from weather import WEATHER_SNAPSHOT_PATH, WeatherRefresher
+from weather_cache import open_shared_cache
+
+# The Streamlit app visitors are sent to once they interact with the page
+LIVE_APP_URL = "https://cb26countdown.streamlit.app"
+
+# Public URL of the static site
+SITE_URL = "https://weljim73-spec.github.io/crestedbutte2026countdown/"
+
+# Page-level styles the Streamlit theme normally provides
+LANDING_CSS = """
+body { margin: 0; padding: 1rem; font-family: "Source Sans Pro", -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; color: #31333F; background: #fff; cursor: pointer; }
+.live-link { display: block; margin: 1.5rem auto; text-align: center; color: #1E88E5; font-weight: 600; }
+"""
+
+
+# Hands the visitor over to the live app on their first click, tap or key
+# press, and warms up the connection to it as soon as they show intent
+LIVE_APP_LOADER_JS = """
+<script>
+(function () {
+    const url = document.querySelector(".live-link").href;
+    let warmed = false;
+    function warm() {
+        if (warmed) return;
+        warmed = true;
+        const link = document.createElement("link");
+        link.rel = "preconnect";
+        link.href = url;
+        document.head.appendChild(link);
+    }
+    function go(event) {
+        if (event.type === "keydown" && (event.metaKey || event.ctrlKey || event.altKey)) return;
+        window.location.href = url;
+    }
+    ["pointerover", "touchstart", "focusin"].forEach((type) =>
+        document.addEventListener(type, warm, { once: true, passive: true }));
+    document.addEventListener("click", go);
+    document.addEventListener("keydown", go);
+})();
+</script>
+"""
+
+
+def fetch_weather(hosted_trips):
+    """Latest {slug: WeatherSnapshot} for every hosted trip, from the shared
+    cache when it is fresh. Uses the app's cache file, so a snapshot taken
+    next to a running app reuses its payloads instead of calling the
+    upstream APIs again, and refreshes the app's warm-start snapshot."""
+    refresher = WeatherRefresher(interval=1800, trips=hosted_trips, cache=open_shared_cache(),
+                                 history=open_shared_history(),
+                                 snapshot_path=WEATHER_SNAPSHOT_PATH)
+    return refresher.refresh()
+
+
+def publish_preview(trip, conditions, base_depth):
+    """Absolute URL of the trip's preview image for today, rendering it
+    first if this is the day's first snapshot (see og_image.py). Falls back
+    to the static preview.png where Pillow isn't installed."""
+    try:
+        import og_image
+    except ImportError:
+        return PREVIEW_IMAGE_URL
+    return f"{SITE_URL}static/{og_image.write_preview(trip, conditions, base_depth)}"
+
+
+def build_snapshot(trip, conditions, base_depth, static_base="static",
+                   preview_url=PREVIEW_IMAGE_URL):
+    """Return (index_html, snapshot_dict) for a trip and its weather.
+
+    static_base is the URL of the repo's static/ directory as seen from the
+    published index.html; preview_url the absolute URL of its link-preview
+    image.
+    """
+    countdown = calculate_countdown(trip.date)
+    image_files = find_slide_images()
+    manifest = load_image_manifest()
+
+    with open(STYLESHEET_PATH) as f:
+        css = f.read()
+    css += build_slideshow_css(len(image_files)) + LANDING_CSS
+
+    layout_html = build_layout_html(
+        build_main_html(trip, countdown),
+        build_slideshow_html(image_files, manifest, static_base),
+        build_weather_html(conditions, base_depth),
+    )
+    live_url = f"{LIVE_APP_URL}/?trip={trip.slug}"
+    scripts = "\n".join(js.strip() for js in (SLIDESHOW_LOADER_JS, LIVE_APP_LOADER_JS, SNOWFALL_JS))
+    if countdown is not None:
+        scripts += "\n" + COUNTDOWN_TICKER_JS.strip()
+
+    index_html = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(trip.title)}</title>
+{build_og_meta(trip, preview_url, SITE_URL).strip()}
+<style>{minify_css(css)}</style>
+</head>
+<body>
+{layout_html.strip()}
+<a class="live-link" href="{html.escape(live_url)}">Open the live countdown →</a>
+{scripts}
+</body>
+</html>
+"""
+    snapshot = {
+        "trip": trip.slug,
+        "trip_date": trip.date.isoformat(),
+        "target_ms": countdown_target_ms(trip.date) if countdown is not None else None,
+        "weather": summarize_weather(conditions, base_depth),
+        "slides": image_files,
+        "live_app_url": live_url,
+        "preview_image": preview_url,
+    }
+    return index_html, snapshot
+
+
+def write_if_changed(path, text):
+    """Atomically replace path with text unless it already holds it."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_snapshot(trip, hosted_trips, out_dir, static_base):
+    # Every hosted trip is refreshed in the same batched requests, so a
+    # snapshot keeps the shared cache warm for all of them
+    weather = fetch_weather(hosted_trips.values())[trip.slug]
+    preview_url = publish_preview(trip, weather.conditions, weather.base_depth)
+    index_html, snapshot = build_snapshot(trip, weather.conditions, weather.base_depth,
+                                          static_base, preview_url)
+    changed = write_if_changed(os.path.join(out_dir, "index.html"), index_html)
+    # generated_at is left out of the comparison so an unchanged snapshot
+    # is not rewritten just because time has passed
+    json_path = os.path.join(out_dir, "snapshot.json")
+    try:
+        with open(json_path) as f:
+            previous = json.load(f)
+        previous.pop("generated_at", None)
+    except (OSError, ValueError):
+        previous = None
+    if previous != snapshot:
+        snapshot["generated_at"] = datetime.now().isoformat(timespec="seconds")
+        write_if_changed(json_path, json.dumps(snapshot, indent=2, ensure_ascii=False) + "\n")
+        changed = True
+    status = "updated" if changed else "unchanged"
+    stale = " (weather stale)" if weather.stale else ""
+    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} snapshot {status}{stale}: {out_dir}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--out", default=APP_DIR, help="directory to write index.html and snapshot.json to")
+    parser.add_argument("--static-base", default="static",
+                        help="URL of the static/ directory as seen from index.html")
+    parser.add_argument("--trip", help="slug of the trip to snapshot (default: the first in trips.json)")
+    parser.add_argument("--every", type=int, default=0,
+                        help="rewrite the snapshot every N seconds instead of once")
+    args = parser.parse_args(argv)
+
+    hosted_trips = trips.load_trips()
+    if args.trip and args.trip not in hosted_trips:
+        parser.error(f"unknown trip {args.trip!r}; choose from {', '.join(hosted_trips)}")
+    trip = hosted_trips[args.trip] if args.trip else next(iter(hosted_trips.values()))
+
+    os.makedirs(args.out, exist_ok=True)
+    while True:
+        write_snapshot(trip, hosted_trips, args.out, args.static_base)
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Append-only history of fetched weather, for season-long trend charts.
+
+Every successful refresh appends one sample per location and metric
+(temperature, wind, 7-day snowfall forecast, resort base depth) to a SQLite
+table clustered on (series, time), where a series is one (location,
+metric) pair stored once and referenced by a small integer id. Range
+queries walk that index directly, and downsample() buckets a range
+server-side into min/max/mean rows, so a chart covering a whole season
+reads a few hundred rows instead of every sample.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# The history file shared by everything that fetches weather (the app, the
+# API and the snapshot generator), so a sample is recorded by whichever of
+# them fetched it; the others only adopt it from the cache
+SNOW_HISTORY_PATH = os.environ.get(
+    "SNOW_HISTORY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "history.sqlite3"),
+)
+
+# Metrics recorded for each source
+CONDITIONS_METRICS = ("temperature", "wind_speed", "snowfall_7day")
+BASE_DEPTH_METRIC = "base_depth"
+
+
+def base_depth_value(base_depth):
+    """Numeric base depth in inches: SnoCountry ranges like "40-52" are
+    recorded as their midpoint. None if there is nothing to record."""
+    if isinstance(base_depth, str) and "-" in base_depth:
+        low, _, high = base_depth.partition("-")
+        try:
+            return (float(low) + float(high)) / 2
+        except ValueError:
+            return None
+    try:
+        return float(base_depth) if base_depth is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def open_shared_history():
+    """SnowHistory on SNOW_HISTORY_PATH, or None if it can't be opened."""
+    try:
+        return SnowHistory(SNOW_HISTORY_PATH)
+    except (OSError, sqlite3.Error):
+        return None  # Read-only filesystem - run without history
+
+
+class SnowHistory:
+    """Time series of (location, metric) samples in a SQLite file.
+
+    Samples are never updated or deleted; recording the same (location,
+    metric, time) twice keeps the first value. Safe to use from any thread
+    and from several processes sharing the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._series_ids = {}  # (location, metric) -> series id
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                "id INTEGER PRIMARY KEY, location TEXT NOT NULL, metric TEXT NOT NULL, "
+                "UNIQUE (location, metric))"
+            )
+            # WITHOUT ROWID stores rows in primary key order, so the table is
+            # its own time index and a range scan is one sequential walk
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                "series INTEGER NOT NULL, ts REAL NOT NULL, value REAL NOT NULL, "
+                "PRIMARY KEY (series, ts)) WITHOUT ROWID"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _series_id(self, conn, location, metric, create):
+        """Id of a (location, metric) series; None if it doesn't exist and
+        create is False."""
+        key = (location, metric)
+        series_id = self._series_ids.get(key)
+        if series_id is None:
+            if create:
+                conn.execute("INSERT OR IGNORE INTO series (location, metric) VALUES (?, ?)", key)
+            row = conn.execute(
+                "SELECT id FROM series WHERE location = ? AND metric = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            series_id = self._series_ids[key] = row[0]
+        return series_id
+
+    def record(self, location, values, ts=None):
+        """Append {metric: value} for location at ts (default: now). None
+        values are skipped."""
+        self.record_many((location, metric, ts, value) for metric, value in values.items())
+
+    def record_many(self, samples):
+        """Append (location, metric, ts, value) samples in one transaction;
+        a ts of None means now."""
+        now = time.time()
+        samples = [(location, metric, now if ts is None else ts, float(value))
+                   for location, metric, ts, value in samples if value is not None]
+        if not samples:
+            return
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN")
+            try:
+                rows = [(self._series_id(conn, location, metric, create=True), ts, value)
+                        for location, metric, ts, value in samples]
+                conn.executemany(
+                    "INSERT OR IGNORE INTO samples (series, ts, value) VALUES (?, ?, ?)", rows
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._series_ids.clear()  # Ids created in this transaction are gone
+                raise
+
+    def range(self, location, metric, start, end):
+        """[(ts, value), ...] with start <= ts < end, oldest first."""
+        with self._connect() as conn:
+            series_id = self._series_id(conn, location, metric, create=False)
+            if series_id is None:
+                return []
+            return conn.execute(
+                "SELECT ts, value FROM samples WHERE series = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (series_id, start, end),
+            ).fetchall()
+
+    def downsample(self, location, metric, start, end, buckets=300):
+        """Split [start, end) into equal time buckets and return
+        [(bucket_start, min, max, mean, count), ...] for the non-empty ones,
+        oldest first. Aggregation runs inside SQLite, off the same index
+        walk as range()."""
+        width = (end - start) / buckets
+        if width <= 0:
+            return []
+        with self._connect() as conn:
+            series_id = self._series_id(conn, location, metric, create=False)
+            if series_id is None:
+                return []
+            rows = conn.execute(
+                "SELECT CAST((ts - ?) / ? AS INTEGER) AS bucket, "
+                "MIN(value), MAX(value), AVG(value), COUNT(*) FROM samples "
+                "WHERE series = ? AND ts >= ? AND ts < ? "
+                "GROUP BY bucket ORDER BY bucket",
+                (start, width, series_id, start, end),
+            ).fetchall()
+        return [(start + bucket * width, low, high, mean, count)
+                for bucket, low, high, mean, count in rows]
@@ -0,0 +1,35 @@
+"""Shared fixtures: the app modules and the benchmark stubs on sys.path, and
+local Open-Meteo and SnoCountry stubs the weather module is pointed at."""
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import weather  # noqa: E402
+from resilience import CircuitBreaker  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+from trips import load_trips  # noqa: E402
+
+
+@pytest.fixture
+def trips():
+    return list(load_trips().values())
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    """(open_meteo, snocountry) stub servers serving the recorded fixtures,
+    with fresh circuit breakers and no remembered validators."""
+    open_meteo = StubServer("open_meteo.json").start()
+    snocountry = StubServer("snocountry.json").start()
+    monkeypatch.setattr(weather, "OPEN_METEO_URL", open_meteo.url)
+    monkeypatch.setattr(weather, "SNOCOUNTRY_URL", snocountry.url)
+    monkeypatch.setattr(weather, "BREAKERS", {key: CircuitBreaker(key) for key in weather.SOURCES})
+    monkeypatch.setattr(weather, "_validated", {})
+    yield open_meteo, snocountry
+    open_meteo.stop()
+    snocountry.stop()
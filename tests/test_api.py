@@ -0,0 +1,44 @@
+"""api.py's slideshow image route."""
+import asyncio
+import json
+import os
+
+import api
+
+
+def get(path, headers=()):
+    """(status, {header: value}, body) of a GET through the ASGI app."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path,
+             "headers": [(name.encode(), value.encode()) for name, value in headers]}
+    asyncio.run(api.app(scope, receive, send))
+    start, body = messages
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, body["body"]
+
+
+def some_image():
+    with open(os.path.join(api.IMAGE_DIR, "manifest.json")) as f:
+        entry = next(iter(json.load(f).values()))
+    return "/static/" + entry["variants"]["jpg"][0][1]
+
+
+def test_image_is_immutable_and_revalidates():
+    status, headers, body = get(some_image())
+    assert status == 200 and body
+    assert headers["cache-control"] == api.IMMUTABLE
+    assert headers["content-type"] == "image/jpeg"
+
+    status, _, body = get(some_image(), [("if-none-match", headers["etag"])])
+    assert status == 304 and body == b""
+
+
+def test_image_paths_stay_inside_the_image_dir():
+    assert get("/static/img/../../trips.json")[0] == 404
+    assert get("/static/style.css")[0] == 404
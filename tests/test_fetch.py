@@ -0,0 +1,43 @@
+"""Both weather sources are fetched side by side, under one deadline."""
+import time
+
+import weather
+from weather import BASE_DEPTH_KEY, CONDITIONS_KEY, WeatherRefresher
+from weather_cache import MemoryCache
+
+
+def warm_up(trips):
+    """Pay for the one-off imports (requests, NumPy) and the first
+    connections outside the timed part."""
+    weather.fetch_all(trips)
+    weather._validated.clear()
+
+
+def test_cold_refresh_costs_the_slower_call(stubs, trips):
+    open_meteo, snocountry = stubs
+    warm_up(trips)
+    open_meteo.latency, snocountry.latency = 0.6, 0.4
+    refresher = WeatherRefresher(interval=3600, trips=trips, cache=MemoryCache())
+
+    start = time.perf_counter()
+    snapshots = refresher.refresh()
+    elapsed = time.perf_counter() - start
+
+    assert all(s.conditions is not None and s.base_depth is not None for s in snapshots.values())
+    assert open_meteo.requests == snocountry.requests == 2
+    # Roughly max(0.6, 0.4), well short of their 1.0 s sum
+    assert 0.6 <= elapsed < 0.85
+
+
+def test_source_past_the_deadline_is_dropped(stubs, trips):
+    open_meteo, snocountry = stubs
+    warm_up(trips)
+    snocountry.latency = 2.0
+
+    start = time.perf_counter()
+    fetched = weather.fetch_all(trips, deadline=0.5)
+    elapsed = time.perf_counter() - start
+
+    assert fetched[CONDITIONS_KEY] is not None
+    assert fetched[BASE_DEPTH_KEY] is None
+    assert elapsed < 1.0
@@ -0,0 +1,19 @@
+"""The countdown is measured to the trip's start in the resort's timezone,
+whatever timezone the server runs in."""
+from datetime import datetime, timezone
+
+from page import calculate_countdown, countdown_target_ms
+from trips import trip_start
+
+
+def test_target_is_resort_local():
+    # Mountain Daylight Time by March 14
+    start = trip_start("2026-03-14T00:00:00", "America/Denver")
+    assert countdown_target_ms(start) == int(
+        datetime(2026, 3, 14, 6, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def test_countdown_compares_aware_times():
+    start = trip_start("2999-01-01T00:00:00", "America/Denver")
+    assert calculate_countdown(start)["total_seconds"] > 0
+    assert calculate_countdown(trip_start("2000-01-01T00:00:00", "Asia/Tokyo")) is None
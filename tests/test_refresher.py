@@ -0,0 +1,109 @@
+"""WeatherRefresher: readiness, and Retry when an upstream has failed."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import weather
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from weather import CONDITIONS_KEY, WeatherRefresher
+from weather_cache import MemoryCache
+
+
+def test_failed_first_refresh_stops_the_wait(stubs, trips):
+    open_meteo, snocountry = stubs
+    open_meteo.status = snocountry.status = 503
+    refresher = WeatherRefresher(interval=3600, trips=trips, cache=MemoryCache()).start()
+
+    start = time.perf_counter()
+    snapshot = refresher.wait_until_ready(trips[0].slug, timeout=15)
+    assert snapshot.conditions is None
+    # The attempt's retries ran out well before the render's 15 s timeout
+    assert time.perf_counter() - start < 10
+
+    # Later renders show the error straight away
+    start = time.perf_counter()
+    refresher.wait_until_ready(trips[0].slug, timeout=15)
+    assert time.perf_counter() - start < 0.1
+
+
+def failing_fetcher(monkeypatch, delay=0.0):
+    """Replace the upstream fetch with one that fails after delay seconds;
+    returns the list of source keys it was called for."""
+    calls = []
+
+    def fetch_source(key, trips, deadline=None):
+        calls.append(key)
+        time.sleep(delay)
+        return None
+
+    monkeypatch.setattr(weather, "fetch_source", fetch_source)
+    return calls
+
+
+def test_concurrent_retries_share_one_fetch(monkeypatch, trips):
+    calls = failing_fetcher(monkeypatch, delay=0.2)
+    refresher = WeatherRefresher(interval=3600, trips=trips, cache=MemoryCache())
+    with ThreadPoolExecutor(max_workers=100) as pool:
+        pending = list(pool.map(lambda _: refresher.retry(CONDITIONS_KEY), range(100)))
+    for future in pending:
+        future.result(timeout=5)
+
+    assert calls == [CONDITIONS_KEY]
+
+
+def test_fetching_while_a_retry_is_in_flight(monkeypatch, trips):
+    failing_fetcher(monkeypatch, delay=0.2)
+    refresher = WeatherRefresher(interval=3600, trips=trips, cache=MemoryCache()).start()
+    assert refresher.fetching()  # The first refresh
+    refresher.wait_until_ready(trips[0].slug, timeout=5)
+    assert not refresher.fetching()
+
+    pending = refresher.retry(CONDITIONS_KEY)
+    assert refresher.fetching()
+    pending.result(timeout=5)
+    assert not refresher.fetching()
+
+
+def test_scheduled_refresh_does_not_start_the_retry_cooldown(monkeypatch, trips):
+    calls = failing_fetcher(monkeypatch)
+    refresher = WeatherRefresher(interval=3600, trips=trips, cache=MemoryCache())
+    refresher.refresh()
+    assert calls.count(CONDITIONS_KEY) == 1
+
+    refresher.retry(CONDITIONS_KEY).result(timeout=5)
+    assert calls.count(CONDITIONS_KEY) == 2
+
+    # A second Retry within RETRY_COOLDOWN does not fetch
+    refresher.retry(CONDITIONS_KEY).result(timeout=5)
+    assert calls.count(CONDITIONS_KEY) == 2
+
+
+def test_retry_against_a_flaky_upstream(monkeypatch, stubs, trips):
+    open_meteo, _ = stubs
+    breaker = CircuitBreaker(CONDITIONS_KEY, failure_threshold=3, reset_timeout=0.5)
+    monkeypatch.setitem(weather.BREAKERS, CONDITIONS_KEY, breaker)
+    monkeypatch.setattr(weather, "RETRY_COOLDOWN", 0)
+    refresher = WeatherRefresher(interval=3600, trips=trips, cache=MemoryCache())
+    good = refresher.refresh()[trips[0].slug].conditions
+
+    # Down: Retry returns before the upstream is even called, then every
+    # attempt fails, the circuit opens and the last good data stays up
+    open_meteo.status = 503
+    start = time.perf_counter()
+    pending = refresher.retry(CONDITIONS_KEY)
+    assert time.perf_counter() - start < 0.1
+    snapshot = pending.result(timeout=10)[trips[0].slug]
+    assert snapshot.stale and snapshot.conditions is good
+    assert breaker.state == OPEN
+
+    # Back up, but the circuit is still open: fail fast without a request
+    open_meteo.status = 200
+    requests = open_meteo.requests
+    assert refresher.retry(CONDITIONS_KEY).result(timeout=1)[trips[0].slug].stale
+    assert open_meteo.requests == requests
+
+    # After reset_timeout one trial call goes through and closes it
+    time.sleep(0.6)
+    snapshot = refresher.retry(CONDITIONS_KEY).result(timeout=5)[trips[0].slug]
+    assert not snapshot.stale and snapshot.conditions is not None
+    assert open_meteo.requests == requests + 1
+    assert breaker.transitions == {(CLOSED, OPEN): 1, (OPEN, HALF_OPEN): 1, (HALF_OPEN, CLOSED): 1}
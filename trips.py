@@ -0,0 +1,70 @@
+"""Registry of the trips this deployment counts down to.
+
+Trips are read from trips.json (or the file named by COUNTDOWN_TRIPS_PATH),
+in order; the first one is the default when a visitor doesn't pick one with
+?trip=<slug>. Each trip has its own date and resort, and trips at the same
+resort share one location, so adding a trip only adds upstream lookups when
+it brings a new place to forecast.
+"""
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+TRIPS_PATH = os.environ.get(
+    "COUNTDOWN_TRIPS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "trips.json"),
+)
+
+
+@dataclass(frozen=True)
+class Trip:
+    """One hosted countdown.
+
+    ``latitude``/``longitude`` locate the Open-Meteo forecast (in the IANA
+    ``timezone``) and ``resort_id`` is the SnoCountry resort id, or None if
+    the resort isn't covered by SnoCountry. ``date`` is when the trip starts,
+    in ``timezone`` (timezone-aware) unless that is "auto", in which case it
+    is naive and taken as the server's local time.
+    """
+    slug: str
+    title: str
+    resort: str
+    date: datetime
+    latitude: float
+    longitude: float
+    timezone: str = "auto"
+    resort_id: str = None
+
+    @property
+    def location_key(self):
+        """Identifies the forecast location; shared by trips to one resort."""
+        return f"{self.latitude:.4f},{self.longitude:.4f}"
+
+
+def trip_start(date, timezone):
+    """The trip's start from its ISO date: localized to the IANA timezone
+    unless the date carries its own offset or timezone is "auto"."""
+    start = datetime.fromisoformat(date)
+    if start.tzinfo is None and timezone != "auto":
+        try:
+            start = start.replace(tzinfo=ZoneInfo(timezone))
+        except ZoneInfoNotFoundError:
+            raise ValueError(f"unknown timezone {timezone!r}") from None
+    return start
+
+
+def load_trips(path=TRIPS_PATH):
+    """Return {slug: Trip} in file order. Raises ValueError on a bad file."""
+    with open(path) as f:
+        entries = json.load(f)["trips"]
+    trips = {}
+    for entry in entries:
+        trip = Trip(**{**entry, "date": trip_start(entry["date"], entry.get("timezone", "auto"))})
+        if trip.slug in trips:
+            raise ValueError(f"duplicate trip slug {trip.slug!r} in {path}")
+        trips[trip.slug] = trip
+    if not trips:
+        raise ValueError(f"no trips configured in {path}")
+    return trips
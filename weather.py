@@ -0,0 +1,624 @@
+"""Weather and snow data for the hosted trip countdowns.
+
+Upstream lookups for every trip run on a single background thread that
+publishes an immutable WeatherSnapshot per trip. Render paths only read the
+latest snapshot, so page latency never depends on Open-Meteo or SnoCountry
+being fast.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+import metrics
+from conditions import Conditions, parse_conditions
+from powder import FORECAST_DAYS, HOURLY_VARIABLES, forecast_many
+from resilience import CircuitBreaker, call_with_retries
+from snow_history import BASE_DEPTH_METRIC, CONDITIONS_METRICS, base_depth_value
+from weather_cache import MemoryCache
+
+# Open-Meteo forecast API (overridable, e.g. to point benchmarks at a stub)
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+
+# SnoCountry API - resort-reported snow base depth
+SNOCOUNTRY_URL = os.environ.get("SNOCOUNTRY_URL", "https://feeds.snocountry.net/conditions.php")
+
+# Locations per Open-Meteo request and resort ids per SnoCountry request.
+# Every hosted trip is fetched in as few requests as these allow.
+OPEN_METEO_BATCH = 50
+SNOCOUNTRY_BATCH = 50
+
+# Source names (also the cache key prefix for each upstream payload and the
+# source label on upstream metrics)
+CONDITIONS_KEY = "open_meteo"
+BASE_DEPTH_KEY = "snocountry"
+
+# Seconds each source's values stay fresh, matched to how often they change
+# upstream: Open-Meteo recomputes its forecasts about hourly, while resorts
+# publish a base depth report once or twice a day. A refresh only refetches
+# the sources whose entries have expired.
+SOURCE_TTLS = {
+    CONDITIONS_KEY: 3600,
+    BASE_DEPTH_KEY: 3 * 3600,
+}
+
+# Per-request timeouts for each source, and an overall deadline for one
+# refresh covering both sources (including Open-Meteo retries)
+OPEN_METEO_TIMEOUT = 10
+SNOCOUNTRY_TIMEOUT = 15
+REFRESH_DEADLINE = 20
+
+# One keep-alive session for all upstream calls so repeat refreshes reuse
+# pooled TCP/TLS connections instead of handshaking every time. Created (and
+# requests imported) on the first fetch rather than at import, so a cold
+# start that is served from the cache never pays for loading requests.
+# requests advertises gzip in Accept-Encoding and decodes it transparently.
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+            session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+            _session = session
+        return _session
+
+
+# Validators and decoded body of the last full response to each distinct
+# request (URL plus query), so the next identical request can be sent as a
+# conditional GET and a 304 answered from memory
+_validated = {}
+
+
+def _get_json(source, url, params, timeout):
+    """GET url and return its decoded JSON body.
+
+    When an earlier response to the same request carried an ETag or
+    Last-Modified, the request is made conditional and an unchanged payload
+    comes back as a bodyless 304, answered with the earlier body. Raises on
+    network or HTTP errors.
+    """
+    key = (url, tuple(sorted(params.items())))
+    previous = _validated.get(key)
+    headers = {}
+    if previous is not None:
+        etag, last_modified, _ = previous
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    response = _get_session().get(url, params=params, headers=headers, timeout=timeout)
+    # Content-Length is the size on the wire, before gzip is decoded
+    size = int(response.headers.get("Content-Length") or len(response.content))
+    metrics.inc("upstream_response_bytes_total", size,
+                doc="Upstream response body bytes received", source=source)
+    if response.status_code == 304 and previous is not None:
+        metrics.inc("upstream_not_modified_total", doc="Upstream requests answered with 304",
+                    source=source)
+        return previous[2]
+    response.raise_for_status()
+    body = response.json()
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        _validated[key] = (etag, last_modified, body)
+    else:
+        _validated.pop(key, None)
+    return body
+
+
+# Both sources are fetched side by side so a cold refresh costs the slower
+# of the two calls rather than their sum, with room for a Retry of each
+# running in the background alongside a scheduled refresh
+_fetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="weather-fetch")
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_snow_conditions(trips):
+    """Fetch current weather and snow conditions for every trip's location.
+
+    Locations are deduplicated and sent OPEN_METEO_BATCH at a time as
+    comma-separated latitude/longitude lists, asking for current conditions
+    and the hourly series the powder outlook and sidebar are computed from
+    (see powder.py). Each batch's outlooks are computed in one vectorized
+    pass and each location's payload is parsed once, here, so the result is
+    {location_key: Conditions}. Makes a single attempt per batch and
+    raises on any network or HTTP error; retries and circuit breaking are
+    layered on by fetch_source().
+    """
+    locations = list({trip.location_key: trip for trip in trips}.values())
+    results = {}
+    for batch in _batches(locations, OPEN_METEO_BATCH):
+        params = {
+            "latitude": ",".join(str(trip.latitude) for trip in batch),
+            "longitude": ",".join(str(trip.longitude) for trip in batch),
+            "current": "temperature_2m,weather_code,wind_speed_10m",
+            "hourly": ",".join(HOURLY_VARIABLES),
+            "timezone": ",".join(trip.timezone for trip in batch),
+            "forecast_days": FORECAST_DAYS,
+            "temperature_unit": "fahrenheit",
+            "wind_speed_unit": "mph",
+            "precipitation_unit": "inch"
+        }
+        payloads = _get_json(CONDITIONS_KEY, OPEN_METEO_URL, params, OPEN_METEO_TIMEOUT)
+        # A single location comes back as one object, several as a list
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+        if len(payloads) != len(batch):
+            raise ValueError(f"Open-Meteo returned {len(payloads)} locations for {len(batch)}")
+        for trip, payload, powder in zip(batch, payloads, forecast_many(payloads)):
+            results[trip.location_key] = parse_conditions(payload, powder)
+    return results
+
+
+def _base_depth(resort):
+    """Base depth from one SnoCountry item, or None if none is reported."""
+    base_min = resort.get("avgBaseDepthMin", "")
+    base_max = resort.get("avgBaseDepthMax", "")
+    if base_min and base_max and base_min == base_max:
+        return int(base_min)
+    elif base_min and base_max:
+        return f'{base_min}-{base_max}'
+    elif base_min:
+        return int(base_min)
+    return None
+
+
+def get_resort_base_depths(trips):
+    """Fetch resort-reported base depths from SnoCountry for every trip.
+
+    Resort ids are deduplicated and sent SNOCOUNTRY_BATCH at a time. Returns
+    {resort_id: base depth}, with None for resorts that report no base
+    depth; raises on network or HTTP errors so fetch_source() can retry them.
+    """
+    resort_ids = sorted({trip.resort_id for trip in trips if trip.resort_id})
+    results = {}
+    for batch in _batches(resort_ids, SNOCOUNTRY_BATCH):
+        payload = _get_json(BASE_DEPTH_KEY, SNOCOUNTRY_URL, {
+            "apiKey": "SnoCountry.example",
+            "ids": ",".join(batch),
+        }, SNOCOUNTRY_TIMEOUT)
+        items = {str(item.get("id")): item for item in payload.get("items", [])}
+        for resort_id in batch:
+            resort = items.get(resort_id)
+            results[resort_id] = _base_depth(resort) if resort else None
+    return results
+
+
+# The lease that lets exactly one process refresh the upstream sources at a time
+REFRESH_LEASE = "weather-refresh"
+
+# Batched fetcher behind each source; each returns {location: value}
+SOURCES = {
+    CONDITIONS_KEY: get_snow_conditions,
+    BASE_DEPTH_KEY: get_resort_base_depths,
+}
+
+
+def locations(key, trips):
+    """The distinct locations a source is fetched for: forecast locations for
+    Open-Meteo, resort ids for SnoCountry."""
+    if key == CONDITIONS_KEY:
+        return sorted({trip.location_key for trip in trips})
+    return sorted({trip.resort_id for trip in trips if trip.resort_id})
+
+
+def cache_key(key, location):
+    """Cache entries are per source and location, so trips sharing a resort
+    share entries and adding a trip never invalidates the others."""
+    return f"{key}:{location}"
+
+
+# One circuit breaker per upstream. While a breaker is open, refreshes fail
+# fast and the snapshot keeps serving the last known good payload.
+BREAKERS = {key: CircuitBreaker(key) for key in SOURCES}
+
+
+def _timed_fetch(key, trips):
+    """One batched upstream fetch, recorded in the latency histogram and counters."""
+    start = time.perf_counter()
+    result = "error"
+    try:
+        value = SOURCES[key](trips)
+        result = "ok"
+        return value
+    finally:
+        metrics.observe("upstream_request_seconds", time.perf_counter() - start,
+                        doc="Upstream API call latency", source=key)
+        metrics.inc("upstream_requests_total", doc="Upstream API calls by outcome",
+                    source=key, result=result)
+
+
+def fetch_source(key, trips, deadline=None):
+    """Fetch one source for all trips with jittered retries behind its
+    circuit breaker."""
+    breaker = BREAKERS[key]
+    return call_with_retries(lambda: breaker.call(_timed_fetch, key, trips), deadline=deadline)
+
+
+_BREAKER_STATE_VALUES = {"closed": 0, "half-open": 1, "open": 2}
+
+
+def _breaker_metrics():
+    for key, breaker in BREAKERS.items():
+        yield "circuit_breaker_state", {"source": key}, _BREAKER_STATE_VALUES[breaker.state]
+        for (before, after), count in breaker.transitions.items():
+            yield ("circuit_breaker_transitions_total",
+                   {"source": key, "from": before, "to": after}, count)
+
+
+metrics.register_gauges(_breaker_metrics)
+
+
+def _result_or_none(future):
+    """Return a finished future's result, or None if it failed or is late."""
+    if not future.done():
+        return None
+    try:
+        return future.result()
+    except Exception:
+        return None
+
+
+def fetch_all(trips, deadline=REFRESH_DEADLINE, keys=tuple(SOURCES)):
+    """Fetch the given sources (default: both) for all trips concurrently.
+
+    Returns {key: {location: value}}; a source that errors or misses the
+    combined deadline comes back as None.
+    """
+    until = time.time() + deadline
+    futures = {key: _fetch_pool.submit(fetch_source, key, trips, until) for key in keys}
+    wait(futures.values(), timeout=deadline)
+    return {key: _result_or_none(future) for key, future in futures.items()}
+
+
+@dataclass(frozen=True)
+class WeatherSnapshot:
+    """Latest known weather data for one trip, shared read-only by every
+    session viewing it.
+
+    ``conditions`` is the parsed Open-Meteo forecast (a conditions.Conditions,
+    shared by reference) and ``base_depth`` the SnoCountry
+    base depth; either may be None if that source has never succeeded.
+    ``updated_at`` is the epoch time of the last refresh attempt and ``stale``
+    is True when that attempt failed and older values are being served.
+    ``version`` goes up by one with every publish, so anything rendered from
+    a snapshot can be cached until the version changes.
+    """
+    conditions: object = None
+    base_depth: object = None
+    updated_at: float = 0.0
+    stale: bool = False
+    version: int = 0
+
+
+_EMPTY_SNAPSHOT = WeatherSnapshot()
+
+# Minimum seconds between Retry-triggered fetches of one source
+RETRY_COOLDOWN = 30
+
+# Last good weather, written by every refresher given it (the app and the
+# snapshot generator) and read on a cold start with an empty cache, so the
+# first render never waits on the upstream APIs
+WEATHER_SNAPSHOT_PATH = os.environ.get(
+    "WEATHER_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "weather_snapshot.json"),
+)
+
+
+class WeatherRefresher:
+    """Refresh both upstream sources for every trip on a schedule from one
+    daemon thread.
+
+    Every ``interval`` seconds, each source whose cached values have
+    outlived its SOURCE_TTLS entry is refetched, at one batched request per
+    source (per batch size) no matter how many trips share it. Fetched
+    payloads are written to ``cache`` (see weather_cache.py) per location. With a shared backend, a
+    refresher whose cache entries are still fresh, or whose peer holds the
+    refresh lease, adopts the cached payloads instead of calling the
+    upstream APIs itself. If ``history`` (a snow_history.SnowHistory) is
+    given, every successful fetch is also appended to it; adopted payloads
+    are not, since whoever fetched them already recorded them.
+
+    If ``snapshot_path`` is given, the latest good values are also saved
+    there as JSON after every successful refresh, and a cold start whose
+    cache is empty (e.g. a woken-up host with a fresh filesystem) publishes
+    them straight away instead of making the first visitor wait on the
+    upstream APIs.
+    """
+
+    def __init__(self, interval, trips, cache=None, history=None, snapshot_path=None):
+        self.interval = interval
+        self.trips = list(trips)
+        self.cache = cache if cache is not None else MemoryCache()
+        self.history = history
+        self.snapshot_path = snapshot_path
+        self._owner = f"{os.getpid()}-{id(self)}"
+        self._conditions = {}
+        self._base_depths = {}
+        self._snapshots = {}
+        self._version = 0
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._retry_lock = threading.Lock()
+        self._inflight = {}
+        self._last_retry = {}
+        self._listeners = []
+        self._thread = None
+
+    def snapshot(self, slug):
+        """The most recently published snapshot for a trip (never blocks)."""
+        return self._snapshots.get(slug, _EMPTY_SNAPSHOT)
+
+    def start(self):
+        """Start the background thread; safe to call more than once.
+
+        Whatever the cache already holds is published immediately, expired
+        or not, so a restart serves the last payloads without waiting on
+        the network. With an empty cache, the saved snapshot (if any) is
+        published instead, marked stale until the first refresh lands.
+        """
+        if self._thread is None:
+            conditions, base_depths, expired = self._read_cache()
+            stale = bool(expired)
+            if not conditions:
+                conditions, base_depths = self._load_snapshot()
+                stale = True
+            if conditions:
+                self._publish(conditions, base_depths, stale=stale)
+            self._thread = threading.Thread(
+                target=self._run, name="weather-refresher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def add_listener(self, callback):
+        """Call callback() after every publish, from the publishing thread.
+        Callbacks must be quick and must not raise."""
+        self._listeners.append(callback)
+
+    def wait_until_ready(self, slug, timeout):
+        """Block until there is weather to show or the first refresh attempt
+        has finished, successfully or not, or timeout elapses; then return
+        the trip's snapshot."""
+        self._ready.wait(timeout)
+        return self.snapshot(slug)
+
+    def fetching(self):
+        """Whether the first refresh attempt or a retry() is still in
+        flight, i.e. whether the snapshots may change before the next
+        scheduled refresh."""
+        return not self._ready.is_set() or bool(self._inflight)
+
+    def request_refresh(self):
+        """Ask the background thread to refresh now instead of on schedule."""
+        self._wake.set()
+
+    def refresh(self):
+        """Refetch every source whose cached values have expired, for every
+        trip, and publish new snapshots.
+
+        A source that fails keeps its previous values (stale-while-revalidate)
+        so a flaky upstream never blanks out data we already had.
+        """
+        with self._refresh_lock:
+            conditions, base_depths, expired = self._read_cache()
+            for key in SOURCES:
+                metrics.inc("weather_cache_lookups_total", doc="Refresh-time cache lookups",
+                            source=key, result="miss" if key in expired else "hit")
+            if not expired:
+                snapshots = self._publish(conditions, base_depths, stale=False)
+                self._save_snapshot()
+                return snapshots
+
+            if self.cache.acquire_lease(REFRESH_LEASE, self._owner, REFRESH_DEADLINE * 2):
+                try:
+                    fetched = fetch_all(self.trips, keys=expired)
+                    for key, values in fetched.items():
+                        self._store(key, values)
+                finally:
+                    self.cache.release_lease(REFRESH_LEASE, self._owner)
+                # Sources that weren't due, or failed, keep their cached values
+                conditions = fetched.get(CONDITIONS_KEY) or conditions
+                base_depths = fetched.get(BASE_DEPTH_KEY) or base_depths
+                stale = any(values is None for values in fetched.values())
+            else:
+                conditions, base_depths, expired = self._wait_for_peer()
+                stale = bool(expired)
+
+            snapshots = self._publish(conditions, base_depths, stale=stale)
+            if not stale:
+                self._save_snapshot()
+            return snapshots
+
+    def retry(self, key):
+        """Start refetching one failed source (CONDITIONS_KEY or
+        BASE_DEPTH_KEY) for every trip, in one batched fetch off the
+        caller's thread, and return straight away.
+
+        Only that source's upstream is called; the other keeps its cached
+        values. Concurrent retries for the same source share a single
+        in-flight fetch, and a source retried within RETRY_COOLDOWN seconds
+        is not fetched again (scheduled refreshes don't count towards it).
+        Returns a Future of the resulting {slug: WeatherSnapshot}, which are
+        also published like any refresh's.
+        """
+        with self._retry_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if time.time() - self._last_retry.get(key, 0) < RETRY_COOLDOWN:
+                future = Future()
+                future.set_result(self._snapshots)
+                return future
+            self._last_retry[key] = time.time()
+            future = self._inflight[key] = _fetch_pool.submit(self._retry_source, key)
+        return future
+
+    def _retry_source(self, key):
+        """retry()'s fetch, on a _fetch_pool thread."""
+        try:
+            try:
+                values = fetch_source(key, self.trips, time.time() + REFRESH_DEADLINE)
+            except Exception:
+                values = None  # Including CircuitOpenError: fail fast, keep what we had
+            self._store(key, values)
+            if key == CONDITIONS_KEY:
+                return self._publish(values, None, stale=values is None)
+            return self._publish(None, values, stale=values is None)
+        except Exception:
+            return self._snapshots
+        finally:
+            with self._retry_lock:
+                self._inflight.pop(key, None)
+
+    def _store(self, key, values):
+        """Write a source's freshly fetched {location: value} to the cache
+        and the history."""
+        for location, value in (values or {}).items():
+            if key == CONDITIONS_KEY:
+                value = value.to_dict()
+            self.cache.set(cache_key(key, location), value, SOURCE_TTLS[key])
+        if self.history is not None and values:
+            self._record_history(key, values)
+
+    def _record_history(self, key, values):
+        samples = []
+        for location, value in values.items():
+            series = cache_key(key, location)
+            if key == CONDITIONS_KEY:
+                samples.extend((series, metric, None, getattr(value, metric))
+                               for metric in CONDITIONS_METRICS)
+            else:
+                samples.append((series, BASE_DEPTH_METRIC, None, base_depth_value(value)))
+        try:
+            self.history.record_many(samples)
+        except (OSError, ValueError, sqlite3.Error):
+            pass  # History is best-effort; never fail a refresh over it
+
+    def _read_cache(self):
+        """Return (conditions, base_depths, expired) from the cache: a
+        {location: value} dict of whatever entries exist for each source, and
+        the sources with any entry missing or past its TTL."""
+        values = {}
+        expired = []
+        for key in SOURCES:
+            fresh = True
+            values[key] = {}
+            for location in locations(key, self.trips):
+                entry = self.cache.get(cache_key(key, location))
+                value = entry.value if entry else None
+                if entry and key == CONDITIONS_KEY:
+                    try:
+                        value = Conditions.from_dict(value)
+                    except TypeError:
+                        entry = None  # Written by an older version - refetch
+                if entry is None:
+                    fresh = False
+                    continue
+                fresh = fresh and entry.fresh
+                values[key][location] = value
+            if not fresh:
+                expired.append(key)
+        return values[CONDITIONS_KEY], values[BASE_DEPTH_KEY], expired
+
+    def _save_snapshot(self):
+        """Write the current per-location values to snapshot_path (best
+        effort; atomically, so a reader never sees half a file)."""
+        if not self.snapshot_path:
+            return
+        with self._publish_lock:
+            data = {
+                "saved_at": time.time(),
+                "conditions": {loc: c.to_dict() for loc, c in self._conditions.items()},
+                "base_depths": dict(self._base_depths),
+            }
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            pass  # Read-only filesystem - nothing to warm from next time
+
+    def _load_snapshot(self):
+        """Return (conditions, base_depths) from snapshot_path, or
+        (None, None) if there is no usable saved snapshot."""
+        if not self.snapshot_path:
+            return None, None
+        try:
+            with open(self.snapshot_path) as f:
+                data = json.load(f)
+            conditions = {loc: Conditions.from_dict(c) for loc, c in data["conditions"].items()}
+            return conditions, data["base_depths"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None, None
+
+    def _wait_for_peer(self):
+        """Another process holds the lease; give it up to REFRESH_DEADLINE to
+        publish fresh payloads, then settle for whatever is cached. Returns
+        _read_cache()'s (conditions, base_depths, expired)."""
+        deadline = time.time() + REFRESH_DEADLINE
+        while time.time() < deadline:
+            conditions, base_depths, expired = self._read_cache()
+            if not expired:
+                return conditions, base_depths, expired
+            time.sleep(0.5)
+        return self._read_cache()
+
+    def _publish(self, conditions, base_depths, stale):
+        """Merge new per-location values over the previous ones (keeping
+        previous values for anything missing) and swap in a new snapshot for
+        every trip. Returns {slug: WeatherSnapshot}."""
+        with self._publish_lock:
+            if conditions:
+                self._conditions = {**self._conditions, **conditions}
+            if base_depths:
+                self._base_depths = {**self._base_depths, **base_depths}
+            now = time.time()
+            self._version += 1
+            self._snapshots = {
+                trip.slug: WeatherSnapshot(
+                    conditions=self._conditions.get(trip.location_key),
+                    base_depth=self._base_depths.get(trip.resort_id),
+                    updated_at=now,
+                    stale=stale,
+                    version=self._version,
+                )
+                for trip in self.trips
+            }
+            if self._conditions:
+                self._ready.set()
+            snapshots = self._snapshots
+        for listener in self._listeners:
+            listener()
+        return snapshots
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                pass  # Never let one bad refresh kill the thread
+            # Even a failed attempt ends the wait: renders show the error
+            # and Retry instead of blocking on an upstream that is down
+            self._ready.set()
+            self._wake.wait(self.interval)
+            self._wake.clear()
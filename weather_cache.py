@@ -0,0 +1,162 @@
+"""Cache backends for upstream weather payloads.
+
+A backend stores JSON-serialisable values under a key together with the
+time they were fetched and when they expire, and hands out short leases so
+that only one process at a time refreshes from the upstream APIs. Entries
+are returned even after they expire so callers can serve stale data while
+a refresh is in flight.
+
+MemoryCache keeps everything in the current process. SqliteCache persists
+to a file, so restarts start warm and every worker process or replica that
+shares the file also shares one refresh.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+# On-disk cache shared by everything that fetches weather (the app, the API
+# and the snapshot generator), across restarts and by every worker process
+# or replica that can see the same file
+WEATHER_CACHE_PATH = os.environ.get(
+    "WEATHER_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "weather.sqlite3"),
+)
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: object
+    fetched_at: float
+    expires_at: float
+
+    @property
+    def fresh(self):
+        return time.time() < self.expires_at
+
+
+class MemoryCache:
+    """In-process cache; leases only coordinate threads within one process."""
+
+    def __init__(self):
+        self._entries = {}
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the CacheEntry for key (fresh or expired), or None."""
+        return self._entries.get(key)
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        self._entries[key] = CacheEntry(value, now, now + ttl)
+
+    def acquire_lease(self, name, owner, ttl):
+        """Claim name for owner until ttl seconds from now; False if taken."""
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder and holder[0] != owner and holder[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == owner:
+                del self._leases[name]
+
+
+class SqliteCache:
+    """SQLite-backed cache shared by every process that opens the same file.
+
+    Each write is a single transaction, so readers never see a half-written
+    payload. Leases are taken under BEGIN IMMEDIATE, which serialises them
+    across processes through SQLite's own file locking.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps this safe to use from any
+        # thread; isolation_level=None lets us issue BEGIN IMMEDIATE ourselves
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the CacheEntry for key (fresh or expired), or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, fetched_at, expires_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return CacheEntry(json.loads(row[0]), row[1], row[2])
+        except ValueError:
+            return None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now + ttl),
+            )
+
+    def acquire_lease(self, name, owner, ttl):
+        """Claim name for owner until ttl seconds from now; False if taken."""
+        now = time.time()
+        with self._connect() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT owner, expires_at FROM leases WHERE name = ?", (name,)
+                ).fetchone()
+                if row and row[0] != owner and row[1] > now:
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (name, owner, now + ttl),
+                )
+                conn.execute("COMMIT")
+                return True
+            except sqlite3.OperationalError:
+                return False  # Database busy - someone else is refreshing
+
+    def release_lease(self, name, owner):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+            )
+
+
+def open_shared_cache():
+    """SqliteCache on WEATHER_CACHE_PATH, or None if it can't be opened."""
+    try:
+        return SqliteCache(WEATHER_CACHE_PATH)
+    except (OSError, sqlite3.Error):
+        return None  # Read-only filesystem - fall back to in-memory caching